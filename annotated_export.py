@@ -0,0 +1,335 @@
+import logging
+import math
+import posixpath
+import re
+import zipfile
+import pandas as pd
+from xml.etree import ElementTree
+from openpyxl import load_workbook
+from openpyxl.comments import Comment
+from openpyxl.comments.comment_sheet import CommentRecord, CommentSheet
+from openpyxl.styles import PatternFill
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.xml.functions import tostring
+from validation_engine import KARBON_EXPENSE_COLUMNS, findings_frame
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+MISMATCH_STAGE = 'find_mismatches'
+KARBON_STAGE = 'find_karbon_expenses'
+# Highlights in priority order: a mismatched cell stays red even when its row also has a value issue
+FILLS = {
+    'mismatch': 'FFFFC7CE',
+    'issue': 'FFF8CBAD',
+    'karbon': 'FFFFEB9C',
+}
+FILL_PRIORITY = list(FILLS)
+COMMENT_AUTHOR = 'MIS Reviewer'
+# Parts added to the package for the notes, named so they cannot clash with what Excel or openpyxl write
+COMMENTS_PART = 'xl/mis_review_comments.xml'
+VML_PART = 'xl/drawings/mis_review_notes.vml'
+NOTES_RELATIONSHIP_ID = 'rIdMisReview'
+STREAM_BYTES = 1 << 20
+
+PACKAGE_RELATIONSHIPS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+OFFICE_RELATIONSHIPS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+SHEET_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+ROW_START = re.compile(rb'<row\b[^>]*?\br="([0-9]+)"[^>]*?(/?)>')
+CELL_START = re.compile(rb'<c\b([^>]*?)(/?)>')
+CELL_COLUMN = re.compile(rb'\br="([A-Z]+)[0-9]+"')
+STYLE_ATTRIBUTE = re.compile(rb'\ss="([0-9]+)"')
+SPANS_ATTRIBUTE = re.compile(rb'\sspans="[^"]*"')
+CUSTOM_FORMAT_ATTRIBUTE = re.compile(rb'\scustomFormat="[^"]*"')
+XF_START = re.compile(rb'<xf\b[^>]*?(?=/?>)')
+# Worksheet children that come after legacyDrawing in the schema
+AFTER_LEGACY_DRAWING = [b'<legacyDrawingHF', b'<drawingHF', b'<picture', b'<oleObjects', b'<controls',
+                        b'<webPublishItems', b'<tableParts', b'<extLst', b'</worksheet>']
+
+def stage_label(stage):
+    return stage[len('find_'):].replace('_', ' ').capitalize()
+
+def format_value(value):
+    if isinstance(value, float):
+        return 'empty' if math.isnan(value) else f"{value:.2f}"
+    return str(value)
+
+def annotate(annotations, row, column, highlight, note=None):
+    current, notes = annotations.setdefault(row, {}).get(column, (highlight, []))
+    if FILL_PRIORITY.index(highlight) < FILL_PRIORITY.index(current):
+        current = highlight
+    annotations[row][column] = (current, notes + [note] if note else notes)
+
+def cell_annotations(findings, columns):
+    # sheet row -> {0-based column: (highlight, comment lines)}, with the None column highlighting the whole
+    # row. Mismatches mark their own cell, Karbon expenses the expense block of their row, and every other
+    # find_ stage marks its whole row, noted on the first cell.
+    columns = {name: index for index, name in enumerate(columns)}
+    karbon_columns = [columns[name] for name in KARBON_EXPENSE_COLUMNS.values() if name in columns]
+    annotations = {}
+    for stage, result in findings.items():
+        if result is None or not len(result):
+            continue
+        findings_df = result if isinstance(result, pd.DataFrame) else findings_frame(result)
+        if 'Row' not in findings_df.columns:
+            continue
+        if stage == MISMATCH_STAGE:
+            for row, column, expected, actual in findings_df[['Row', 'Column', 'Expected', 'Actual']].itertuples(index=False):
+                if column in columns:
+                    annotate(annotations, int(row), columns[column], 'mismatch',
+                             f"Expected {format_value(expected)}, found {format_value(actual)}")
+        elif stage == KARBON_STAGE:
+            for row in findings_df['Row']:
+                for column in karbon_columns:
+                    annotate(annotations, int(row), column, 'karbon')
+        else:
+            for row in findings_df['Row']:
+                annotate(annotations, int(row), None, 'issue')
+                annotate(annotations, int(row), 0, 'issue', stage_label(stage))
+    return annotations
+
+def relationships_part(part):
+    return posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+
+def sheet_part(archive, sheet_name):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relationships = ElementTree.fromstring(archive.read(relationships_part('xl/workbook.xml')))
+    targets = {rel.get('Id'): rel.get('Target') for rel in relationships.iter(f'{PACKAGE_RELATIONSHIPS}Relationship')}
+    for sheet in workbook.iter(f'{SHEET_MAIN}sheet'):
+        if sheet.get('name') == sheet_name:
+            target = targets[sheet.get(f'{{{OFFICE_RELATIONSHIPS}}}id')]
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    raise ValueError(f"Sheet '{sheet_name}' not found in the workbook.")
+
+def has_notes(archive, part):
+    # Sheets that already carry notes keep them; merging two VML drawings is not attempted
+    if relationships_part(part) not in archive.namelist():
+        return False
+    relationships = ElementTree.fromstring(archive.read(relationships_part(part)))
+    return any(rel.get('Type', '').endswith(('/comments', '/vmlDrawing'))
+               for rel in relationships.iter(f'{PACKAGE_RELATIONSHIPS}Relationship'))
+
+class StyleTable:
+    # Cell formats are added to styles.xml the first time an (original format, highlight) pair is met, so
+    # highlighted cells keep their number formats, fonts and borders
+    def __init__(self, styles_xml):
+        self.styles_xml = styles_xml
+        fills = re.search(rb'<fills\b[^>]*>(.*?)</fills>', styles_xml, re.S)
+        cell_xfs = re.search(rb'<cellXfs\b[^>]*>(.*?)</cellXfs>', styles_xml, re.S)
+        if fills is None or cell_xfs is None:
+            raise ValueError("The workbook's styles have no fills or cell formats.")
+        self.fill_count = len(re.findall(rb'<fill\b', fills.group(1)))
+        self.formats = re.findall(rb'<xf\b[^>]*?/>|<xf\b[^>]*?>.*?</xf>', cell_xfs.group(1), re.S)
+        self.original_count = len(self.formats)
+        self.style_ids = {}
+
+    def style_for(self, style, highlight):
+        if (style, highlight) not in self.style_ids:
+            base = self.formats[style] if style < self.original_count else self.formats[0]
+            start_tag = XF_START.match(base).group(0)
+            fill_id = self.fill_count + FILL_PRIORITY.index(highlight)
+            attributes = re.sub(rb'\s(fillId|applyFill)="[^"]*"', b'', start_tag) + f' fillId="{fill_id}" applyFill="1"'.encode()
+            self.formats.append(attributes + base[len(start_tag):])
+            self.style_ids[(style, highlight)] = len(self.formats) - 1
+        return self.style_ids[(style, highlight)]
+
+    def to_xml(self):
+        fills = ''.join(f'<fill><patternFill patternType="solid"><fgColor rgb="{color}"/><bgColor indexed="64"/></patternFill></fill>'
+                        for color in FILLS.values()).encode()
+        styles_xml = re.sub(rb'<fills\b[^>]*>(.*?)</fills>',
+                            lambda match: f'<fills count="{self.fill_count + len(FILLS)}">'.encode() + match.group(1) + fills + b'</fills>',
+                            self.styles_xml, count=1, flags=re.S)
+        return re.sub(rb'<cellXfs\b[^>]*>(.*?)</cellXfs>',
+                      lambda match: f'<cellXfs count="{len(self.formats)}">'.encode() + b''.join(self.formats) + b'</cellXfs>',
+                      styles_xml, count=1, flags=re.S)
+
+def empty_cell(row, column, style):
+    return f'<c r="{get_column_letter(column + 1)}{row}" s="{style}"/>'.encode()
+
+def restyle(tag, style_id, extra=b''):
+    # The start tag of a row or cell with its s attribute set to style_id
+    end = len(tag) - (2 if tag.endswith(b'/>') else 1)
+    attributes = STYLE_ATTRIBUTE.sub(b'', tag[:end])
+    return attributes + f' s="{style_id}"'.encode() + extra + tag[end:]
+
+def rewrite_row(segment, row, row_annotations, styles):
+    # Puts the highlight formats on the annotated cells of one <row> element, adding empty cells for the
+    # annotated columns the row does not have. A whole-row highlight also goes on the row's own format,
+    # which Excel uses for the row's empty cells.
+    tag = ROW_START.match(segment)
+    open_tag = SPANS_ATTRIBUTE.sub(b'', tag.group(0))
+    row_highlight = row_annotations[None][0] if None in row_annotations else None
+    if row_highlight is not None:
+        style = STYLE_ATTRIBUTE.search(open_tag)
+        open_tag = restyle(CUSTOM_FORMAT_ATTRIBUTE.sub(b'', open_tag), styles.style_for(int(style.group(1)) if style else 0, row_highlight),
+                           b' customFormat="1"')
+    if tag.group(2):
+        open_tag, body = open_tag[:-2].rstrip() + b'>', b''
+    else:
+        body = segment[tag.end():-len(b'</row>')]
+    pending = sorted((column, annotation) for column, annotation in row_annotations.items() if column is not None)
+    pieces = [open_tag]
+    position, column = 0, -1
+    for cell in CELL_START.finditer(body):
+        reference = CELL_COLUMN.search(cell.group(1))
+        column = column_index_from_string(reference.group(1).decode()) - 1 if reference else column + 1
+        while pending and pending[0][0] < column:
+            missing_column, (highlight, _) = pending.pop(0)
+            pieces.append(body[position:cell.start()])
+            pieces.append(empty_cell(row, missing_column, styles.style_for(0, highlight)))
+            position = cell.start()
+        highlight = row_highlight
+        if pending and pending[0][0] == column:
+            cell_highlight = pending.pop(0)[1][0]
+            highlight = cell_highlight if highlight is None else min(highlight, cell_highlight, key=FILL_PRIORITY.index)
+        if highlight is not None:
+            style = STYLE_ATTRIBUTE.search(cell.group(1))
+            pieces.append(body[position:cell.start()])
+            pieces.append(restyle(cell.group(0), styles.style_for(int(style.group(1)) if style else 0, highlight)))
+            position = cell.end()
+    pieces.append(body[position:])
+    pieces.extend(empty_cell(row, missing_column, styles.style_for(0, highlight)) for missing_column, (highlight, _) in pending)
+    pieces.append(b'</row>')
+    return b''.join(pieces)
+
+def rewrite_rows(region, annotations, styles, rewritten):
+    pieces = []
+    position = 0
+    for match in ROW_START.finditer(region):
+        row = int(match.group(1))
+        if row not in annotations:
+            continue
+        rewritten.add(row)
+        end = match.end() if match.group(2) else region.index(b'</row>', match.end()) + len(b'</row>')
+        pieces.append(region[position:match.start()])
+        pieces.append(rewrite_row(region[match.start():end], row, annotations[row], styles))
+        position = end
+    pieces.append(region[position:])
+    return b''.join(pieces)
+
+def add_legacy_drawing(tail):
+    start = max(tail.find(b'</sheetData>'), 0)
+    position = min(index for index in (tail.find(marker, start) for marker in AFTER_LEGACY_DRAWING) if index >= 0)
+    element = f'<legacyDrawing xmlns:r="{OFFICE_RELATIONSHIPS}" r:id="{NOTES_RELATIONSHIP_ID}"/>'.encode()
+    return tail[:position] + element + tail[position:]
+
+def copy_sheet(source, target, annotations, styles, with_notes):
+    # The sheet XML is streamed a block at a time; only the rows holding annotations are parsed, the
+    # rest is copied byte for byte. Returns the annotated rows that were found and rewritten.
+    rewritten = set()
+    buffer = b''
+    while True:
+        data = source.read(STREAM_BYTES)
+        if not data:
+            break
+        buffer += data
+        end = buffer.rfind(b'</row>')
+        if end >= 0:
+            end += len(b'</row>')
+            target.write(rewrite_rows(buffer[:end], annotations, styles, rewritten))
+            buffer = buffer[end:]
+    tail = rewrite_rows(buffer, annotations, styles, rewritten)
+    target.write(add_legacy_drawing(tail) if with_notes else tail)
+    return rewritten
+
+def notes_parts(annotations):
+    records = []
+    for row, row_annotations in sorted(annotations.items()):
+        for column, (_, notes) in row_annotations.items():
+            if column is not None and notes:
+                record = CommentRecord(ref=f'{get_column_letter(column + 1)}{row}', author=COMMENT_AUTHOR)
+                record.text.t = '\n'.join(notes)
+                records.append(record)
+    if not records:
+        return None
+    comment_sheet = CommentSheet.from_comments(records)
+    return tostring(comment_sheet.to_tree()), comment_sheet.write_shapes()
+
+def add_relationships(relationships_xml, part):
+    relationships = ''.join([
+        f'<Relationship Id="{NOTES_RELATIONSHIP_ID}" Type="{OFFICE_RELATIONSHIPS}/vmlDrawing" '
+        f'Target="{posixpath.relpath(VML_PART, posixpath.dirname(part))}"/>',
+        f'<Relationship Id="{NOTES_RELATIONSHIP_ID}Comments" Type="{OFFICE_RELATIONSHIPS}/comments" '
+        f'Target="{posixpath.relpath(COMMENTS_PART, posixpath.dirname(part))}"/>',
+    ]).encode()
+    if relationships_xml is None:
+        relationships_xml = (b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                             b'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"></Relationships>')
+    return relationships_xml.replace(b'</Relationships>', relationships + b'</Relationships>')
+
+def add_content_types(content_types_xml):
+    entries = f'<Override PartName="/{COMMENTS_PART}" ContentType="{CommentSheet.mime_type}"/>'
+    if b'Extension="vml"' not in content_types_xml:
+        entries = '<Default Extension="vml" ContentType="application/vnd.openxmlformats-officedocument.vmlDrawing"/>' + entries
+    return content_types_xml.replace(b'</Types>', entries.encode() + b'</Types>')
+
+def write_annotated_workbook(workbook_file, sheet_name, columns, findings, output_file):
+    # columns are the sheet's columns as parsed, which is what the findings name
+    annotations = cell_annotations(findings, columns)
+    rewritten = rewrite_package(workbook_file, sheet_name, annotations, output_file)
+    missing = set(annotations) - rewritten
+    if missing:
+        # e.g. rows written without an r attribute or with a namespace prefix (<x:row>), which the byte-level
+        # rewrite does not recognise; openpyxl parses them properly at the cost of loading the whole sheet
+        logging.warning(f"{len(missing)} annotated rows of '{sheet_name}' were not found in its XML; "
+                        "annotating through openpyxl instead.")
+        for file in (workbook_file, output_file):
+            if hasattr(file, 'seek'):
+                file.seek(0)
+        if hasattr(output_file, 'truncate'):
+            output_file.truncate()
+        annotate_with_openpyxl(workbook_file, sheet_name, annotations, output_file)
+    logging.info(f"Annotated {len(annotations)} rows of '{sheet_name}'.")
+
+def rewrite_package(workbook_file, sheet_name, annotations, output_file):
+    # The upload is copied part by part with the reviewed sheet streamed through rewrite_rows, so formats,
+    # formulas and the other sheets survive and the cost is one pass over the sheet's XML
+    with zipfile.ZipFile(workbook_file) as archive, \
+            zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as output:
+        part = sheet_part(archive, sheet_name)
+        rels_part = relationships_part(part)
+        styles = StyleTable(archive.read('xl/styles.xml'))
+        notes = notes_parts(annotations)
+        if notes and has_notes(archive, part):
+            logging.warning(f"'{sheet_name}' already has notes; the export only highlights its cells.")
+            notes = None
+
+        with archive.open(part) as source, output.open(part, 'w', force_zip64=True) as target:
+            rewritten = copy_sheet(source, target, annotations, styles, notes is not None)
+        for info in archive.infolist():
+            if info.filename == part:
+                continue
+            data = archive.read(info.filename)
+            if info.filename == 'xl/styles.xml':
+                data = styles.to_xml()
+            elif notes and info.filename == '[Content_Types].xml':
+                data = add_content_types(data)
+            elif notes and info.filename == rels_part:
+                data = add_relationships(data, part)
+            output.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+        if notes:
+            if rels_part not in archive.namelist():
+                output.writestr(rels_part, add_relationships(None, part))
+            output.writestr(COMMENTS_PART, notes[0])
+            output.writestr(VML_PART, notes[1])
+    return rewritten
+
+def annotate_with_openpyxl(workbook_file, sheet_name, annotations, output_file):
+    workbook = load_workbook(workbook_file)
+    worksheet = workbook[sheet_name]
+    fills = {highlight: PatternFill(fill_type='solid', fgColor=color) for highlight, color in FILLS.items()}
+    for row, row_annotations in annotations.items():
+        row_highlight = row_annotations[None][0] if None in row_annotations else None
+        if row_highlight is not None:
+            for cell in worksheet[row]:
+                cell.fill = fills[row_highlight]
+        for column, (highlight, notes) in row_annotations.items():
+            if column is None:
+                continue
+            if row_highlight is not None:
+                highlight = min(highlight, row_highlight, key=FILL_PRIORITY.index)
+            cell = worksheet.cell(row=row, column=column + 1)
+            cell.fill = fills[highlight]
+            if notes:
+                cell.comment = Comment('\n'.join(notes), COMMENT_AUTHOR)
+    workbook.save(output_file)
@@ -0,0 +1,124 @@
+import argparse
+import json
+import logging
+import os
+import pandas as pd
+from main import BUSINESS_LOGIC_SHEETS, read_excel_file, load_sheet_data, process_data, filter_by_month
+from logic_runner import load_business_logic, run_business_logic
+from mis_generator import generate_frame, write_workbook
+from instrumentation import timed_function, stage_wrapper, timings_frame, start_memory_tracking, stop_memory_tracking
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+DATA_DIR = os.path.join('benchmarks', 'data')
+RESULTS_PATH = os.path.join('benchmarks', 'results.json')
+BASELINE_PATH = os.path.join('benchmarks', 'baseline.json')
+# A stage is a regression when it is this much slower than the baseline and the difference is not just noise
+REGRESSION_RATIO = 1.25
+NOISE_FLOOR_SECONDS = 0.05
+NOISE_FLOOR_BYTES = 2**20
+
+def registered_modules():
+    return [module_name for module_name, sheets in BUSINESS_LOGIC_SHEETS.items() if any(sheets)]
+
+def benchmark_workbook(module_name, rows):
+    # Workbooks are generated once per (module, scale) and reused, so runs stay comparable
+    path = os.path.join(DATA_DIR, f'{module_name}_{rows}.xlsx')
+    sheet_name = BUSINESS_LOGIC_SHEETS[module_name][0]
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        df, _ = generate_frame(module_name, rows, error_count=max(rows // 1000, 1))
+        write_workbook(df, path, sheet_name)
+    return path, sheet_name
+
+def benchmark_module(module_name, rows, track_memory=False):
+    path, sheet_name = benchmark_workbook(module_name, rows)
+    timings = []
+    if track_memory:
+        start_memory_tracking(timings)
+    try:
+        excel_file = timed_function(timings, 'read_excel_file', read_excel_file)(path)
+        df = timed_function(timings, 'load_sheet_data', load_sheet_data)(excel_file, sheet_name[:31])
+        df = timed_function(timings, 'process_data', process_data)(df)
+        month = df['month'].dropna().iloc[0]
+        df_filtered = timed_function(timings, 'filter_by_month', filter_by_month)(df, month)
+
+        module, extra_args = load_business_logic(module_name)
+        timed_function(timings, 'business_logic_total', run_business_logic)(module, df_filtered, extra_args, stage_wrapper(timings))
+    finally:
+        if track_memory:
+            stop_memory_tracking(timings)
+
+    # Stages a module calls more than once are summed; display_dataframes covers the st.table / st.dataframe rendering
+    stages_df = timings_frame(timings).drop(columns='calls')
+    stages_df['stage'] = stages_df['stage'].replace({'display_dataframes': 'render'})
+    return stages_df.to_dict('records')
+
+def run_benchmarks(module_names, scales, track_memory=False):
+    results = []
+    for rows in scales:
+        for module_name in module_names:
+            try:
+                stages = benchmark_module(module_name, rows, track_memory)
+            except Exception as e:
+                logging.error(f"Benchmark failed for '{module_name}' at {rows} rows: {e}")
+                continue
+            results.extend({'module': module_name, 'rows': rows, **stage} for stage in stages)
+            total = next(stage['seconds'] for stage in stages if stage['stage'] == 'business_logic_total')
+            logging.info(f"{module_name} @ {rows} rows: business logic {total:.3f}s")
+    return results
+
+def compare_with_baseline(results, baseline):
+    current_df = pd.DataFrame(results)
+    baseline_df = pd.DataFrame(baseline)
+    comparison = current_df.merge(baseline_df, on=['module', 'rows', 'stage'], how='left', suffixes=('', '_baseline'))
+    comparison['ratio'] = comparison['seconds'] / comparison['seconds_baseline']
+    comparison['regression'] = ((comparison['ratio'] > REGRESSION_RATIO)
+                                & (comparison['seconds'] - comparison['seconds_baseline'] > NOISE_FLOOR_SECONDS))
+    if 'peak_bytes' in comparison.columns and 'peak_bytes_baseline' in comparison.columns:
+        comparison['peak_ratio'] = comparison['peak_bytes'] / comparison['peak_bytes_baseline']
+        comparison['regression'] |= ((comparison['peak_ratio'] > REGRESSION_RATIO)
+                                     & (comparison['peak_bytes'] - comparison['peak_bytes_baseline'] > NOISE_FLOOR_BYTES))
+    return comparison
+
+def write_results(results, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every pipeline stage of the business logic modules.")
+    parser.add_argument('--modules', nargs='*', help="modules to run (default: every registered module)")
+    parser.add_argument('--scales', nargs='*', type=int, default=DEFAULT_SCALES, help="row counts to run at")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument('--memory', action='store_true',
+                        help="record allocated and peak bytes per stage with tracemalloc (slows every stage; compare against a baseline also recorded with --memory)")
+    parser.add_argument('--save-baseline', action='store_true', help="record this run as the new baseline")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.modules or registered_modules(), args.scales, args.memory)
+    write_results(results, RESULTS_PATH)
+
+    if args.save_baseline:
+        write_results(results, args.baseline)
+        logging.info(f"Baseline saved to {args.baseline}.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logging.warning(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        comparison = compare_with_baseline(results, json.load(baseline_file))
+    regressions = comparison[comparison['regression']]
+    if regressions.empty:
+        logging.info("No regressions against the baseline.")
+        return 0
+    columns = ['module', 'rows', 'stage', 'seconds_baseline', 'seconds', 'ratio', 'peak_bytes_baseline', 'peak_bytes', 'peak_ratio']
+    print(regressions[[column for column in columns if column in regressions.columns]].to_string(index=False))
+    return 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,8 @@
 import pandas as pd
 import streamlit as st
 import logging
+from rule_compiler import find_rule_mismatches
+from validation_engine import findings_frame, karbon_expense_ledger, expense_totals, pivot_with_averages, total, distinct_count
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -8,97 +10,35 @@ logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 def safe_get_value(row, col):
     return row[col] if col in row and pd.notna(row[col]) else 0
 
-def check_mismatch(row, index, column_name, expected_value, mismatched_data):
-    actual_value = safe_get_value(row, column_name)
-    if actual_value != expected_value:
-        mismatched_data.append({
-            'Row': index + 3,
-            'Date': row['date'],
-            'Column': column_name,
-            'Expected': expected_value,
-            'Actual': actual_value
-        })
-
 def pivot_and_average_prices(df):
-    pivot_df = df.pivot_table(index=['site name', 'vendor', 'session', 'meal type', 'order type'], aggfunc='size').reset_index(name='days')
-    avg_prices = df.groupby(['site name', 'vendor', 'session', 'meal type', 'order type']).agg(
-        average_buying_price_ai=('buying price ai', 'mean'),
-        average_selling_price=('selling price', 'mean')
-    ).reset_index()
-    combined_df = pivot_df.merge(avg_prices, on=['site name', 'vendor', 'session', 'meal type', 'order type'])
-    return combined_df
+    return pivot_with_averages(df, ['site name', 'vendor', 'session', 'meal type', 'order type'], {'average_buying_price_ai': 'buying price ai', 'average_selling_price': 'selling price'})
 
 def find_mismatches(df):
-    mismatched_data = []
-    for index, row in df.iterrows():
-        try:
-            calculated_buying_price = safe_get_value(row, 'buying price ai') / safe_get_value(row, 'gst')
-            check_mismatch(row, index, 'buying price', calculated_buying_price, mismatched_data)
-
-            calculated_buying_amt = (safe_get_value(row, 'buying price ai') * safe_get_value(row, 'buying pax') 
-                                     + safe_get_value(row, 'buying transportation'))
-            check_mismatch(row, index, 'buying amt ai', calculated_buying_amt, mismatched_data)
-
-            calculated_buying_pax = safe_get_value(row, 'ordered pax/vendor mg')
-            check_mismatch(row, index, 'buying pax', calculated_buying_pax, mismatched_data)
-
-            calculated_selling_pax = max(safe_get_value(row, 'client mg/pre order'), safe_get_value(row, 'ordered pax/vendor mg'))
-            check_mismatch(row, index, 'selling pax', calculated_selling_pax, mismatched_data)
-            
-            calculated_selling_amount = safe_get_value(row, 'selling pax') * safe_get_value(row, 'selling price') + safe_get_value(row, 'selling transportation')
-            check_mismatch(row, index, 'selling amount', calculated_selling_amount, mismatched_data)
-            
-            calculated_commission = (safe_get_value(row, 'selling amount') - safe_get_value(row, 'buying amt ai') 
-                                     + safe_get_value(row, 'penalty on vendor') - safe_get_value(row, 'penalty on smartq'))
-            check_mismatch(row, index, 'commission', calculated_commission, mismatched_data)
-        except Exception as e:
-            logging.error(f"Error processing row {index + 3}: {e}")
-
-    return mismatched_data
+    return find_rule_mismatches(df, 'business_logic_13')
 
 def find_karbon_expenses(df):
-    karbon_expenses_data = []
-    columns_to_check = ['date(karbon)','expense item', 'reason for expense', 'expense type', 'price', 'pax', 'amount', 'mode of payment','bill to','requested by','approved by']
-    for index, row in df.iterrows():
-        if any(pd.notna(row[col]) and row[col] != 0 for col in columns_to_check):
-            karbon_expenses_data.append({
-                'Row': index + 3,
-                'Buying Amount': row['buying amt ai'],
-                'Date': row['date(karbon)'],
-                'Expense Item': row['expense item'],
-                'Reason for Expense': row['reason for expense'],
-                'Expense Type': row['expense type'],
-                'Price': row['price'],
-                'Pax': row['pax'],
-                'Amount': row['amount'],
-                'Mode Of Payment': row['mode of payment'],
-                'Bill to': row['bill to'],
-                'Requested By': row['requested by'],
-                'Approved By': row['approved by']
-            })
-
-    return karbon_expenses_data
+    return karbon_expense_ledger(df)
 
 def calculate_aggregated_values(df):
     regular_orders = df[df['order type'] .isin(['regular','regular-pop-up', 'food trial'])]
-    sum_buying_pax_regular = regular_orders['buying pax'].sum()
-    sum_selling_pax_regular = regular_orders['selling pax'].sum()
+    sum_buying_pax_regular = total(regular_orders['buying pax'])
+    sum_selling_pax_regular = total(regular_orders['selling pax'])
 
     regular_and_adhoc_orders = df[df['order type'].isin(['regular', 'smartq-pop-up', 'food trial', 'regular-pop-up'])]
-    sum_buying_amt_ai_regular= regular_and_adhoc_orders['buying amt ai'].sum()
-    sum_selling_amt_regular = regular_and_adhoc_orders['selling amount'].sum()
+    sum_buying_amt_ai_regular= total(regular_and_adhoc_orders['buying amt ai'])
+    sum_selling_amt_regular = total(regular_and_adhoc_orders['selling amount'])
 
     event_and_popup_orders = df[df['order type'].isin(['event', 'event pop-up', 'adhoc'])]
-    sum_buying_amt_ai_event= event_and_popup_orders['buying amt ai'].sum()
-    sum_selling_amt_event = event_and_popup_orders['selling amount'].sum()
+    sum_buying_amt_ai_event= total(event_and_popup_orders['buying amt ai'])
+    sum_selling_amt_event = total(event_and_popup_orders['selling amount'])
 
-    sum_penalty_on_vendor = df['penalty on vendor'].sum()
-    sum_penalty_on_smartq = df['penalty on smartq'].sum()
-    sum_commission = df['commission'].sum()
-    sum_amount = df['amount'].sum()
+    sum_penalty_on_vendor = total(df['penalty on vendor'])
+    sum_penalty_on_smartq = total(df['penalty on smartq'])
+    sum_commission = total(df['commission'])
+    sum_amount = total(df['amount'])
 
     valid_dates_df = df[(df['buying pax'] > 0) | (df['selling pax'] > 0)]
-    number_of_days = valid_dates_df['date'].nunique()
+    number_of_days = distinct_count(valid_dates_df['date'])
 
     aggregated_data = {
         'Number of Days': number_of_days,
@@ -176,7 +116,7 @@ def display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggre
     st.markdown("---")
 
     if mismatched_data:
-        mismatched_df = pd.DataFrame(mismatched_data)
+        mismatched_df = findings_frame(mismatched_data)
         st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
         st.table(format_dataframe(mismatched_df))
         st.markdown("---")
@@ -211,10 +151,11 @@ def display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggre
         st.write("<span style='color:green'>No selling price found in Pop-up.</span> :white_check_mark:", unsafe_allow_html=True)
         st.markdown("---")
 
-    if karbon_expenses_data:
-        karbon_expenses_df = pd.DataFrame(karbon_expenses_data)
+    if not karbon_expenses_data.empty:
         st.subheader("Karbon Expenses")
-        st.table(format_dataframe(karbon_expenses_df))
+        st.table(format_dataframe(karbon_expenses_data.copy()))
+        for group_column in ['Expense Type', 'Bill to']:
+            st.table(format_dataframe(expense_totals(karbon_expenses_data, group_column)))
         st.markdown("---")
     else:
         st.write("No Karbon expenses found.")
@@ -1,128 +1,89 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import logging
+from validation_engine import to_pandas, column_values, safe_divide, check_mismatch_columns, evaluate_conditional, collect_issue_rows, MismatchStore, findings_frame, karbon_expense_ledger, expense_totals, pivot_with_averages, total, distinct_count
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-# Define lists to store Pax in breakfast and snacks and Missing Pax in lunch
-pax_in_bf_snacks = []
-missing_pax_in_lunch = []
-
 def safe_get_value(row, col):
     return row[col] if col in row and pd.notna(row[col]) else 0
 
-def check_mismatch(row, index, column_name, expected_value, mismatched_data):
-    actual_value = safe_get_value(row, column_name)
-    if actual_value != expected_value:
-        mismatched_data.append({
-            'Row': index + 3,
-            'Date': row['date'],
-            'Column': column_name,
-            'Expected': expected_value,
-            'Actual': actual_value
-        })
-
 def pivot_and_average_prices(df):
-    pivot_df = df.pivot_table(index=['site name', 'vendor', 'session', 'meal type', 'order type'], aggfunc='size').reset_index(name='days')
-    avg_prices = df.groupby(['site name', 'vendor', 'session', 'meal type', 'order type']).agg(
-        average_buying_price_ai=('buying price ai', 'mean'),
-        average_selling_price=('selling price', 'mean')
-    ).reset_index()
-    combined_df = pivot_df.merge(avg_prices, on=['site name', 'vendor', 'session', 'meal type', 'order type'])
-    return combined_df
+    return pivot_with_averages(df, ['site name', 'vendor', 'session', 'meal type', 'order type'], {'average_buying_price_ai': 'buying price ai', 'average_selling_price': 'selling price'})
 
-def find_mismatches(df):
-    mismatched_data = []
-    for index, row in df.iterrows():
-        try:
-            calculated_buying_price = safe_get_value(row, 'buying price ai') / safe_get_value(row, 'gst')
-            check_mismatch(row, index, 'buying price', calculated_buying_price, mismatched_data)
-
-            calculated_buying_amt = (safe_get_value(row, 'buying price ai') * safe_get_value(row, 'buying pax') 
-                                     + safe_get_value(row, 'buying transportation'))
-            check_mismatch(row, index, 'buying amt ai', calculated_buying_amt, mismatched_data)
-
-            calculated_commission = (safe_get_value(row, 'selling amount') - safe_get_value(row, 'buying amt ai') 
-                                     + safe_get_value(row, 'penalty on vendor') - safe_get_value(row, 'penalty on smartq'))
-            check_mismatch(row, index, 'commission', calculated_commission, mismatched_data)
-
-            # Calculate selling pax and amount only for lunch sessions
-            if row['session'] in ['lunch-non veg', 'lunch-veg']:
-                calculated_selling_pax = max(safe_get_value(row, 'client mg/pre order'), safe_get_value(row, 'ordered pax/vendor mg'), safe_get_value(row, 'actual consumption'))
-                calculated_selling_amount = calculated_selling_pax * safe_get_value(row, 'selling price')
-                check_mismatch(row, index, 'selling pax', calculated_selling_pax, mismatched_data)
-                check_mismatch(row, index, 'selling amount', calculated_selling_amount, mismatched_data)
-            
-            # Check for filled selling pax and amount in breakfast and snacks
-            if row['session'] in ['breakfast', 'snacks']:
-                if (pd.notna(row['selling pax']) and row['selling pax'] != 0) or (pd.notna(row['selling amount']) and row['selling amount'] != 0):
-                    pax_in_bf_snacks.append({
-                        'Row': index + 3,
-                        'Date': row['date'],
-                        'Session': row['session'],
-                        'Selling Pax': row['selling pax'],
-                        'Selling Amount': row['selling amount']
-                    })
-
-            # Check for missing selling pax and amount in veg lunch and non-veg lunch
-            if row['session'] in ['lunch-non veg', 'lunch-veg']:
-                if pd.isna(row['selling pax']) or pd.isna(row['selling amount']):
-                    missing_pax_in_lunch.append({
-                        'Row': index + 3,
-                        'Date': row['date'],
-                        'Session': row['session'],
-                        'Selling Pax': row['selling pax'],
-                        'Selling Amount': row['selling amount']
-                    })
-        except Exception as e:
-            logging.error(f"Error processing row {index + 3}: {e}")
+LUNCH_SESSIONS = ['lunch-non veg', 'lunch-veg']
+BREAKFAST_SNACK_SESSIONS = ['breakfast', 'snacks']
 
+def lunch_selling_pax(df):
+    return np.maximum.reduce([column_values(df, 'client mg/pre order'), column_values(df, 'ordered pax/vendor mg'), column_values(df, 'actual consumption')])
+
+def lunch_selling_amount(df):
+    return lunch_selling_pax(df) * column_values(df, 'selling price')
+
+def find_mismatches(df):
+    df = to_pandas(df)
+    mismatched_data = MismatchStore()
+    try:
+        buying_price_ai = column_values(df, 'buying price ai')
+        check_mismatch_columns(df, 'buying price', safe_divide(buying_price_ai, column_values(df, 'gst')), mismatched_data)
+
+        calculated_buying_amt = buying_price_ai * column_values(df, 'buying pax') + column_values(df, 'buying transportation')
+        check_mismatch_columns(df, 'buying amt ai', calculated_buying_amt, mismatched_data)
+
+        calculated_commission = (column_values(df, 'selling amount') - column_values(df, 'buying amt ai')
+                                 + column_values(df, 'penalty on vendor') - column_values(df, 'penalty on smartq'))
+        check_mismatch_columns(df, 'commission', calculated_commission, mismatched_data)
+
+        # Calculate selling pax and amount only for lunch sessions
+        check_mismatch_columns(df, 'selling pax', evaluate_conditional(df, 'session', [(LUNCH_SESSIONS, lunch_selling_pax)]), mismatched_data)
+        check_mismatch_columns(df, 'selling amount', evaluate_conditional(df, 'session', [(LUNCH_SESSIONS, lunch_selling_amount)]), mismatched_data)
+    except Exception as e:
+        logging.error(f"Error validating H&M sheet: {e}")
+
+    mismatched_data.sort_by_row()
     return mismatched_data
 
-def find_karbon_expenses(df):
-    karbon_expenses_data = []
-    columns_to_check = ['date(karbon)','expense item', 'reason for expense', 'expense type', 'price', 'pax', 'amount', 'mode of payment','bill to','requested by','approved by']
-    for index, row in df.iterrows():
-        if any(pd.notna(row[col]) and row[col] != 0 for col in columns_to_check):
-            karbon_expenses_data.append({
-                'Row': index + 3,
-                'Buying Amount': row['buying amt ai'],
-                'Date': row['date(karbon)'],
-                'Expense Item': row['expense item'],
-                'Reason for Expense': row['reason for expense'],
-                'Expense Type': row['expense type'],
-                'Price': row['price'],
-                'Pax': row['pax'],
-                'Amount': row['amount'],
-                'Mode Of Payment': row['mode of payment'],
-                'Bill to': row['bill to'],
-                'Requested By': row['requested by'],
-                'Approved By': row['approved by']
-            })
+ISSUE_COLUMNS = {'Date': 'date', 'Session': 'session', 'Selling Pax': 'selling pax', 'Selling Amount': 'selling amount'}
 
-    return karbon_expenses_data
+def find_pax_in_bf_snacks(df):
+    # Selling pax or amount filled in breakfast and snacks
+    df = to_pandas(df)
+    selling_pax_filled = df['selling pax'].notna() & (df['selling pax'] != 0)
+    selling_amount_filled = df['selling amount'].notna() & (df['selling amount'] != 0)
+    bf_snacks_mask = df['session'].isin(BREAKFAST_SNACK_SESSIONS) & (selling_pax_filled | selling_amount_filled)
+    return collect_issue_rows(df, bf_snacks_mask, ISSUE_COLUMNS)
+
+def find_missing_pax_in_lunch(df):
+    # Selling pax or amount missing in veg lunch and non-veg lunch
+    df = to_pandas(df)
+    missing_lunch_mask = df['session'].isin(LUNCH_SESSIONS) & (df['selling pax'].isna() | df['selling amount'].isna())
+    return collect_issue_rows(df, missing_lunch_mask, ISSUE_COLUMNS)
+
+def find_karbon_expenses(df):
+    return karbon_expense_ledger(df)
 
 def calculate_aggregated_values(df):
     regular_orders = df[df['order type'] .isin(['regular','regular-pop-up', 'food trial'])]
-    sum_buying_pax_regular = regular_orders['buying pax'].sum()
-    sum_selling_pax_regular = regular_orders['selling pax'].sum()
+    sum_buying_pax_regular = total(regular_orders['buying pax'])
+    sum_selling_pax_regular = total(regular_orders['selling pax'])
 
     regular_and_adhoc_orders = df[df['order type'].isin(['regular', 'smartq-pop-up', 'food trial', 'regular-pop-up'])]
-    sum_buying_amt_ai_regular= regular_and_adhoc_orders['buying amt ai'].sum()
-    sum_selling_amt_regular = regular_and_adhoc_orders['selling amount'].sum()
+    sum_buying_amt_ai_regular= total(regular_and_adhoc_orders['buying amt ai'])
+    sum_selling_amt_regular = total(regular_and_adhoc_orders['selling amount'])
 
     event_and_popup_orders = df[df['order type'].isin(['event', 'event pop-up', 'adhoc'])]
-    sum_buying_amt_ai_event= event_and_popup_orders['buying amt ai'].sum()
-    sum_selling_amt_event = event_and_popup_orders['selling amount'].sum()
+    sum_buying_amt_ai_event= total(event_and_popup_orders['buying amt ai'])
+    sum_selling_amt_event = total(event_and_popup_orders['selling amount'])
 
-    sum_penalty_on_vendor = df['penalty on vendor'].sum()
-    sum_penalty_on_smartq = df['penalty on smartq'].sum()
-    sum_commission = df['commission'].sum()
-    sum_amount = df['amount'].sum()
+    sum_penalty_on_vendor = total(df['penalty on vendor'])
+    sum_penalty_on_smartq = total(df['penalty on smartq'])
+    sum_commission = total(df['commission'])
+    sum_amount = total(df['amount'])
 
     valid_dates_df = df[(df['buying pax'] > 0) | (df['selling pax'] > 0)]
-    number_of_days = valid_dates_df['date'].nunique()
+    number_of_days = distinct_count(valid_dates_df['date'])
 
     aggregated_data = {
         'Number of Days': number_of_days,
@@ -193,14 +154,14 @@ def format_dataframe(df):
         df[column] = df[column].map(lambda x: f"{x:.1f}")
     return df
 
-def display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggregated_data, buying_value_issues, selling_value_issues, popup_selling_issues):
+def display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggregated_data, buying_value_issues, selling_value_issues, popup_selling_issues, pax_in_bf_snacks, missing_pax_in_lunch):
     st.subheader("")
     st.subheader("Average Buying Price and Selling Price")
     st.table(format_dataframe(combined_df))
     st.markdown("---")
 
     if mismatched_data:
-        mismatched_df = pd.DataFrame(mismatched_data)
+        mismatched_df = findings_frame(mismatched_data)
         st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
         st.table(format_dataframe(mismatched_df))
         st.markdown("---")
@@ -255,10 +216,11 @@ def display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggre
         st.write("<span style='color:green'>No selling price found in Pop-up.</span> :white_check_mark:", unsafe_allow_html=True)
         st.markdown("---")
 
-    if karbon_expenses_data:
-        karbon_expenses_df = pd.DataFrame(karbon_expenses_data)
+    if not karbon_expenses_data.empty:
         st.subheader("Karbon Expenses")
-        st.table(format_dataframe(karbon_expenses_df))
+        st.table(format_dataframe(karbon_expenses_data.copy()))
+        for group_column in ['Expense Type', 'Bill to']:
+            st.table(format_dataframe(expense_totals(karbon_expenses_data, group_column)))
         st.markdown("---")
     else:
         st.write("No Karbon expenses found.")
@@ -277,4 +239,6 @@ def business_logic_18(df):
     selling_value_issues = find_selling_value_issues(df)
     popup_selling_issues = find_popup_selling_issues(df)
     karbon_expenses_data = find_karbon_expenses(df)
-    display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggregated_data, buying_value_issues, selling_value_issues, popup_selling_issues)
+    pax_in_bf_snacks = find_pax_in_bf_snacks(df)
+    missing_pax_in_lunch = find_missing_pax_in_lunch(df)
+    display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggregated_data, buying_value_issues, selling_value_issues, popup_selling_issues, pax_in_bf_snacks, missing_pax_in_lunch)
@@ -1,70 +1,56 @@
 import pandas as pd
 import streamlit as st
 import logging
+from validation_engine import to_pandas, column_values, check_mismatch_columns, MismatchStore, findings_frame, total, distinct_count
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-def safe_get_value(row, col):
-    return row[col] if col in row and pd.notna(row[col]) else 0
-
-def check_mismatch(row, index, column_name, expected_value, mismatched_data):
-    actual_value = safe_get_value(row, column_name)
-    if actual_value != expected_value:
-        mismatched_data.append({
-            'Row': index + 3,
-            'Date': row['date'],
-            'Column': column_name,
-            'Expected': expected_value,
-            'Actual': actual_value
-        })
+SELLING_MANAGEMENT_FEE_RATE = 0.1
 
 def find_mismatches(df):
-    mismatched_data = []
-    for index, row in df.iterrows():
-        try:
-            calculated_selling_management = safe_get_value(row, 'total sales') * 0.1
-            check_mismatch(row, index, 'selling management fee', calculated_selling_management, mismatched_data)
-
-            calculated_buying_amt = (safe_get_value(row, 'total sales') - (safe_get_value(row, 'discount%') 
-                                     * safe_get_value(row, 'total sales')))
-            check_mismatch(row, index, 'buying amt ai', calculated_buying_amt, mismatched_data)
+    df = to_pandas(df)
+    mismatched_data = MismatchStore()
+    try:
+        total_sales = column_values(df, 'total sales')
+        check_mismatch_columns(df, 'selling management fee', total_sales * SELLING_MANAGEMENT_FEE_RATE, mismatched_data)
 
+        calculated_buying_amt = total_sales - column_values(df, 'discount%') * total_sales
+        check_mismatch_columns(df, 'buying amt ai', calculated_buying_amt, mismatched_data)
 
-            calculated_selling_amount = (safe_get_value(row, 'total sales') + safe_get_value(row, 'selling management fee') 
-                                     - safe_get_value(row, 'direct payment from employee'))  
-            check_mismatch(row, index, 'selling amount', calculated_selling_amount, mismatched_data)
+        direct_payment = column_values(df, 'direct payment from employee')
+        calculated_selling_amount = total_sales + column_values(df, 'selling management fee') - direct_payment
+        check_mismatch_columns(df, 'selling amount', calculated_selling_amount, mismatched_data)
 
-            
-            calculated_commission = (safe_get_value(row, 'selling amount') - safe_get_value(row, 'buying amt ai') 
-                                     + safe_get_value(row, 'direct payment from employee'))
-            check_mismatch(row, index, 'commission', calculated_commission, mismatched_data)
-        except Exception as e:
-            logging.error(f"Error processing row {index + 3}: {e}")
+        calculated_commission = column_values(df, 'selling amount') - column_values(df, 'buying amt ai') + direct_payment
+        check_mismatch_columns(df, 'commission', calculated_commission, mismatched_data)
+    except Exception as e:
+        logging.error(f"Error reconciling wallet ledger: {e}")
 
+    mismatched_data.sort_by_row()
     return mismatched_data
 
 
 def calculate_aggregated_values(df):
     regular_orders = df[df['order type'] .isin(['regular','regular-pop-up', 'food trial'])]
-    sum_buying_pax_regular = regular_orders['quantity'].sum()
-    sum_selling_pax_regular = regular_orders['quantity'].sum()
+    sum_buying_pax_regular = total(regular_orders['quantity'])
+    sum_selling_pax_regular = total(regular_orders['quantity'])
 
     
     regular_and_adhoc_orders = df[df['order type'].isin(['regular', 'smartq-pop-up', 'food trial', 'regular-pop-up','tuckshop','live'])]
-    sum_buying_amt_ai_regular= regular_and_adhoc_orders['buying amt ai'].sum()
-    sum_selling_amt_regular = regular_and_adhoc_orders['selling amount'].sum()
+    sum_buying_amt_ai_regular= total(regular_and_adhoc_orders['buying amt ai'])
+    sum_selling_amt_regular = total(regular_and_adhoc_orders['selling amount'])
 
     event_and_popup_orders = df[df['order type'].isin(['event', 'event pop-up', 'adhoc'])]
-    sum_buying_amt_ai_event= event_and_popup_orders['buying amt ai'].sum()
-    sum_selling_amt_event = event_and_popup_orders['selling amount'].sum()
+    sum_buying_amt_ai_event= total(event_and_popup_orders['buying amt ai'])
+    sum_selling_amt_event = total(event_and_popup_orders['selling amount'])
 
-    sum_direct_cash = df['direct payment from employee'].sum()
-    sum_commission = df['commission'].sum()
+    sum_direct_cash = total(df['direct payment from employee'])
+    sum_commission = total(df['commission'])
     
 
     valid_dates_df = df[(df['quantity'] > 0)]
-    number_of_days = valid_dates_df['date'].nunique()
+    number_of_days = distinct_count(valid_dates_df['date'])
 
     aggregated_data = {
         'Number of Days': number_of_days,
@@ -91,7 +77,7 @@ def display_dataframes( mismatched_data, aggregated_data):
     st.subheader("")
     
     if mismatched_data:
-        mismatched_df = pd.DataFrame(mismatched_data)
+        mismatched_df = findings_frame(mismatched_data)
         st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
         st.table(format_dataframe(mismatched_df))
         st.markdown("---")
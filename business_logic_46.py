@@ -1,199 +1,105 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import logging
+from validation_engine import find_derived_mismatches, tiered_values, findings_frame, total, distinct_count
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-def safe_get_value(row, col):
-    return row[col] if col in row and pd.notna(row[col]) else 0
-
-def check_mismatch(row, index, column_name, expected_value, mismatched_data):
-    actual_value = safe_get_value(row, column_name)
-    if actual_value != expected_value:
-        mismatched_data.append({
-            'Row': index + 3,
-            'Date': row['date'],
-            'Column': column_name,
-            'Expected': expected_value,
-            'Actual': actual_value
-        })
 
+MEAL_TYPE = 'meal type (only lunch)'
+
+BUYING_PRICE_TIERS = {
+    'veg': [(500, 42.5), (900, 42.5), (np.inf, 42.5)],
+    'non-veg': [(500, 52.5), (900, 52.5), (np.inf, 52.5)],
+}
+
+SELLING_PRICE_TIERS = {
+    'Veg': [(500, 55), (900, 55), (np.inf, 55)],
+    'Non-veg': [(500, 60), (900, 60), (np.inf, 60)],
+}
+
+DERIVED_COLUMNS = {
+    'expected buying price ai': (
+        [MEAL_TYPE, 'buying mg/pax'],
+        lambda meal_type, buying_mg_pax: tiered_values(meal_type, buying_mg_pax, BUYING_PRICE_TIERS)),
+    'buying consumption': (
+        ['actual consumption/employee', 'partners(direct cash sales)', 'manual entry', 'training new joining staff'],
+        lambda actual, partners, manual, training: actual + partners + manual + training),
+    'expected delta pax': (
+        ['buying mg/pax', 'buying consumption', 'training new joining staff'],
+        lambda buying_mg_pax, consumption, training: np.maximum.reduce([buying_mg_pax - consumption, training, np.zeros_like(training)])),
+    'expected total pax buying': (
+        ['actual consumption/employee', 'partners(direct cash sales)', 'manual entry', 'delta pax(gap between mg and consumption)'],
+        lambda actual, partners, manual, delta_pax: actual + partners + manual + delta_pax),
+    'expected buying amount': (
+        ['total pax buying', 'buying price ai'],
+        lambda total_pax_buying, buying_price_ai: total_pax_buying * buying_price_ai * 2),
+    'expected selling price': (
+        [MEAL_TYPE, 'selling mg/pax'],
+        lambda meal_type, selling_mg_pax: tiered_values(meal_type, selling_mg_pax, SELLING_PRICE_TIERS)),
+    'employee consumption': (
+        ['actual consumption/employee', 'manual entry'],
+        lambda actual, manual: actual + manual),
+    'expected delta pax btc': (
+        ['selling mg/pax', 'employee consumption', 'food coupon btc'],
+        lambda selling_mg_pax, consumption, food_coupon_btc: np.maximum.reduce([selling_mg_pax - consumption, food_coupon_btc, np.zeros_like(food_coupon_btc)])),
+    'selling consumption': (
+        ['actual consumption/employee', 'partners(direct cash sales)', 'manual entry', 'food coupon btc'],
+        lambda actual, partners, manual, food_coupon_btc: actual + partners + manual + food_coupon_btc),
+    'expected total pax selling': (
+        ['selling consumption', 'selling mg/pax'],
+        lambda consumption, selling_mg_pax: np.where(consumption < selling_mg_pax, selling_mg_pax, consumption)),
+    'employee sales': (
+        ['employee consumption', 'selling price'],
+        lambda consumption, selling_price: consumption * selling_price),
+    'expected partners employee 50%': (
+        ['partners(direct cash sales)', 'selling price', 'employee sales'],
+        lambda partners, selling_price, employee_sales: (partners * selling_price * 2) + employee_sales),
+    'expected total sales': (
+        ['employee sales', 'total pax selling', 'selling price', 'partners(direct cash sales) +employee 50%'],
+        lambda employee_sales, total_pax_selling, selling_price, partners_employee: employee_sales + (total_pax_selling * selling_price * 2) + partners_employee),
+    'expected btc': (
+        ['total sales', 'partners(direct cash sales) +employee 50%'],
+        lambda total_sales, partners_employee: total_sales - partners_employee),
+    'expected comission': (
+        ['total sales', 'buying amount'],
+        lambda total_sales, buying_amount: total_sales - buying_amount),
+}
+
+MISMATCH_CHECKS = [
+    ('buying price ai', 'expected buying price ai'),
+    ('delta pax(gap between mg and consumption)', 'expected delta pax'),
+    ('total pax buying', 'expected total pax buying'),
+    ('buying amount', 'expected buying amount'),
+    ('selling price', 'expected selling price'),
+    ('delta pax(gap between mg and consumption) btc', 'expected delta pax btc'),
+    ('total pax selling', 'expected total pax selling'),
+    ('partners(direct cash sales) +employee 50%', 'expected partners employee 50%'),
+    ('total sales', 'expected total sales'),
+    ('btc', 'expected btc'),
+    ('comission', 'expected comission'),
+]
 
 def find_mismatches(df):
-    mismatched_data = []
-    for index, row in df.iterrows():
-        try:
-            # Calculate Buying Price AI
-            meal_type = safe_get_value(row, 'meal type (only lunch)')
-            buying_mg_pax = safe_get_value(row, 'buying mg/pax')
-
-            if meal_type == "veg":
-                if buying_mg_pax <= 500:
-                    buying_price_ai = 42.5
-                elif buying_mg_pax <= 900:
-                    buying_price_ai = 42.5
-                else:
-                    buying_price_ai = 42.5
-            elif meal_type == "non-veg":
-                if buying_mg_pax <= 500:
-                    buying_price_ai = 52.5
-                elif buying_mg_pax <= 900:
-                    buying_price_ai = 52.5
-                else:
-                    buying_price_ai = 52.5
-            else:
-                buying_price_ai = ""
-
-            check_mismatch(row, index, 'buying price ai', buying_price_ai, mismatched_data)
-
-            # for delta pax
-            calculated_delta_pax = max(
-                safe_get_value(row, 'buying mg/pax') - (
-                    safe_get_value(row, 'actual consumption/employee') +
-                    safe_get_value(row, 'partners(direct cash sales)') +
-                    safe_get_value(row, 'manual entry') +
-                    safe_get_value(row, 'training new joining staff')), 
-                safe_get_value(row, 'training new joining staff'), 
-                0
-            )
-            check_mismatch(row, index, 'delta pax(gap between mg and consumption)', calculated_delta_pax, mismatched_data)
-
-            # for total pax buying
-            total_pax_buying = (
-                safe_get_value(row, 'actual consumption/employee') +
-                safe_get_value(row, 'partners(direct cash sales)') +
-                safe_get_value(row, 'manual entry') +
-                safe_get_value(row, 'delta pax(gap between mg and consumption)')
-            )
-            check_mismatch(row, index, 'total pax buying', total_pax_buying, mismatched_data)
-
-            # for buying amount
-            buying_amount = safe_get_value(row, 'total pax buying') * safe_get_value(row, 'buying price ai') * 2
-            check_mismatch(row, index, 'buying amount', buying_amount, mismatched_data)
-
-            # for selling price
-            meal_type = safe_get_value(row, 'meal type (only lunch)')
-            selling_mg_pax = safe_get_value(row, 'selling mg/pax')
-
-            if meal_type == "Veg":
-                if selling_mg_pax <= 500:
-                    selling_price = 55
-                elif selling_mg_pax <= 900:
-                    selling_price = 55
-                else:
-                    selling_price = 55
-            elif meal_type == "Non-veg":
-                if selling_mg_pax <= 500:
-                    selling_price = 60
-                elif selling_mg_pax <= 900:
-                    selling_price = 60
-                else:
-                    selling_price = 60
-            else:
-                selling_price = ""
-
-            check_mismatch(row, index, 'selling price', selling_price, mismatched_data)
-
-            # for delta pax(gap between mg and consumption) BTC
-            delta_pax_gap_btc = max(
-                safe_get_value(row, 'selling mg/pax') - (
-                    safe_get_value(row, 'actual consumption/employee') +
-                    safe_get_value(row, 'manual entry')
-                ),
-                safe_get_value(row, 'food coupon btc'),
-                0
-            )
-
-            check_mismatch(row, index, 'delta pax(gap between mg and consumption) btc', delta_pax_gap_btc, mismatched_data)
-
-            # for total pax selling
-            actual_consumption_employee = safe_get_value(row, 'actual consumption/employee')
-            partners_direct_cash_sales = safe_get_value(row, 'partners(direct cash sales)')
-            manual_entry = safe_get_value(row, 'manual entry')
-            food_coupon_btc = safe_get_value(row, 'food coupon btc')
-            selling_mg_pax = safe_get_value(row, 'selling mg/pax')
-
-            if (actual_consumption_employee + partners_direct_cash_sales + manual_entry + food_coupon_btc) < selling_mg_pax:
-                total_pax_selling = selling_mg_pax
-            else:
-                total_pax_selling = (actual_consumption_employee + partners_direct_cash_sales + manual_entry + food_coupon_btc)
-
-            check_mismatch(row, index, 'total pax selling', total_pax_selling, mismatched_data)
-
-            # for partners(direct cash sales) + employee 50%
-            partners_direct_cash_sales = safe_get_value(row, 'partners(direct cash sales)')
-            selling_price = safe_get_value(row, 'selling price')
-            actual_consumption_employee = safe_get_value(row, 'actual consumption/employee')
-            manual_entry = safe_get_value(row, 'manual entry')
-
-            partners_employee_50_percent = (
-                (partners_direct_cash_sales * selling_price * 2) + 
-                ((actual_consumption_employee + manual_entry) * selling_price)
-            )
-
-            check_mismatch(row, index, 'partners(direct cash sales) +employee 50%', partners_employee_50_percent, mismatched_data)
-
-            # for total sales
-            actual_consumption_employee = safe_get_value(row, 'actual consumption/employee')
-            manual_entry = safe_get_value(row, 'manual entry')
-            selling_price = safe_get_value(row, 'selling price')
-            total_pax_selling = safe_get_value(row, 'total pax selling')
-            partners_employee_50_percent = safe_get_value(row, 'partners(direct cash sales) +employee 50%')
-
-            total_sales = (
-                (actual_consumption_employee + manual_entry) * selling_price +
-                (total_pax_selling * selling_price * 2) +
-                partners_employee_50_percent
-            )
-
-            check_mismatch(row, index, 'total sales', total_sales, mismatched_data)
-
-            # for btc
-            total_sales = safe_get_value(row, 'total sales')
-            partners_employee_50_percent = safe_get_value(row, 'partners(direct cash sales) +employee 50%')
-
-            btc = total_sales - partners_employee_50_percent
-
-            check_mismatch(row, index, 'btc', btc, mismatched_data)
-
-
-            # for comission
-            total_sales = safe_get_value(row, 'total sales')
-            buying_amount = safe_get_value(row, 'buying amount')
-
-            comission = total_sales - buying_amount
-
-            check_mismatch(row, index, 'comission', comission, mismatched_data)
-
-
-
-
-
-
-
-
-
-
-            
-        except Exception as e:
-            logging.error(f"Error processing row {index + 3}: {e}")
-
-    return mismatched_data
+    # Rows without a known meal type have no price tier and are reported, as the row-by-row check did
+    return find_derived_mismatches(df, DERIVED_COLUMNS, MISMATCH_CHECKS, text_columns=[MEAL_TYPE],
+                                   flag_missing=['buying price ai', 'selling price'])
 
 
 def calculate_aggregated_values(df):
-    sum_buying_pax_regular = df['total pax buying'].sum()
-    sum_selling_pax_regular = df['total pax selling'].sum()
+    sum_buying_pax_regular = total(df['total pax buying'])
+    sum_selling_pax_regular = total(df['total pax selling'])
     
-    sum_buying_amt_ai_regular= df['buying amount'].sum()
-    sum_selling_amt_regular = df['btc'].sum()
-    sum_cash_recived = df['partners(direct cash sales) +employee 50%'].sum()
-    sum_commission = df['comission'].sum()
+    sum_buying_amt_ai_regular= total(df['buying amount'])
+    sum_selling_amt_regular = total(df['btc'])
+    sum_cash_recived = total(df['partners(direct cash sales) +employee 50%'])
+    sum_commission = total(df['comission'])
     
 
     valid_dates_df = df[(df['total pax buying'] > 0) | (df['total pax selling'] > 0)]
-    number_of_days = valid_dates_df['date'].nunique()
+    number_of_days = distinct_count(valid_dates_df['date'])
 
     aggregated_data = {
         'Number of Days': number_of_days,
@@ -217,7 +123,7 @@ def display_dataframes( mismatched_data, aggregated_data):
     st.subheader("")
     
     if mismatched_data:
-        mismatched_df = pd.DataFrame(mismatched_data)
+        mismatched_df = findings_frame(mismatched_data)
         st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
         st.table(format_dataframe(mismatched_df))
         st.markdown("---")
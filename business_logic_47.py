@@ -1,199 +1,100 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 import logging
+from validation_engine import find_derived_mismatches, tiered_values, findings_frame, total, distinct_count
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-def safe_get_value(row, col):
-    return row[col] if col in row and pd.notna(row[col]) else 0
-
-def check_mismatch(row, index, column_name, expected_value, mismatched_data):
-    actual_value = safe_get_value(row, column_name)
-    if actual_value != expected_value:
-        mismatched_data.append({
-            'Row': index + 3,
-            'Date': row['date'],
-            'Column': column_name,
-            'Expected': expected_value,
-            'Actual': actual_value
-        })
 
+MEAL_TYPE = 'meal type (only lunch)'
+
+BUYING_PRICE_TIERS = {
+    'breakfast': [(500, 62), (900, 60), (np.inf, 58)],
+    'lunch': [(500, 43.05), (900, 42), (np.inf, 41)],
+    'dinner': [(500, 43.05), (900, 42), (np.inf, 41)],
+}
+
+SELLING_PRICE_TIERS = {
+    'breakfast': [(500, 65), (900, 65), (np.inf, 65)],
+    'lunch': [(500, 51.5), (900, 50.5), (np.inf, 49.5)],
+    'dinner': [(500, 51.5), (900, 50.5), (np.inf, 49.5)],
+}
+
+DERIVED_COLUMNS = {
+    'expected buying price ai': (
+        [MEAL_TYPE, 'buying mg/pax'],
+        lambda meal_type, buying_mg_pax: tiered_values(meal_type, buying_mg_pax, BUYING_PRICE_TIERS)),
+    'buying consumption': (
+        ['actual consumption/employee', 'partners(direct cash sales)', 'manual entry', 'training new joining staff', 'gym trainer'],
+        lambda actual, partners, manual, training, gym: actual + partners + manual + training + gym),
+    'expected delta pax': (
+        ['buying mg/pax', 'buying consumption', 'training new joining staff'],
+        lambda buying_mg_pax, consumption, training: np.maximum.reduce([buying_mg_pax - consumption, training, np.zeros_like(training)])),
+    'expected total pax buying': (
+        ['actual consumption/employee', 'partners(direct cash sales)', 'manual entry', 'delta pax(gap between mg and consumption)'],
+        lambda actual, partners, manual, delta_pax: actual + partners + manual + delta_pax),
+    'expected buying amount': (
+        ['total pax buying', 'buying price ai'],
+        lambda total_pax_buying, buying_price_ai: total_pax_buying * buying_price_ai),
+    'expected selling price': (
+        [MEAL_TYPE, 'selling mg/pax'],
+        lambda meal_type, selling_mg_pax: tiered_values(meal_type, selling_mg_pax, SELLING_PRICE_TIERS)),
+    'employee consumption': (
+        ['actual consumption/employee', 'manual entry'],
+        lambda actual, manual: actual + manual),
+    'expected delta pax btc': (
+        ['selling mg/pax', 'employee consumption', 'gym trainer  btc'],
+        lambda selling_mg_pax, consumption, gym_btc: np.maximum.reduce([selling_mg_pax - consumption, gym_btc, np.zeros_like(gym_btc)])),
+    'expected btc': (
+        ['employee consumption', 'selling price', 'delta pax(gap between mg and consumption) btc'],
+        lambda consumption, selling_price, delta_pax_btc: (consumption * selling_price) + (delta_pax_btc * selling_price)),
+    'expected total sales': (
+        ['expected btc', 'partners(direct cash sales) amount'],
+        lambda btc, partners_amount: btc + partners_amount),
+    'selling consumption': (
+        ['actual consumption/employee', 'partners(direct cash sales)', 'manual entry', 'gym trainer  btc'],
+        lambda actual, partners, manual, gym_btc: actual + partners + manual + gym_btc),
+    'expected total pax selling': (
+        ['selling consumption', 'selling mg/pax'],
+        lambda consumption, selling_mg_pax: np.where(consumption < selling_mg_pax, selling_mg_pax, consumption)),
+    'expected comission': (
+        ['total sales', 'buying amount'],
+        lambda total_sales, buying_amount: total_sales - buying_amount),
+}
+
+MISMATCH_CHECKS = [
+    ('buying price ai', 'expected buying price ai'),
+    ('delta pax(gap between mg and consumption)', 'expected delta pax'),
+    ('total pax buying', 'expected total pax buying'),
+    ('buying amount', 'expected buying amount'),
+    ('selling price', 'expected selling price'),
+    ('delta pax(gap between mg and consumption) btc', 'expected delta pax btc'),
+    ('total sales', 'expected total sales'),
+    ('total pax selling', 'expected total pax selling'),
+    ('btc', 'expected btc'),
+    ('comission', 'expected comission'),
+]
 
 def find_mismatches(df):
-    mismatched_data = []
-    for index, row in df.iterrows():
-        try:
-            # for buying price ai
-            meal_type = safe_get_value(row, 'meal type (only lunch)')
-            buying_mg_pax = safe_get_value(row, 'buying mg/pax')
-
-            if meal_type == "breakfast":
-                if buying_mg_pax <= 500:
-                    buying_price_ai = 62
-                elif buying_mg_pax <= 900:
-                    buying_price_ai = 60
-                else:
-                    buying_price_ai = 58
-            elif meal_type == "lunch":
-                if buying_mg_pax <= 500:
-                    buying_price_ai = 43.05
-                elif buying_mg_pax <= 900:
-                    buying_price_ai = 42
-                else:
-                    buying_price_ai = 41
-            elif meal_type == "dinner":
-                if buying_mg_pax <= 500:
-                    buying_price_ai = 43.05
-                elif buying_mg_pax <= 900:  # I noticed this was incorrect in the provided formula
-                    buying_price_ai = 42
-                else:
-                    buying_price_ai = 41
-            else:
-                buying_price_ai = ""
-
-            check_mismatch(row, index, 'buying price ai', buying_price_ai, mismatched_data)
-
-          # for delta pax(gap between mg and consumption)
-            buying_mg_pax = safe_get_value(row, 'buying mg/pax')
-            actual_consumption = safe_get_value(row, 'actual consumption/employee')
-            partners_sales = safe_get_value(row, 'partners(direct cash sales)')
-            manual_entry = safe_get_value(row, 'manual entry')
-            training_staff = safe_get_value(row, 'training new joining staff')
-            gym_traine = safe_get_value(row, 'gym trainer') 
-
-            calculated_delta_pax = max(
-                buying_mg_pax - (actual_consumption + partners_sales + manual_entry + training_staff + gym_traine),
-                training_staff,
-                0
-            )
-
-            check_mismatch(row, index, 'delta pax(gap between mg and consumption)', calculated_delta_pax, mismatched_data)
-
-            # for total pax buying
-            total_pax_buying = (
-                safe_get_value(row, 'actual consumption/employee') +
-                safe_get_value(row, 'partners(direct cash sales)') +
-                safe_get_value(row, 'manual entry') +
-                safe_get_value(row, 'delta pax(gap between mg and consumption)')
-            )
-
-            check_mismatch(row, index, 'total pax buying', total_pax_buying, mismatched_data)
-
-            # for buying amount
-            buying_amount = safe_get_value(row, 'total pax buying') * safe_get_value(row, 'buying price ai')  
-            check_mismatch(row, index, 'buying amount', buying_amount, mismatched_data)
-
-            # for selling price
-            meal_type = safe_get_value(row, 'meal type (only lunch)')
-            selling_mg_pax = safe_get_value(row, 'selling mg/pax')
-
-            if meal_type == "breakfast":
-                if selling_mg_pax <= 500:
-                    selling_price = 65
-                elif selling_mg_pax <= 900:
-                    selling_price = 65
-                else:
-                    selling_price = 65
-            elif meal_type == "lunch":
-                if selling_mg_pax <= 500:
-                    selling_price = 51.5
-                elif selling_mg_pax <= 900:
-                    selling_price = 50.5
-                else:
-                    selling_price = 49.5
-            elif meal_type == "dinner":
-                if selling_mg_pax <= 500:
-                    selling_price = 51.5
-                elif selling_mg_pax <= 900:
-                    selling_price = 50.5
-                else:
-                    selling_price = 49.5
-            else:
-                selling_price = ""
-
-            check_mismatch(row, index, 'selling price', selling_price, mismatched_data)
-
-            # for delta pax(gap between mg and consumption) BTC
-            selling_mg_pax = safe_get_value(row, 'selling mg/pax')  # Assuming S234 corresponds to 'selling mg/pax'
-            actual_consumption = safe_get_value(row, 'actual consumption/employee')  # Assuming J234 corresponds to 'actual consumption/employee'
-            manual_entry = safe_get_value(row, 'manual entry')  # Assuming M234 corresponds to 'manual entry'
-            training_staff = safe_get_value(row, 'gym trainer  btc')  # Assuming T234 corresponds to 'training new joining staff'
-
-            calculated_delta_pax_btc = max(
-                selling_mg_pax - (actual_consumption + manual_entry),
-                training_staff,
-                0
-            )
-
-            check_mismatch(row, index, 'delta pax(gap between mg and consumption) btc', calculated_delta_pax_btc, mismatched_data)
-
-            # for total sales
-            actual_consumption = safe_get_value(row, 'actual consumption/employee')  
-            manual_entry = safe_get_value(row, 'manual entry')
-            selling_price = safe_get_value(row, 'selling price')  
-            partners_sales = safe_get_value(row, 'delta pax(gap between mg and consumption) btc')  
-            partners_sales_amount = safe_get_value(row, 'partners(direct cash sales) amount')  
-
-            total_sales = ((actual_consumption + manual_entry) * selling_price) + (partners_sales * selling_price) + partners_sales_amount
-
-            check_mismatch(row, index, 'total sales', total_sales, mismatched_data)
-
-
-            # for total pax selling
-            actual_consumption = safe_get_value(row, 'actual consumption/employee') 
-            partners_sales = safe_get_value(row, 'partners(direct cash sales)')  
-            manual_entry = safe_get_value(row, 'manual entry') 
-            training_staff = safe_get_value(row, 'gym trainer  btc')  
-            selling_mg_pax = safe_get_value(row, 'selling mg/pax')  
-
-            total_pax_selling = (
-                selling_mg_pax if (actual_consumption + partners_sales + manual_entry + training_staff) < selling_mg_pax 
-                else (actual_consumption + partners_sales + manual_entry + training_staff)
-            )
-
-            check_mismatch(row, index, 'total pax selling', total_pax_selling, mismatched_data)
-
-
-
-
-
-
-
-
-            # for BTC
-            actual_consumption = safe_get_value(row, 'actual consumption/employee')  
-            manual_entry = safe_get_value(row, 'manual entry')  
-            selling_price = safe_get_value(row, 'selling price')  
-            partners_sales = safe_get_value(row, 'delta pax(gap between mg and consumption) btc') 
-
-            btc = ((actual_consumption + manual_entry) * selling_price) + (partners_sales * selling_price)
-
-            check_mismatch(row, index, 'btc', btc, mismatched_data)
-
-            # for comission
-            comission_amount = safe_get_value(row, 'total sales') - safe_get_value(row, 'buying amount')
-            check_mismatch(row, index, 'comission', comission_amount, mismatched_data)
-
-            
-        except Exception as e:
-            logging.error(f"Error processing row {index + 3}: {e}")
-
-    return mismatched_data
+    # Rows without a known meal type have no price tier and are reported, as the row-by-row check did
+    return find_derived_mismatches(df, DERIVED_COLUMNS, MISMATCH_CHECKS, text_columns=[MEAL_TYPE],
+                                   flag_missing=['buying price ai', 'selling price'])
 
 
 def calculate_aggregated_values(df):
-    sum_buying_pax_regular = df['total pax buying'].sum()
-    sum_selling_pax_regular = df['total pax selling'].sum()
+    sum_buying_pax_regular = total(df['total pax buying'])
+    sum_selling_pax_regular = total(df['total pax selling'])
     
-    sum_buying_amt_ai_regular= df['buying amount'].sum()
-    sum_selling_amt_regular = df['btc'].sum()
-    sum_cash_recived = df['partners(direct cash sales) amount'].sum()
-    sum_commission = df['comission'].sum()
+    sum_buying_amt_ai_regular= total(df['buying amount'])
+    sum_selling_amt_regular = total(df['btc'])
+    sum_cash_recived = total(df['partners(direct cash sales) amount'])
+    sum_commission = total(df['comission'])
     
 
     valid_dates_df = df[(df['total pax buying'] > 0) | (df['total pax selling'] > 0)]
-    number_of_days = valid_dates_df['date'].nunique()
+    number_of_days = distinct_count(valid_dates_df['date'])
 
     aggregated_data = {
         'Number of Days': number_of_days,
@@ -217,7 +118,7 @@ def display_dataframes( mismatched_data, aggregated_data):
     st.subheader("")
     
     if mismatched_data:
-        mismatched_df = pd.DataFrame(mismatched_data)
+        mismatched_df = findings_frame(mismatched_data)
         st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
         st.table(format_dataframe(mismatched_df))
         st.markdown("---")
@@ -1,6 +1,7 @@
 import pandas as pd
 import streamlit as st
 import logging
+from validation_engine import is_mismatch, findings_frame, total, distinct_count
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -10,7 +11,7 @@ def safe_get_value(row, col):
 
 def check_mismatch(row, index, column_name, expected_value, mismatched_data):
     actual_value = safe_get_value(row, column_name)
-    if actual_value != expected_value:
+    if is_mismatch(actual_value, expected_value):
         mismatched_data.append({
             'Row': index + 3,
             'Date': row['date'],
@@ -162,17 +163,17 @@ def find_mismatches(df):
 
 
 def calculate_aggregated_values(df):
-    sum_buying_pax_regular = df['total pax buying'].sum()
-    sum_selling_pax_regular = df['total pax selling'].sum()
+    sum_buying_pax_regular = total(df['total pax buying'])
+    sum_selling_pax_regular = total(df['total pax selling'])
     
-    sum_buying_amt_ai_regular= df['buying amount'].sum()
-    sum_selling_amt_regular = df['btc'].sum()
-    sum_cash_recived = df['partners(direct cash sales) +employee 50%'].sum()
-    sum_commission = df['comission'].sum()
+    sum_buying_amt_ai_regular= total(df['buying amount'])
+    sum_selling_amt_regular = total(df['btc'])
+    sum_cash_recived = total(df['partners(direct cash sales) +employee 50%'])
+    sum_commission = total(df['comission'])
     
 
     valid_dates_df = df[(df['total pax buying'] > 0) | (df['total pax selling'] > 0)]
-    number_of_days = valid_dates_df['date'].nunique()
+    number_of_days = distinct_count(valid_dates_df['date'])
 
     aggregated_data = {
         'Number of Days': number_of_days,
@@ -196,7 +197,7 @@ def display_dataframes( mismatched_data, aggregated_data):
     st.subheader("")
     
     if mismatched_data:
-        mismatched_df = pd.DataFrame(mismatched_data)
+        mismatched_df = findings_frame(mismatched_data)
         st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
         st.table(format_dataframe(mismatched_df))
         st.markdown("---")
@@ -0,0 +1,385 @@
+# Declarative mismatch rules per business logic module. Each rule names the sheet column to check, the
+# formula for its expected value and, optionally, a 'when' condition limiting the rows it applies to.
+# Formulas quote sheet columns in backticks and support + - * /, comparisons, and/or/not, 'in [...]',
+# max(), min() and where(condition, if_true, if_false); rule_compiler turns them into column-wise evaluators.
+#
+# A new client whose sheet follows the standard template only needs an entry here and a sheet mapping in
+# main.py; rule_based_logic renders it without a dedicated business logic module.
+
+CLIENT_RULES = {
+    # Postman
+    'business_logic_1': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Pratilipi
+    'business_logic_2': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Quzizz, Synergy, Amadeus, Awfis
+    'business_logic_3': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Medtrix, Odessa, MG Eli Lilly, Scaler-Prequin
+    'business_logic_4': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': '`client mg/pre order`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Gojek, Microchip Main Meal
+    'business_logic_5': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': 'max(`ordered pax/vendor mg`, `buying actual consumption`)'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `selling actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # HD Works
+    'business_logic_6': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Tonbo, Tadano Escorts, Siemens - Tuckshop, Dynasty, Citrix Driver's Lunch & Dinner, sharefile
+    'business_logic_8': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Rippling, Tessolve
+    'business_logic_9': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # MPL -  Infinity Plates, Tekion., Groww Koramangala, Groww VTP, MIQ, Groww Mumbai, Ather Mumbai, Epam
+    'business_logic_10': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Telstra MainMeal(Cash & Carry)
+    'business_logic_11': [
+        {'target': 'actual consumption', 'formula': '`direct payment from employee` / `selling price`'},
+        {'target': 'to bill', 'formula': '`ordered pax/vendor mg` - `actual consumption`'},
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `to bill` + `buying transportation`'},
+        {'target': 'selling amount', 'formula': '`to bill` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Eli Lilly Wallet, Sheet1
+    'business_logic_12': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': '`client mg/pre order`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'bill to client', 'formula': '`selling amount` - `direct payment from employee`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Sinch, O9 Solutions
+    'business_logic_13': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `ordered pax/vendor mg`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # RAKUTEN-2, Clario
+    'business_logic_14': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Waters Main Meal
+    'business_logic_15': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': '`actual consumption`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation` - `direct payment from employee`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `direct payment from employee`'},
+    ],
+    # Lam Research, Corning, PhonePe
+    'business_logic_19': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`client mg/pre order`'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Ather BLR
+    'business_logic_21': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Ather Plant 1., Ather Plant 2., SAEL Delhi, Gojek.
+    'business_logic_22': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # STRIPE MIS, TEA-Breakfast
+    'business_logic_23': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # FRUIT N JUICE MIS
+    'business_logic_24': [
+        {'target': 'buying amt ai', 'formula': '`unit price` * `fruit qty`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`buying amt ai` * 1.1'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai`'},
+    ],
+    # Siemens, Toasttab, Gartner
+    'business_logic_25': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Siemens_Pune
+    'business_logic_27': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`actual consumption`'},
+        {'target': 'selling pax', 'formula': 'max(`actual consumption`, `client mg/pre order`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation` - `direct payment from employee`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `direct payment from employee`'},
+    ],
+    # CSG-Pune
+    'business_logic_28': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`actual consumption`'},
+        {'target': 'selling pax', 'formula': '`actual consumption`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Salesforce-GGN
+    'business_logic_29': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling management fee', 'formula': '`selling amount` * 0.1'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Salesforce - Jaipur
+    'business_logic_30': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling management fee', 'formula': '`selling amount` * 0.07'},
+        {'target': 'selling pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`, `client mg/pre order`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Ather - Main Meal
+    'business_logic_31': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`actual consumption`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Siemens.
+    'business_logic_32': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`client mg/pre order`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Postman., Citrix-Tuckshop
+    'business_logic_33': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Sinch Lunch
+    'business_logic_34': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': 'max(`client mg/pre order`, `ordered pax/vendor mg`)'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'direct payment from employee', 'formula': '`actual consumption` * `employee contribution`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `direct payment from employee`'},
+    ],
+    # Sinch Dinner
+    'business_logic_35': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': 'max(`ordered pax/vendor mg`, `agreement mg or client mg whichever is higher`, `buying pax`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # STRYKER MIS - '2024
+    'business_logic_36': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': 'max(`ordered pax/vendor mg`, `vendor actual consumption`)'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `actual consumption`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # EGL
+    'business_logic_37': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Truecaller
+    'business_logic_38': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying manpower`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Gold Hill-Main Meal, Goldhill Juice Junction., Healthineer International, Priteck - Main meal, Pritech park Juice junction
+    'business_logic_40': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'buying pax', 'formula': '`company paid` + `contract employees`'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation` - `direct payment from employee`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `direct payment from employee`'},
+    ],
+    # Siemens-BLR, Siemens Juice Counter
+    'business_logic_41': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation` - `direct payment from employee`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `direct payment from employee`'},
+    ],
+    # HD Works(HYD)
+    'business_logic_45': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation`'},
+        {'target': 'selling pax', 'formula': 'max(`client mg/pre order`, `buying pax`)'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq`'},
+    ],
+    # Telstra Event., Telstra Event, Events
+    'event_logic_1': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Eli Lilly Event
+    'event_logic_2': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'selling pax', 'formula': '`actual consumption`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Waters Event
+    'event_logic_3': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': '`client mg/pre order`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Icon-event-Bangalore, Sinch Event sheet, infosys Event+ Additional Sales, Other Events., Telstra Event sheet, MPL-Delhi
+    'event_logic_4': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Other Events
+    'event_logic_5': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Lam Research Event
+    'event_logic_6': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'buying pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling pax', 'formula': '`ordered pax/vendor mg`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # ICON CHN EVENT
+    'event_logic_7': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'buying pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`)'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # other Event MIS
+    'event_logic_8': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'selling price', 'formula': '`selling price (inc gst)` / `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'buying pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`)'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+    # Amazon  PNQ Events -
+    'event_logic_9': [
+        {'target': 'buying price', 'formula': '`buying price ai` / `gst`'},
+        {'target': 'selling price (inc of gst)', 'formula': '`selling price` * `gst`'},
+        {'target': 'buying amt ai', 'formula': '`buying price ai` * `buying pax` + `buying transportation` + `buying management fee`'},
+        {'target': 'buying pax', 'formula': 'max(`ordered pax/vendor mg`, `actual consumption`)'},
+        {'target': 'selling pax', 'formula': '`buying pax`'},
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price` + `selling transportation`'},
+        {'target': 'commission', 'formula': '`selling amount` - `buying amt ai` + `penalty on vendor` - `penalty on smartq` + `selling management fee`'},
+    ],
+}
@@ -0,0 +1,192 @@
+import getpass
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; lock files are locked through msvcrt instead
+    fcntl = None
+    import msvcrt
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Parsed sheets and validation results shared by every Streamlit process the same user runs on the machine.
+# Entries are unpickled, so the directory is private to that user.
+DISK_CACHE_DIR = os.environ.get('MIS_CACHE_DIR', os.path.join(tempfile.gettempdir(), f'mis_cache-{getpass.getuser()}'))
+DISK_CACHE_BYTES = int(os.environ.get('MIS_DISK_CACHE_MB', 4096)) * 2**20
+LOCK_POLL_SECONDS = 0.1
+ENTRY_SUFFIX = '.pkl'
+LOCK_SUFFIX = '.lock'
+
+def code_version():
+    # Cached results depend on the parsing and business logic code, so a deploy starts on fresh entries
+    # and the old ones age out through eviction
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()[:12]
+
+def private_directory(path):
+    # Anyone who can write a pickle into the cache can run code in the app, so the directory must belong to
+    # this user and be closed to everyone else
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Disk cache path {path} is not a directory.")
+    if hasattr(os, 'getuid'):
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"Disk cache directory {path} is owned by another user.")
+        if info.st_mode & 0o077:
+            raise PermissionError(f"Disk cache directory {path} is accessible to other users; restrict it to mode 700.")
+    return path
+
+@contextmanager
+def file_lock(path):
+    with open(path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class DiskCache:
+    def __init__(self, directory=DISK_CACHE_DIR, max_bytes=DISK_CACHE_BYTES, version=None):
+        self.directory = private_directory(directory)
+        self.max_bytes = max_bytes
+        self.version = version or code_version()
+        self.lock_directory = os.path.join(directory, 'locks')
+        os.makedirs(self.lock_directory, exist_ok=True)
+
+    def entry_name(self, namespace, key):
+        return hashlib.sha256(repr((self.version, namespace, key)).encode()).hexdigest()
+
+    def entry_path(self, name):
+        return os.path.join(self.directory, name + ENTRY_SUFFIX)
+
+    def lock_path(self, name):
+        return os.path.join(self.lock_directory, name + LOCK_SUFFIX)
+
+    def key_lock(self, name):
+        # One lock file per entry, so a long compute only holds up processes waiting for the same entry
+        return file_lock(self.lock_path(name))
+
+    def get(self, namespace, key):
+        path = self.entry_path(self.entry_name(namespace, key))
+        try:
+            with open(path, 'rb') as entry_file:
+                value = pickle.load(entry_file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # A truncated or unreadable entry is dropped and recomputed
+            logging.warning(f"Discarding unreadable disk cache entry {path}: {e}")
+            self.remove(path)
+            return None
+        try:
+            # The modification time doubles as the last use for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def set(self, namespace, key, value):
+        path = self.entry_path(self.entry_name(namespace, key))
+        # Readers in other processes only ever see a complete file: the entry is written to a temporary file
+        # in the same directory and renamed over the old one
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as entry_file:
+                pickle.dump(value, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except Exception as e:
+            logging.error(f"Error writing disk cache entry {path}: {e}")
+            self.remove(temporary_path)
+            return
+        self.evict()
+
+    def get_or_compute(self, namespace, key, compute):
+        # Processes asking for the same entry take its lock in turn, so only the first one computes it and
+        # the rest read its result
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+        name = self.entry_name(namespace, key)
+        with self.key_lock(name):
+            value = self.get(namespace, key)
+            if value is not None:
+                logging.info(f"Disk cache hit for {namespace} after waiting on another worker.")
+                return value
+            value = compute()
+            if value is not None:
+                self.set(namespace, key, value)
+        if value is None:
+            # Nothing was stored, so nothing will evict this entry's lock file
+            self.remove(self.lock_path(name))
+        return value
+
+    def evict(self):
+        with file_lock(os.path.join(self.lock_directory, 'evict.lock')):
+            entries = []
+            for path in glob.glob(os.path.join(self.directory, '*' + ENTRY_SUFFIX)):
+                try:
+                    file_stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((file_stat.st_mtime, file_stat.st_size, path))
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                if self.remove(path):
+                    total_bytes -= size
+                    # A process still holding the old lock file at worst computes the entry a second time
+                    self.remove(self.lock_path(os.path.basename(path)[:-len(ENTRY_SUFFIX)]))
+                    logging.info(f"Evicted {os.path.basename(path)} from the disk cache.")
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+class NullCache:
+    # Stand-in when the cache directory cannot be made private: nothing is stored or shared, every value is
+    # computed by the process that asks for it
+    def get(self, namespace, key):
+        return None
+
+    def set(self, namespace, key, value):
+        pass
+
+    def get_or_compute(self, namespace, key, compute):
+        return compute()
+
+try:
+    disk_cache = DiskCache()
+except OSError as e:
+    logging.warning(f"Disk cache disabled: {e}")
+    disk_cache = NullCache()
@@ -0,0 +1,174 @@
+import argparse
+import logging
+import os
+import subprocess
+import types
+import numpy as np
+import pandas as pd
+from main import BUSINESS_LOGIC_SHEETS, find_business_logic_module
+from logic_runner import load_business_logic
+from mis_generator import generate_frame
+from profile_sheet import load_month
+from validation_engine import ROUND_DECIMALS, values_differ, MismatchStore
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stages whose output is compared; display_ functions only render
+COMPARED_PREFIXES = ('find_', 'calculate_', 'pivot_')
+
+def root_commit():
+    return subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                          text=True, check=True).stdout.split()[0]
+
+def load_legacy_module(module_name, ref):
+    # The module is executed from the ref's source; modules it imports still come from the working tree
+    result = subprocess.run(['git', 'show', f'{ref}:{module_name}.py'], cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    module = types.ModuleType(f'legacy_{module_name}')
+    module.__file__ = f'{ref}:{module_name}.py'
+    exec(compile(result.stdout, module.__file__, 'exec'), module.__dict__)
+    return module
+
+def compared_functions(legacy_module, module):
+    return [
+        name for name, value in vars(legacy_module).items()
+        if name.startswith(COMPARED_PREFIXES) and callable(value) and callable(getattr(module, name, None))
+    ]
+
+def output_frame(output):
+    # Findings lists, aggregate dicts and pivot frames are all compared as frames
+    if isinstance(output, pd.DataFrame):
+        output_df = output.reset_index(drop=True)
+    elif isinstance(output, MismatchStore):
+        output_df = output.to_frame()
+        output_df['Column'] = output_df['Column'].astype(object)
+    elif isinstance(output, dict):
+        output_df = pd.DataFrame([output])
+    else:
+        output_df = pd.DataFrame(list(output))
+    if 'Row' in output_df.columns:
+        keys = [column for column in ('Row', 'Column') if column in output_df.columns]
+        output_df = output_df.sort_values(keys, kind='stable').reset_index(drop=True)
+    return output_df
+
+def is_blank(values):
+    # An empty string and a missing value both render as an empty cell
+    return (values.isna() | (values.astype(str).str.strip() == '')).to_numpy()
+
+def cells_differ(legacy_values, new_values):
+    legacy_numbers = pd.to_numeric(legacy_values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    new_numbers = pd.to_numeric(new_values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    both_numeric = ~np.isnan(legacy_numbers) & ~np.isnan(new_numbers)
+    both_missing = is_blank(legacy_values) & is_blank(new_values)
+    text_differ = legacy_values.astype(str).to_numpy() != new_values.astype(str).to_numpy()
+    return np.where(both_numeric, values_differ(legacy_numbers, new_numbers), ~both_missing & text_differ)
+
+def diff_outputs(legacy_output, new_output):
+    legacy_df = output_frame(legacy_output)
+    new_df = output_frame(new_output)
+    differences = []
+
+    if 'Row' in legacy_df.columns and 'Row' in new_df.columns:
+        keys = [column for column in ('Row', 'Column') if column in legacy_df.columns and column in new_df.columns]
+        merged_df = legacy_df.merge(new_df, on=keys, how='outer', suffixes=(' (legacy)', ' (new)'), indicator=True)
+        legacy_only_df = legacy_df.merge(merged_df.loc[merged_df['_merge'] == 'left_only', keys], on=keys)
+        new_only_df = new_df.merge(merged_df.loc[merged_df['_merge'] == 'right_only', keys], on=keys)
+        for record in legacy_only_df.to_dict('records'):
+            differences.append({'Key': tuple(record[key] for key in keys), 'Field': 'finding', 'Legacy': record, 'New': None})
+        for record in new_only_df.to_dict('records'):
+            differences.append({'Key': tuple(record[key] for key in keys), 'Field': 'finding', 'Legacy': None, 'New': record})
+        matched_df = merged_df[merged_df['_merge'] == 'both']
+        fields = [column for column in legacy_df.columns if column in new_df.columns and column not in keys]
+        for field in fields:
+            differ = cells_differ(matched_df[f'{field} (legacy)'], matched_df[f'{field} (new)'])
+            for record in matched_df[differ].to_dict('records'):
+                differences.append({'Key': tuple(record[key] for key in keys), 'Field': field,
+                                    'Legacy': record[f'{field} (legacy)'], 'New': record[f'{field} (new)']})
+        return differences
+
+    if list(legacy_df.columns) != list(new_df.columns) or len(legacy_df) != len(new_df):
+        return [{'Key': None, 'Field': 'shape', 'Legacy': (len(legacy_df), list(legacy_df.columns)),
+                 'New': (len(new_df), list(new_df.columns))}]
+    for field in legacy_df.columns:
+        differ = cells_differ(legacy_df[field], new_df[field])
+        for position in np.flatnonzero(differ):
+            differences.append({'Key': int(position), 'Field': field,
+                                'Legacy': legacy_df[field].iloc[position], 'New': new_df[field].iloc[position]})
+    return differences
+
+def call_stage(function, df):
+    try:
+        return function(df.copy()), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+def compare_module(module_name, df, ref):
+    legacy_module = load_legacy_module(module_name, ref)
+    if legacy_module is None:
+        logging.info(f"'{module_name}' does not exist at {ref}; nothing to compare.")
+        return []
+    module, _ = load_business_logic(module_name)
+    differences = []
+    for name in compared_functions(legacy_module, module):
+        legacy_output, legacy_error = call_stage(getattr(legacy_module, name), df)
+        new_output, new_error = call_stage(getattr(module, name), df)
+        if legacy_error or new_error:
+            if legacy_error != new_error:
+                differences.append({'Function': name, 'Key': None, 'Field': 'error', 'Legacy': legacy_error, 'New': new_error})
+            continue
+        differences.extend({'Function': name, **difference} for difference in diff_outputs(legacy_output, new_output))
+    return [{'Module': module_name, **difference} for difference in differences]
+
+def generated_cases(module_names, rows, error_count, seed, ref):
+    # Sheets are repaired and corrupted by the legacy module so they do not depend on the code under test
+    for module_name in module_names:
+        legacy_module = load_legacy_module(module_name, ref)
+        if legacy_module is None:
+            logging.info(f"'{module_name}' does not exist at {ref}; nothing to compare.")
+            continue
+        df, _ = generate_frame(module_name, rows, error_count, seed, oracle=legacy_module)
+        yield module_name, f'generated {rows} rows', df
+
+def recorded_cases(workbook_path, month=None):
+    for sheet_name in pd.ExcelFile(workbook_path).sheet_names:
+        module_name = find_business_logic_module(sheet_name)
+        if module_name:
+            df, sheet_month = load_month(workbook_path, sheet_name, month)
+            yield module_name, f"'{sheet_name}' ({sheet_month})", df
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the business logic modules against their implementation at a git ref.")
+    parser.add_argument('--ref', help="git ref holding the legacy implementation (default: the first commit)")
+    parser.add_argument('--modules', nargs='*', help="modules to compare on generated sheets (default: every registered module)")
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--errors', type=int, default=50, help="cells corrupted in each generated sheet")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workbook', help="compare on the mapped sheets of a recorded workbook instead")
+    parser.add_argument('--month', help="month of the recorded workbook to compare")
+    args = parser.parse_args()
+
+    ref = args.ref or root_commit()
+    if args.workbook:
+        cases = recorded_cases(args.workbook, args.month)
+    else:
+        module_names = args.modules or [module_name for module_name, sheets in BUSINESS_LOGIC_SHEETS.items() if any(sheets)]
+        cases = generated_cases(module_names, args.rows, args.errors, args.seed, ref)
+
+    all_differences = []
+    for module_name, description, df in cases:
+        differences = compare_module(module_name, df, ref)
+        logging.info(f"{module_name} on {description}: {len(differences)} differences")
+        all_differences.extend(differences)
+
+    if not all_differences:
+        logging.info(f"All compared stages match {ref} at {ROUND_DECIMALS}-decimal precision.")
+        return 0
+    print(pd.DataFrame(all_differences).to_string(index=False, max_colwidth=80))
+    return 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
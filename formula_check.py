@@ -0,0 +1,116 @@
+import logging
+import re
+from collections import Counter
+import pandas as pd
+import streamlit as st
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string, get_column_letter
+from validation_engine import ROW_OFFSET
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+HEADER_ROW = ROW_OFFSET - 1
+# A column counts as a formula column when at least this share of its filled cells hold a formula
+FORMULA_COLUMN_SHARE = 0.5
+# A1 references outside string literals; function names like LOG10( and sheet-level names are left alone
+CELL_REFERENCE = re.compile(r'(?<![A-Za-z0-9_.])(\$?)([A-Z]{1,3})(\$?)([0-9]+)(?![0-9A-Za-z_(])')
+STRING_LITERAL = re.compile(r'("(?:[^"]|"")*")')
+R1C1_REFERENCE = re.compile(r'R(\[-?[0-9]+\]|[0-9]+)C(\[-?[0-9]+\]|[0-9]+)')
+
+def formula_text(value):
+    # Array formulas come back from openpyxl as objects holding the text
+    text = getattr(value, 'text', value)
+    return text if isinstance(text, str) and text.startswith('=') else None
+
+def r1c1_template(formula, row, column):
+    # The formula with every A1 reference rewritten relative to its own cell, so a formula filled down a
+    # column gives the same template on every row
+    def relative(match):
+        column_absolute, letters, row_absolute, digits = match.groups()
+        referenced_column, referenced_row = column_index_from_string(letters), int(digits)
+        row_part = f'R{referenced_row}' if row_absolute else f'R[{referenced_row - row}]'
+        column_part = f'C{referenced_column}' if column_absolute else f'C[{referenced_column - column}]'
+        return row_part + column_part
+
+    parts = STRING_LITERAL.split(formula)
+    return ''.join(part if index % 2 else CELL_REFERENCE.sub(relative, part) for index, part in enumerate(parts))
+
+def template_formula(template, row, column):
+    # The template written back as the A1 formula it stands for at the given cell
+    def absolute(match):
+        row_part, column_part = match.groups()
+        row_relative, column_relative = row_part.startswith('['), column_part.startswith('[')
+        referenced_row = row + int(row_part[1:-1]) if row_relative else int(row_part)
+        referenced_column = column + int(column_part[1:-1]) if column_relative else int(column_part)
+        return f"{'' if column_relative else '$'}{get_column_letter(referenced_column)}{'' if row_relative else '$'}{referenced_row}"
+
+    parts = STRING_LITERAL.split(template)
+    return ''.join(part if index % 2 else R1C1_REFERENCE.sub(absolute, part) for index, part in enumerate(parts))
+
+def iter_cells(workbook_file, sheet_name, columns=None):
+    # Yields the header once, then (row, column, template, formula or value) for every filled data cell of
+    # the given columns; stored formulas are read, not their cached values
+    if hasattr(workbook_file, 'seek'):
+        workbook_file.seek(0)
+    workbook = load_workbook(workbook_file, read_only=True, data_only=False)
+    try:
+        sheet_rows = workbook[sheet_name].iter_rows(min_row=HEADER_ROW, values_only=True)
+        header = [str(value).lower().strip() if value is not None else '' for value in next(sheet_rows, ())]
+        yield header
+        columns = range(len(header)) if columns is None else sorted(columns)
+        for row, values in enumerate(sheet_rows, start=ROW_OFFSET):
+            for column in columns:
+                value = values[column] if column < len(values) else None
+                if value is None or value == '':
+                    continue
+                formula = formula_text(value)
+                yield row, column, r1c1_template(formula, row, column + 1) if formula else None, formula or value
+    finally:
+        workbook.close()
+
+def check_formulas(workbook_file, sheet_name):
+    # Two passes over the stored formulas: the first only counts templates per column, the second collects
+    # the rows of formula columns that deviate from the dominant template or hold a typed-in value. Memory
+    # grows with the number of distinct templates and issues, not with the sheet.
+    cells = iter_cells(workbook_file, sheet_name)
+    header = next(cells)
+    templates = [Counter() for _ in header]
+    filled = [0] * len(header)
+    for _, column, template, _ in cells:
+        filled[column] += 1
+        if template is not None:
+            templates[column][template] += 1
+
+    dominant = {}
+    for column, name in enumerate(header):
+        formula_count = sum(templates[column].values())
+        if formula_count and formula_count >= FORMULA_COLUMN_SHARE * filled[column]:
+            dominant[column] = templates[column].most_common(1)[0]
+            logging.info(f"Column '{name}': {len(templates[column])} formula templates over {formula_count} cells.")
+
+    issues = []
+    cells = iter_cells(workbook_file, sheet_name, dominant)
+    next(cells)
+    for row, column, template, found in cells:
+        column_template, template_count = dominant[column]
+        if template == column_template:
+            continue
+        issues.append({
+            'Row': row,
+            'Column': header[column],
+            'Issue': 'Hard-coded value' if template is None else 'Formula differs from the column',
+            'Found': found,
+            'Expected Formula': template_formula(column_template, row, column + 1),
+            'Column Template': column_template,
+            'Rows Using Template': template_count,
+        })
+    return pd.DataFrame(issues, columns=['Row', 'Column', 'Issue', 'Found', 'Expected Formula', 'Column Template', 'Rows Using Template'])
+
+def display_formula_issues(formula_issues_df):
+    if not formula_issues_df.empty:
+        st.write("<span style='color:red'>Formula Issues</span> :heavy_exclamation_mark:", unsafe_allow_html=True)
+        st.dataframe(formula_issues_df)
+    else:
+        st.write("<span style='color:green'>Every formula column follows a single template.</span> :white_check_mark:", unsafe_allow_html=True)
+    st.markdown("---")
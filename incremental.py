@@ -0,0 +1,109 @@
+import logging
+import numpy as np
+import pandas as pd
+from disk_cache import disk_cache
+from jobs import combine_results, is_row_indexed
+from logic_runner import run_business_logic, capture_display, stage_functions
+from validation_engine import ROW_OFFSET, MismatchStore
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Row-local stages whose findings can be kept for rows that did not change between uploads
+REUSED_PREFIX = 'find_'
+
+def row_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+def sheet_schema(df):
+    # Row hashes cover values only, so a renamed header or a column that now parses to another dtype is caught here
+    return tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes)
+
+def match_rows(previous_hashes, previous_rows, hashes):
+    # The previous sheet row holding the same content as each current row, or -1 for new and edited rows;
+    # identical rows are paired in order, so duplicates are never matched twice
+    previous_df = pd.DataFrame({'hash': previous_hashes, 'row': previous_rows})
+    previous_df['occurrence'] = previous_df.groupby('hash').cumcount()
+    current_df = pd.DataFrame({'hash': hashes})
+    current_df['occurrence'] = current_df.groupby('hash').cumcount()
+    matched_df = current_df.merge(previous_df, on=['hash', 'occurrence'], how='left')
+    return matched_df['row'].fillna(-1).astype('int64').to_numpy()
+
+def has_rows(result):
+    if isinstance(result, MismatchStore):
+        return True
+    if isinstance(result, pd.DataFrame):
+        return 'Row' in result.columns
+    return isinstance(result, list) and all(isinstance(record, dict) and 'Row' in record for record in result)
+
+def remap_result(result, old_rows, new_rows):
+    # The findings of the unchanged rows, renumbered to where those rows are in the new upload
+    if isinstance(result, MismatchStore):
+        return result.remap_rows(old_rows, new_rows)
+    row_map = dict(zip(old_rows.tolist(), new_rows.tolist()))
+    if isinstance(result, pd.DataFrame):
+        kept_df = result[result['Row'].isin(row_map)].copy()
+        kept_df['Row'] = kept_df['Row'].map(row_map).astype(result['Row'].dtype)
+        if is_row_indexed(result):
+            kept_df.index = pd.Index(kept_df['Row'].to_numpy() - ROW_OFFSET, dtype=result.index.dtype)
+        return kept_df
+    return [dict(record, Row=row_map[record['Row']]) for record in result if record['Row'] in row_map]
+
+def sort_result(result):
+    if isinstance(result, MismatchStore):
+        result.sort_by_row()
+        return result
+    if isinstance(result, pd.DataFrame):
+        sorted_df = result.sort_values('Row', kind='stable')
+        return sorted_df if is_row_indexed(result) else sorted_df.reset_index(drop=True)
+    return sorted(result, key=lambda record: record['Row'])
+
+def collect_findings(module, df, extra_args=(), wrap_stage=None):
+    # Runs only the row-local stages, through the module's entry function so they get their usual arguments
+    findings = {}
+    reused = {name for name in stage_functions(module) if name.startswith(REUSED_PREFIX)}
+
+    def collect(stage, function):
+        if stage not in reused:
+            return lambda *args, **kwargs: None
+        if wrap_stage is not None:
+            function = wrap_stage(stage, function)
+
+        def run(*args, **kwargs):
+            findings[stage] = function(*args, **kwargs)
+        return run
+
+    run_business_logic(module, df, extra_args, collect, overrides={'display_dataframes': lambda *args, **kwargs: None})
+    return findings
+
+def incremental_validate(module, df, state_key, extra_args=(), wrap_stage=None):
+    # capture_display that re-checks only the rows whose content changed since the last upload of this sheet
+    # and month; findings of the other rows are carried over, and pivots and aggregates run on the whole month
+    hashes = row_hashes(df)
+    rows = df.index.to_numpy() + ROW_OFFSET
+    schema = sheet_schema(df)
+    previous = disk_cache.get('row_state', state_key)
+    if previous and previous.get('schema') != schema:
+        logging.info("Columns or their types changed since the last upload; re-checking every row.")
+        previous = None
+    previous_rows = match_rows(previous['hashes'], previous['rows'], hashes) if previous else np.full(len(df), -1)
+    unchanged = previous_rows >= 0
+    previous_findings = previous['findings'] if previous else {}
+    # Findings without row numbers cannot be split by row, so such a module is always re-checked in full
+    reusable = previous_findings if all(has_rows(result) for result in previous_findings.values()) else {}
+
+    changed_df = df[~unchanged] if reusable else df
+    fresh = collect_findings(module, changed_df, extra_args, wrap_stage) if len(changed_df) or not reusable else {}
+    findings = dict(fresh)
+    for stage, result in reusable.items():
+        kept = remap_result(result, previous_rows[unchanged], rows[unchanged])
+        # Empty parts are left out so they cannot turn the merged columns into object
+        parts = [part for part in (kept, fresh.get(stage)) if part is not None and len(part)]
+        findings[stage] = sort_result(combine_results(parts) if len(parts) > 1 else (parts or [kept])[0])
+    if reusable:
+        logging.info(f"Re-checked {len(changed_df)} of {len(df)} rows; findings of the other rows were reused.")
+
+    display_args = capture_display(module, df, extra_args, wrap_stage,
+                                   {stage: (lambda result: lambda *args, **kwargs: result)(result) for stage, result in findings.items()})
+    disk_cache.set('row_state', state_key, {'schema': schema, 'hashes': hashes, 'rows': rows, 'findings': findings})
+    return display_args
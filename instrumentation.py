@@ -0,0 +1,163 @@
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+import streamlit as st
+from validation_engine import MismatchStore
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Timing records are emitted as one JSON object per line on their own logger so they can be filtered and parsed
+timing_logger = logging.getLogger('mis.timings')
+
+MEASURE_COLUMNS = ['seconds', 'allocated_bytes', 'peak_bytes', 'result_bytes']
+
+# Peak memory of the stages currently running on this thread, outermost first
+memory_frames = threading.local()
+
+# Timing lists of the runs that asked for memory figures; tracemalloc runs while any of them is active, and
+# stages timed into any other list record no memory
+memory_sessions = set()
+memory_sessions_lock = threading.Lock()
+# tracemalloc's peak is process-wide and reset by every frame, so memory-tracked stages run one at a time.
+# Stages never wait on other jobs, so a worker holding this lock always finishes.
+memory_lock = threading.RLock()
+
+def start_memory_tracking(timings):
+    with memory_sessions_lock:
+        memory_sessions.add(id(timings))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+def stop_memory_tracking(timings):
+    with memory_sessions_lock:
+        memory_sessions.discard(id(timings))
+        if not memory_sessions and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def tracks_memory(timings):
+    return id(timings) in memory_sessions and tracemalloc.is_tracing()
+
+def enter_memory_frame():
+    frames = memory_frames.__dict__.setdefault('stack', [])
+    current, peak = tracemalloc.get_traced_memory()
+    if frames:
+        frames[-1]['peak'] = max(frames[-1]['peak'], peak)
+    frames.append({'start': current, 'peak': current})
+    tracemalloc.reset_peak()
+
+def exit_memory_frame(record):
+    frames = memory_frames.stack
+    frame = frames.pop()
+    # Tracing stopped mid-stage: the frame is dropped without figures so the stack does not grow
+    if not tracemalloc.is_tracing():
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    peak = max(frame['peak'], peak)
+    # Bytes still held when the stage returns, and the most it held above its starting point
+    record['allocated_bytes'] = current - frame['start']
+    record['peak_bytes'] = peak - frame['start']
+    # The enclosing stage keeps the highest peak seen inside it
+    if frames:
+        frames[-1]['peak'] = max(frames[-1]['peak'], peak)
+    tracemalloc.reset_peak()
+
+def result_bytes(result):
+    # Deep size of a stage result: frames report their own usage, lists of findings are walked
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return int(result.memory_usage(deep=True).sum()) if isinstance(result, pd.DataFrame) else int(result.memory_usage(deep=True))
+    if isinstance(result, MismatchStore):
+        return result.nbytes
+    if isinstance(result, (list, tuple)):
+        return sys.getsizeof(result) + sum(result_bytes(item) for item in result)
+    if isinstance(result, dict):
+        return sys.getsizeof(result) + sum(result_bytes(value) for value in result.values())
+    return sys.getsizeof(result)
+
+@contextmanager
+def stage_timer(timings, stage, **context):
+    record = {'stage': stage, **context}
+    tracking_memory = tracks_memory(timings)
+    if tracking_memory:
+        memory_lock.acquire()
+        enter_memory_frame()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = round(time.perf_counter() - start, 6)
+        if tracking_memory:
+            exit_memory_frame(record)
+            memory_lock.release()
+        timings.append(record)
+        timing_logger.info(json.dumps(record, default=str))
+
+def timed_function(timings, stage, function, **context):
+    def timed_call(*args, **kwargs):
+        with stage_timer(timings, stage, **context) as record:
+            result = function(*args, **kwargs)
+            if tracks_memory(timings):
+                record['result_bytes'] = result_bytes(result)
+            return result
+    return timed_call
+
+def stage_wrapper(timings, **context):
+    # wrap_stage callback for logic_runner.run_business_logic: every pivot_/find_/calculate_/display_ call is timed
+    return lambda stage, function: timed_function(timings, stage, function, **context)
+
+def timings_frame(timings):
+    # One row per stage: calls and total seconds, plus the largest memory figures when memory was tracked
+    timings_df = pd.DataFrame(timings)
+    if timings_df.empty:
+        return timings_df
+    measures = [column for column in MEASURE_COLUMNS if column in timings_df.columns]
+    keys = [column for column in timings_df.columns if column not in MEASURE_COLUMNS and column != 'stage'] + ['stage']
+    aggregations = {column: 'max' for column in measures}
+    aggregations['seconds'] = 'sum'
+    grouped = timings_df.groupby(keys, sort=False, dropna=False)
+    summary_df = grouped.agg(aggregations)
+    summary_df.insert(0, 'calls', grouped.size())
+    return summary_df.reset_index()
+
+def display_timings(timings):
+    if not st.sidebar.checkbox("Show stage timings"):
+        return
+    timings_df = timings_frame(timings)
+    if timings_df.empty:
+        st.sidebar.write("No stages timed yet.")
+        return
+    st.sidebar.write(f"Total: {timings_df['seconds'].sum():.3f}s")
+    if 'peak_bytes' in timings_df.columns:
+        # Other sessions' stages keep allocating while a tracked stage runs, so the figures are an upper bound
+        st.sidebar.write(f"Peak: {timings_df['peak_bytes'].max() / 2**20:.1f} MiB (approximate, includes other sessions' allocations)")
+    st.sidebar.dataframe(timings_df)
+
+def profile_call(function, *args, **kwargs):
+    # Deterministic profile of one call; the dynamically imported business logic code is attributed to its own file
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+    profiler.create_stats()
+    return result, profiler
+
+def profile_stats_bytes(profiler):
+    # Same format as cProfile's dump_stats, so the download opens in snakeviz, flameprof or pstats
+    return marshal.dumps(profiler.stats)
+
+def profile_summary(profiler, limit=30, sort_by='cumulative'):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort_by).print_stats(limit)
+    return stream.getvalue()
+
+def display_profile(profiler, file_name):
+    st.sidebar.download_button("Download profile", profile_stats_bytes(profiler), file_name=file_name)
+    with st.sidebar.expander("Profile summary"):
+        st.text(profile_summary(profiler))
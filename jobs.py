@@ -0,0 +1,180 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError
+from itertools import chain
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from validation_engine import ROW_OFFSET, MismatchStore, to_pandas
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# find_ stages are row-local, so they can run over row chunks with a cancellation check between chunks
+CHUNK_ROWS = 20000
+CHUNKED_PREFIX = 'find_'
+POLL_SECONDS = 0.2
+# Parse and validation work is CPU-bound, so by default there is one worker per core
+SCHEDULER_WORKERS = int(os.environ.get('MIS_SCHEDULER_WORKERS', os.cpu_count() or 4))
+FOREGROUND = 'foreground'
+BACKGROUND = 'background'
+
+class JobCancelled(Exception):
+    pass
+
+class CancellationToken:
+    def __init__(self):
+        self.event = threading.Event()
+        self.status = ''
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def cancel(self):
+        self.event.set()
+
+    def raise_if_cancelled(self):
+        if self.event.is_set():
+            raise JobCancelled(self.status)
+
+class JobScheduler:
+    # One bounded pool for the parse and validation jobs of every session. Each session has its own queue and
+    # sessions are served round-robin, so a user with many queued jobs cannot starve the others; background
+    # jobs (month precomputes) only run while no foreground job is waiting.
+
+    def __init__(self, workers=SCHEDULER_WORKERS):
+        self.workers = workers
+        self.condition = threading.Condition()
+        self.queues = {FOREGROUND: OrderedDict(), BACKGROUND: OrderedDict()}
+        self.threads = []
+
+    def submit(self, session_id, function, *args, background=False, **kwargs):
+        future = Future()
+        with self.condition:
+            self.queues[BACKGROUND if background else FOREGROUND].setdefault(session_id, deque()).append((future, function, args, kwargs))
+            while len(self.threads) < self.workers:
+                thread = threading.Thread(target=self.work, name=f'scheduler-{len(self.threads)}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            self.condition.notify()
+        return future
+
+    def next_job(self):
+        # Called with the lock held: take the head of the first session's queue and move that session to the back
+        for priority in (FOREGROUND, BACKGROUND):
+            queues = self.queues[priority]
+            if queues:
+                session_id, session_jobs = queues.popitem(last=False)
+                job = session_jobs.popleft()
+                if session_jobs:
+                    queues[session_id] = session_jobs
+                return job
+        return None
+
+    def work(self):
+        while True:
+            with self.condition:
+                job = self.next_job()
+                while job is None:
+                    self.condition.wait()
+                    job = self.next_job()
+            future, function, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def queue_position(self, future):
+        # 1-based place in dispatch order, or None once the job has started
+        with self.condition:
+            position = 0
+            for priority in (FOREGROUND, BACKGROUND):
+                lanes = [list(session_jobs) for session_jobs in self.queues[priority].values()]
+                for depth in range(max(map(len, lanes), default=0)):
+                    for lane in lanes:
+                        if depth < len(lane):
+                            position += 1
+                            if lane[depth][0] is future:
+                                return position
+        return None
+
+scheduler = JobScheduler()
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'default'
+
+def is_row_indexed(df):
+    # Issue frames built straight from the sheet keep its row index; others (e.g. the Karbon ledger) are renumbered
+    return 'Row' in df.columns and (df.index + ROW_OFFSET == df['Row']).all()
+
+def combine_results(parts):
+    if isinstance(parts[0], MismatchStore):
+        combined = MismatchStore()
+        for part in parts:
+            combined.extend_store(part)
+        return combined
+    if isinstance(parts[0], pd.DataFrame):
+        return pd.concat(parts, ignore_index=not all(is_row_indexed(part) for part in parts))
+    return list(chain.from_iterable(parts))
+
+def cancellable_stage(token, stage, function, chunk_rows=CHUNK_ROWS):
+    def run(df, *args, **kwargs):
+        token.raise_if_cancelled()
+        if not stage.startswith(CHUNKED_PREFIX) or len(df) <= chunk_rows:
+            token.status = stage
+            return function(df, *args, **kwargs)
+        df = to_pandas(df)
+        parts = []
+        for start in range(0, len(df), chunk_rows):
+            token.raise_if_cancelled()
+            token.status = f"{stage} ({start // chunk_rows + 1}/{-(-len(df) // chunk_rows)})"
+            parts.append(function(df.iloc[start:start + chunk_rows], *args, **kwargs))
+        return combine_results(parts)
+    return run
+
+def cancellable_wrapper(token, wrap_stage=None):
+    # wrap_stage callback that checks the token before every stage and between chunks of find_ stages,
+    # around whatever wrap_stage (e.g. timing) is already applied
+    def wrap(stage, function):
+        if wrap_stage is not None:
+            function = wrap_stage(stage, function)
+        return cancellable_stage(token, stage, function)
+    return wrap
+
+def session_job(name, selection):
+    # Each session keeps one job per kind; picking a different selection cancels the job started for the
+    # old one, while a rerun with the same selection keeps waiting on the job already running
+    job = st.session_state.get(name)
+    failed = job is not None and job['future'] is not None and job['future'].done() and job['future'].exception() is not None
+    if job is not None and job['selection'] == selection and not job['token'].cancelled and not failed:
+        return job
+    if job is not None:
+        job['token'].cancel()
+        if job['future'] is not None:
+            job['future'].cancel()
+    job = {'selection': selection, 'token': CancellationToken(), 'future': None}
+    st.session_state[name] = job
+    return job
+
+def wait_for_job(future, token=None, message="Validating"):
+    # Updating the placeholder hands control back to Streamlit, which stops this script run when the
+    # user changes a widget; the job is left running for the next run to pick up or cancel
+    status = st.empty()
+    try:
+        while True:
+            try:
+                return future.result(timeout=POLL_SECONDS)
+            except TimeoutError:
+                position = scheduler.queue_position(future)
+                if position is not None:
+                    status.caption(f"{message}: waiting in queue, position {position}")
+                else:
+                    status.caption(f"{message}... {token.status if token is not None else ''}")
+    finally:
+        status.empty()
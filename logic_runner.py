@@ -0,0 +1,64 @@
+import copy
+import importlib
+import importlib.util
+import logging
+import types
+from client_rules import CLIENT_RULES
+from validation_engine import MismatchStore
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Functions of a business logic module that make up its pipeline stages
+STAGE_PREFIXES = ('pivot_', 'find_', 'calculate_', 'display_')
+
+def load_business_logic(module_name):
+    # Clients defined only by declarative rules share the standard template
+    if importlib.util.find_spec(module_name) is None and module_name in CLIENT_RULES:
+        return importlib.import_module('rule_based_logic'), (module_name,)
+    return importlib.import_module(module_name), ()
+
+def stage_functions(module):
+    return {
+        name: value for name, value in vars(module).items()
+        if name.startswith(STAGE_PREFIXES) and isinstance(value, types.FunctionType) and value.__module__ == module.__name__
+    }
+
+def run_business_logic(module, df, extra_args=(), wrap_stage=None, overrides=None):
+    # Runs the module's entry function against a private copy of its globals, so stages can be wrapped or
+    # replaced for this call without touching the module other sessions are using
+    entry = getattr(module, module.__name__)
+    entry_globals = dict(vars(module))
+    if wrap_stage is not None:
+        entry_globals.update({name: wrap_stage(name, function) for name, function in stage_functions(module).items()})
+    entry_globals.update(overrides or {})
+    rebound_entry = types.FunctionType(entry.__code__, entry_globals, entry.__name__, entry.__defaults__, entry.__closure__)
+    return rebound_entry(df, *extra_args)
+
+def is_interactive(module):
+    # Entry functions that read widgets themselves (e.g. a site selectbox) depend on more than the sheet and month
+    return 'st' in getattr(module, module.__name__).__code__.co_names
+
+def capture_display(module, df, extra_args=(), wrap_stage=None, overrides=None):
+    # Runs every stage except display_dataframes and returns the arguments it would have been called with,
+    # so the results can be computed off the script thread and rendered later
+    captured = {}
+
+    def capture(*args, **kwargs):
+        captured['args'], captured['kwargs'] = args, kwargs
+
+    run_business_logic(module, df, extra_args, wrap_stage, overrides={**(overrides or {}), 'display_dataframes': capture})
+    args, kwargs = captured.get('args', ()), captured.get('kwargs', {})
+    # The arguments are cached and shared between sessions from here on, so stores give up their spare capacity
+    for arg in [*args, *kwargs.values()]:
+        if isinstance(arg, MismatchStore):
+            arg.trim()
+    return args, kwargs
+
+def replay_display(module, display_args, wrap_stage=None):
+    args, kwargs = display_args
+    display_dataframes = module.display_dataframes
+    if wrap_stage is not None:
+        display_dataframes = wrap_stage('display_dataframes', display_dataframes)
+    # format_dataframe rewrites frames in place, so every render works on its own copies
+    display_dataframes(*[copy.copy(arg) for arg in args], **{name: copy.copy(arg) for name, arg in kwargs.items()})
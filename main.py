@@ -1,9 +1,22 @@
-import dask.dataframe as dd
+import hashlib
+import io
+import zipfile
 import pandas as pd
 import logging
 import streamlit as st
-import importlib
-from concurrent.futures import ThreadPoolExecutor
+from logic_runner import load_business_logic, run_business_logic, is_interactive, capture_display, replay_display
+from result_cache import get_result, submit_precompute
+from parse_cache import parse_cache
+from disk_cache import disk_cache
+from incremental import incremental_validate, collect_findings
+from upload_diff import diff_uploads, display_upload_diff
+from formula_check import check_formulas, display_formula_issues
+from annotated_export import write_annotated_workbook
+from validation_engine import ROW_OFFSET
+from streaming import STREAMING_ROWS, sheet_row_count, iter_sheet_chunks, stream_validate
+from jobs import scheduler, current_session_id, cancellable_wrapper, session_job, wait_for_job
+from instrumentation import (timed_function, stage_wrapper, display_timings, profile_call, display_profile,
+                             start_memory_tracking, stop_memory_tracking)
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -21,8 +34,8 @@ def read_excel_file(uploaded_file):
 
 def load_sheet_data(excel_file, selected_sheet):
     try:
-        # Read the selected sheet into a Dask dataframe
-        df = dd.read_excel(excel_file, sheet_name=selected_sheet, header=1, engine='openpyxl')
+        # Read the selected sheet into a pandas dataframe; parsed sheets are shared between sessions by parse_cache
+        df = pd.read_excel(excel_file, sheet_name=selected_sheet, header=1, engine='openpyxl')
         logging.info(f"Sheet '{selected_sheet}' loaded successfully.")
         return df
     except Exception as e:
@@ -36,7 +49,7 @@ def process_data(df):
         df.columns = df.columns.str.lower().str.strip()
         columns_to_convert = df.columns.difference(['date'])
         df[columns_to_convert] = df[columns_to_convert].apply(
-            lambda col: col.str.lower().str.strip() if col.dtype == 'object' else col
+            lambda col: col.str.lower().str.strip() if col.dtype == 'object' or isinstance(col.dtype, pd.StringDtype) else col
         )
         logging.info("Columns converted to lower case successfully.")
         return df
@@ -55,87 +68,89 @@ def filter_by_month(df, month):
         st.error(f"Error filtering data by month: {e}")
         return None
 
-def apply_business_logic(df_filtered, selected_sheet):
-    business_logic_sheets = {
-        # Define the business logic sheets here...
-    
+BUSINESS_LOGIC_SHEETS = {
+    # Define the business logic sheets here...
+
+
+    "business_logic_1": ["Postman"],
+    "business_logic_2": ["Pratilipi"],
+    "business_logic_3": ["Quzizz","Synergy","Amadeus","Awfis"],
+    "business_logic_4": ["Medtrix","Odessa","MG Eli Lilly","Scaler-Prequin"],
+    "business_logic_5": ["Gojek","Microchip Main Meal"],
+    "business_logic_6": ["HD Works"],
+    "business_logic_7": ["MPL"],
+    "business_logic_8": ["Tonbo","Tadano Escorts","Siemens - Tuckshop","Dynasty","Citrix Driver's Lunch & Dinner","sharefile"],
+    "business_logic_9": ["Rippling","Tessolve"],
+    "business_logic_10": ["MPL -  Infinity Plates","Tekion.","Groww Koramangala","Groww VTP","MIQ","Groww Mumbai","Ather Mumbai","Epam"],
+    "business_logic_11": ["Telstra MainMeal(Cash & Carry)"],
+    "business_logic_12": ["Eli Lilly Wallet", "Sheet1"], # get this clarified
+    "business_logic_13": ["Sinch","O9 Solutions"],
+    "business_logic_14": ["RAKUTEN-2","Clario"],
+    "business_logic_15": ["Waters Main Meal"], # used BL6 and might be same for seminens
+    "business_logic_16": ["Quest Company Paid"],
+    "business_logic_17": ["Waters Tuck Shop"],
+    "business_logic_18": ["H&M"],
+    "business_logic_19": ["Lam Research","Corning","PhonePe"],
+    "business_logic_20": ["Micochip Juice Junction"],
+    "business_logic_21": ["Ather BLR"],
+    "business_logic_22": ["Ather Plant 1.","Ather Plant 2.","SAEL Delhi","Gojek."],  #gojek is ncr
+    "business_logic_23": ["STRIPE MIS","TEA-Breakfast"],
+    "business_logic_24": ["FRUIT N JUICE MIS"],
+    "business_logic_25": ["Siemens","Toasttab","Gartner"],
+    "business_logic_26": ["DTCC Wallet"],
+    "business_logic_27": ["Siemens_Pune"],
+    "business_logic_28": ["CSG-Pune"],
+    "business_logic_29": ["Salesforce-GGN"],
+    "business_logic_30": ["Salesforce - Jaipur"],
+    "business_logic_31": ["Ather - Main Meal"],
+    "business_logic_32": ["Siemens."], # NCR
+    "business_logic_33": ["Postman.","Citrix-Tuckshop"],
+    "business_logic_34": ["Sinch Lunch"],
+    "business_logic_35": ["Sinch Dinner"],
+    "business_logic_36": ["STRYKER MIS - '2024"],
+    "business_logic_37": ["EGL"],
+    "business_logic_38": ["Truecaller"],
+    "business_logic_39": ["Sharefile Wallet"],
+    "business_logic_40": ["Gold Hill-Main Meal","Goldhill Juice Junction.","Healthineer International","Priteck - Main meal","Pritech park Juice junction"],
+    "business_logic_41": ["Siemens-BLR","Siemens Juice Counter"],
+    "business_logic_42": ["Heathineer Factory"],
+    "business_logic_43": ["Airtel Center","Airtel  Plot 5","Airtel NOC Non veg","Airtel international"],
+    "business_logic_44": ["Tekion"],
+    "business_logic_45": ["HD Works(HYD)"],
+    "business_logic_46": ["Airtel Noida"],
+    "business_logic_47": ["Airtel NOC"],
+    "business_logic_48": ["Airtel-Jaya"],
+
+
+    "event_logic_1": ["Telstra Event.","Telstra Event","Events"],
+    "event_logic_2": ["Eli Lilly Event"],
+    "event_logic_3": ["Waters Event"],
+    "event_logic_4": ["Icon-event-Bangalore","Sinch Event sheet","infosys Event+ Additional Sales","Other Events.","Telstra Event sheet","MPL-Delhi"],
+    "event_logic_5": ["Other Events"],
+    "event_logic_6": ["Lam Research Event"],
+    "event_logic_7": ["ICON CHN EVENT"],
+    "event_logic_8": ["other Event MIS"],
+    "event_logic_9": ["Amazon  PNQ Events -"],
 
-            "business_logic_1": ["Postman"],
-            "business_logic_2": ["Pratilipi"],
-            "business_logic_3": ["Quzizz","Synergy","Amadeus","Awfis"],
-            "business_logic_4": ["Medtrix","Odessa","MG Eli Lilly","Scaler-Prequin"],
-            "business_logic_5": ["Gojek","Microchip Main Meal"],
-            "business_logic_6": ["HD Works"],
-            "business_logic_7": ["MPL"],
-            "business_logic_8": ["Tonbo","Tadano Escorts","Siemens - Tuckshop","Dynasty","Citrix Driver's Lunch & Dinner","sharefile"],
-            "business_logic_9": ["Rippling","Tessolve"],
-            "business_logic_10": ["MPL -  Infinity Plates","Tekion.","Groww Koramangala","Groww VTP","MIQ","Groww Mumbai","Ather Mumbai","Epam"],
-            "business_logic_11": ["Telstra MainMeal(Cash & Carry)"],
-            "business_logic_12": ["Eli Lilly Wallet", "Sheet1"], # get this clarified
-            "business_logic_13": ["Sinch","O9 Solutions"],
-            "business_logic_14": ["RAKUTEN-2","Clario"],
-            "business_logic_15": ["Waters Main Meal"], # used BL6 and might be same for seminens
-            "business_logic_16": ["Quest Company Paid"],
-            "business_logic_17": ["Waters Tuck Shop"],
-            "business_logic_18": ["H&M"],
-            "business_logic_19": ["Lam Research","Corning","PhonePe"],
-            "business_logic_20": ["Micochip Juice Junction"],
-            "business_logic_21": ["Ather BLR"],
-            "business_logic_22": ["Ather Plant 1.","Ather Plant 2.","SAEL Delhi","Gojek."],  #gojek is ncr
-            "business_logic_23": ["STRIPE MIS","TEA-Breakfast"],
-            "business_logic_24": ["FRUIT N JUICE MIS"],
-            "business_logic_25": ["Siemens","Toasttab","Gartner"],
-            "business_logic_26": ["DTCC Wallet"],
-            "business_logic_27": ["Siemens_Pune"],
-            "business_logic_28": ["CSG-Pune"],
-            "business_logic_29": ["Salesforce-GGN"],
-            "business_logic_30": ["Salesforce - Jaipur"],
-            "business_logic_31": ["Ather - Main Meal"],
-            "business_logic_32": ["Siemens."], # NCR
-            "business_logic_33": ["Postman.","Citrix-Tuckshop"],
-            "business_logic_34": ["Sinch Lunch"],
-            "business_logic_35": ["Sinch Dinner"],
-            "business_logic_36": ["STRYKER MIS - '2024"],
-            "business_logic_37": ["EGL"],
-            "business_logic_38": ["Truecaller"],
-            "business_logic_39": ["Sharefile Wallet"],
-            "business_logic_40": ["Gold Hill-Main Meal","Goldhill Juice Junction.","Healthineer International","Priteck - Main meal","Pritech park Juice junction"],
-            "business_logic_41": ["Siemens-BLR","Siemens Juice Counter"],
-            "business_logic_42": ["Heathineer Factory"],
-            "business_logic_43": ["Airtel Center","Airtel  Plot 5","Airtel NOC Non veg","Airtel international"],
-            "business_logic_44": ["Tekion"],
-            "business_logic_45": ["HD Works(HYD)"],
-            "business_logic_46": ["Airtel Noida"],
-            "business_logic_47": ["Airtel NOC"],
-            "business_logic_48": ["Airtel-Jaya"],
-
-
-            "event_logic_1": ["Telstra Event.","Telstra Event","Events"],
-            "event_logic_2": ["Eli Lilly Event"],
-            "event_logic_3": ["Waters Event"],
-            "event_logic_4": ["Icon-event-Bangalore","Sinch Event sheet","infosys Event+ Additional Sales","Other Events.","Telstra Event sheet","MPL-Delhi"],
-            "event_logic_5": ["Other Events"],
-            "event_logic_6": ["Lam Research Event"],
-            "event_logic_7": ["ICON CHN EVENT"],
-            "event_logic_8": ["other Event MIS"],
-            "event_logic_9": ["Amazon  PNQ Events -"],
-
-
-            "other_revenues": [""]
-            # Add more mappings as needed
-    }
-
-    business_logic_module = None
-    for module_name, sheets in business_logic_sheets.items():
+
+    "other_revenues": [""]
+    # Add more mappings as needed
+}
+
+def find_business_logic_module(selected_sheet):
+    for module_name, sheets in BUSINESS_LOGIC_SHEETS.items():
         if selected_sheet in sheets:
-            business_logic_module = module_name
-            break
+            return module_name
+    return None
+
+def apply_business_logic(df_filtered, selected_sheet, timings=None):
+    business_logic_module = find_business_logic_module(selected_sheet)
 
     if business_logic_module:
         try:
-            module = importlib.import_module(business_logic_module)
-            business_logic_function = getattr(module, business_logic_module)
-            business_logic_function(df_filtered)
+            module, extra_args = load_business_logic(business_logic_module)
+            wrap_stage = stage_wrapper(timings, sheet=selected_sheet, module=business_logic_module) if timings is not None else None
+            run_business_logic(module, df_filtered, extra_args, wrap_stage)
             logging.info(f"Business logic '{business_logic_module}' applied successfully.")
         except Exception as e:
             logging.error(f"Error applying business logic: {e}")
@@ -144,43 +159,272 @@ def apply_business_logic(df_filtered, selected_sheet):
         st.write("No business logic defined for this sheet.")
         logging.warning("No business logic defined for the selected sheet.")
 
-def main():
-    st.set_page_config(page_title="Monthly MIS Checker", layout="wide")
-    st.title("MIS Reviewer :chart_with_upwards_trend:")
-    
-    uploaded_file = st.sidebar.file_uploader('Upload Excel file', type=['xlsx', 'xls'])
+def read_sheet_names(file_bytes, timings):
+    excel_file = timed_function(timings, 'read_excel_file', read_excel_file)(io.BytesIO(file_bytes))
+    return excel_file.sheet_names if excel_file else None
+
+def parse_sheet(file_bytes, selected_sheet, timings):
+    # Read, load and normalise one sheet; the result is shared between sessions through the parse cache
+    excel_file = timed_function(timings, 'read_excel_file', read_excel_file)(io.BytesIO(file_bytes))
+    if excel_file is None:
+        return None
+    df = timed_function(timings, 'load_sheet_data', load_sheet_data, sheet=selected_sheet)(excel_file, selected_sheet)
+    if df is None:
+        return None
+    return timed_function(timings, 'process_data', process_data, sheet=selected_sheet)(df)
+
+def validate_month(df, month, selected_sheet, timings, token=None, incremental=True):
+    # Everything up to rendering for one month; the result is the display arguments, so it can be cached and
+    # shared with other server processes
+    business_logic_module = find_business_logic_module(selected_sheet)
+    if token is not None:
+        token.raise_if_cancelled()
+    df_filtered = timed_function(timings, 'filter_by_month', filter_by_month, sheet=selected_sheet)(df, month)
+    if df_filtered is None:
+        return None
+    module, extra_args = load_business_logic(business_logic_module)
+    wrap_stage = stage_wrapper(timings, sheet=selected_sheet, module=business_logic_module, month=month)
+    if token is not None:
+        wrap_stage = cancellable_wrapper(token, wrap_stage)
+    if incremental and not is_interactive(module):
+        # Re-uploads after a few fixed cells only re-check the rows that changed
+        return incremental_validate(module, df_filtered, (business_logic_module, selected_sheet, month), extra_args, wrap_stage)
+    return capture_display(module, df_filtered, extra_args, wrap_stage)
+
+def review_month(df, month, selected_sheet, upload_key, timings, use_cache=True):
+    business_logic_module = find_business_logic_module(selected_sheet)
+
+    if business_logic_module:
+        try:
+            module, _ = load_business_logic(business_logic_module)
+            if use_cache and not is_interactive(module):
+                # The run is a job tied to this session's selection, so picking another sheet or month stops it
+                job = session_job('validation_job', (upload_key, selected_sheet, month))
+                if job['future'] is None:
+                    job['future'] = scheduler.submit(current_session_id(), get_result, (upload_key, selected_sheet, month), validate_month,
+                                                     df, month, selected_sheet, timings, job['token'])
+                display_args = wait_for_job(job['future'], job['token'])
+            else:
+                display_args = validate_month(df, month, selected_sheet, timings, incremental=use_cache)
+            if display_args is None:
+                st.error("Error filtering data by month.")
+                return
+            replay_display(module, display_args, stage_wrapper(timings, sheet=selected_sheet, module=business_logic_module, month=month))
+            logging.info(f"Business logic '{business_logic_module}' applied successfully.")
+        except Exception as e:
+            logging.error(f"Error applying business logic: {e}")
+            st.error(f"Error applying business logic: {e}")
+    else:
+        st.write("No business logic defined for this sheet.")
+        logging.warning("No business logic defined for the selected sheet.")
+
+def precompute_months(df, months, selected_sheet, upload_key):
+    # Users step through the months one after another, so the rest of the sheet is validated in the
+    # background as soon as the first month is on screen
+    business_logic_module = find_business_logic_module(selected_sheet)
+    if not business_logic_module or is_interactive(load_business_logic(business_logic_module)[0]):
+        return
+    token = session_job('precompute_job', (upload_key, selected_sheet))['token']
+    for month in months:
+        submit_precompute(current_session_id(), (upload_key, selected_sheet, month), validate_month, df, month, selected_sheet, [], token)
+
+def review_upload_diff(previous_bytes, df, month, selected_sheet, timings):
+    # Row and finding changes between an earlier version of the workbook and the current one, for this month
+    session_id = current_session_id()
+    previous_key = hashlib.sha256(previous_bytes).hexdigest()
+    future_lease = scheduler.submit(session_id, parse_cache.acquire, (previous_key, selected_sheet),
+                                    lambda: parse_sheet(previous_bytes, selected_sheet, timings))
+    lease = wait_for_job(future_lease, message="Loading the earlier upload")
+    st.session_state['previous_sheet'] = lease
+    if lease is None or 'month' not in lease.value.columns:
+        st.error(f"The earlier upload has no usable '{selected_sheet}' sheet to compare with.")
+        return
+    try:
+        business_logic_module = find_business_logic_module(selected_sheet)
+        module, extra_args = load_business_logic(business_logic_module) if business_logic_module else (None, ())
+        previous_df = filter_by_month(lease.value, month)
+        current_df = filter_by_month(df, month)
+        future_diff = scheduler.submit(session_id, timed_function(timings, 'upload_diff', diff_uploads, sheet=selected_sheet),
+                                       previous_df, current_df, module, extra_args)
+        display_upload_diff(wait_for_job(future_diff, message="Comparing the uploads"))
+    except Exception as e:
+        logging.error(f"Error comparing the uploads: {e}")
+        st.error(f"Error comparing the uploads: {e}")
+
+def is_xlsx(file_bytes):
+    # Stored formulas are read from, and annotations written into, the workbook's XML parts; legacy .xls files
+    # are not zip packages and have none
+    return zipfile.is_zipfile(io.BytesIO(file_bytes))
+
+def review_formulas(file_bytes, df, month, selected_sheet, upload_key, timings):
+    # Rows of this month whose stored formula strays from its column's template; complements find_mismatches
+    try:
+        future_issues = scheduler.submit(current_session_id(), disk_cache.get_or_compute, 'formula_checks', (upload_key, selected_sheet),
+                                         lambda: timed_function(timings, 'check_formulas', check_formulas, sheet=selected_sheet)(io.BytesIO(file_bytes), selected_sheet))
+        formula_issues_df = wait_for_job(future_issues, message="Reading the stored formulas")
+        month_rows = filter_by_month(df, month).index + ROW_OFFSET
+        display_formula_issues(formula_issues_df[formula_issues_df['Row'].isin(month_rows)].reset_index(drop=True))
+    except Exception as e:
+        logging.error(f"Error checking the stored formulas: {e}")
+        st.error(f"Error checking the stored formulas: {e}")
+
+def annotated_workbook(file_bytes, df, month, selected_sheet, module, extra_args):
+    findings = collect_findings(module, filter_by_month(df, month), extra_args)
+    output = io.BytesIO()
+    write_annotated_workbook(io.BytesIO(file_bytes), selected_sheet, list(df.columns), findings, output)
+    return output.getvalue()
+
+def export_month(file_bytes, df, month, selected_sheet, upload_key, timings):
+    # The upload with this month's findings highlighted and the expected values in cell notes
+    try:
+        module, extra_args = load_business_logic(find_business_logic_module(selected_sheet))
+        future_export = scheduler.submit(current_session_id(), disk_cache.get_or_compute, 'annotated_exports', (upload_key, selected_sheet, month),
+                                         lambda: timed_function(timings, 'annotated_export', annotated_workbook, sheet=selected_sheet)(
+                                             file_bytes, df, month, selected_sheet, module, extra_args))
+        export_bytes = wait_for_job(future_export, message="Annotating the workbook")
+        st.sidebar.download_button("Download annotated workbook", export_bytes, file_name=f"{selected_sheet}_{month}_annotated.xlsx",
+                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    except Exception as e:
+        logging.error(f"Error exporting the annotated workbook: {e}")
+        st.error(f"Error exporting the annotated workbook: {e}")
+
+def should_stream(file_bytes, selected_sheet, upload_key):
+    # Interactive modules filter the month themselves, so they always get the whole sheet
+    business_logic_module = find_business_logic_module(selected_sheet)
+    if not business_logic_module or is_interactive(load_business_logic(business_logic_module)[0]):
+        return False
+    row_count = disk_cache.get_or_compute('row_counts', (upload_key, selected_sheet),
+                                          lambda: sheet_row_count(io.BytesIO(file_bytes), selected_sheet))
+    return row_count is not None and row_count > STREAMING_ROWS
+
+def sheet_chunks(file_bytes, selected_sheet):
+    for chunk_df in iter_sheet_chunks(io.BytesIO(file_bytes), selected_sheet):
+        chunk_df = process_data(chunk_df)
+        if chunk_df is None:
+            raise ValueError(f"Error processing the sheet '{selected_sheet}'.")
+        yield chunk_df
+
+def sheet_months(file_bytes, selected_sheet):
+    months = {}
+    for chunk_df in sheet_chunks(file_bytes, selected_sheet):
+        if 'month' not in chunk_df.columns:
+            return None
+        months.update(dict.fromkeys(chunk_df['month'].dropna().unique()))
+    return list(months)
+
+def stream_month(file_bytes, month, selected_sheet, timings, token=None):
+    # validate_month for sheets too long to load whole: the month's rows are validated chunk by chunk as
+    # they are read from the workbook
+    business_logic_module = find_business_logic_module(selected_sheet)
+    module, extra_args = load_business_logic(business_logic_module)
+    wrap_stage = stage_wrapper(timings, sheet=selected_sheet, module=business_logic_module, month=month)
+    if token is not None:
+        wrap_stage = cancellable_wrapper(token, wrap_stage)
+    month_chunks = (chunk_df[chunk_df['month'] == month] for chunk_df in sheet_chunks(file_bytes, selected_sheet))
+    return stream_validate(module, month_chunks, extra_args, wrap_stage)
+
+def review_streamed_sheet(file_bytes, selected_sheet, upload_key, timings):
+    # Every month is a full pass over the workbook, so months are validated on request only, never precomputed
+    business_logic_module = find_business_logic_module(selected_sheet)
+    session_id = current_session_id()
+    future_months = scheduler.submit(session_id, disk_cache.get_or_compute, 'months', (upload_key, selected_sheet),
+                                     lambda: sheet_months(file_bytes, selected_sheet))
+    months = wait_for_job(future_months, message="Reading the months")
+    if not months:
+        st.write("No 'month' column found in this sheet.")
+        logging.warning("No 'month' column found in the sheet.")
+        return
+    month = st.sidebar.selectbox("Select the month for review", months)
+
+    try:
+        job = session_job('validation_job', (upload_key, selected_sheet, month))
+        if job['future'] is None:
+            job['future'] = scheduler.submit(session_id, get_result, (upload_key, selected_sheet, month), stream_month,
+                                             file_bytes, month, selected_sheet, timings, job['token'])
+        display_args = wait_for_job(job['future'], job['token'])
+        if display_args is None:
+            st.error("Error filtering data by month.")
+            return
+        module, _ = load_business_logic(business_logic_module)
+        replay_display(module, display_args, stage_wrapper(timings, sheet=selected_sheet, module=business_logic_module, month=month))
+        logging.info(f"Business logic '{business_logic_module}' applied successfully.")
+    except Exception as e:
+        logging.error(f"Error applying business logic: {e}")
+        st.error(f"Error applying business logic: {e}")
+
+def review_upload(uploaded_file, timings):
     if uploaded_file:
-        with ThreadPoolExecutor() as executor:
-            future_excel_file = executor.submit(read_excel_file, uploaded_file)
-            excel_file = future_excel_file.result()
-
-            if excel_file:
-                sheet_names = excel_file.sheet_names
-                selected_sheet = st.sidebar.selectbox('Select a sheet to display', sheet_names)
-                
-                future_df = executor.submit(load_sheet_data, excel_file, selected_sheet)
-                df = future_df.result()
-                
-                if df is not None:
-                    df = process_data(df)
-                    
+        file_bytes = uploaded_file.getvalue()
+        upload_key = hashlib.sha256(file_bytes).hexdigest()
+        session_id = current_session_id()
+        # Parsing goes through the shared scheduler too, so month-end upload bursts queue instead of all running at once
+        future_sheet_names = scheduler.submit(session_id, parse_cache.cached_sheet_names, upload_key,
+                                              lambda: read_sheet_names(file_bytes, timings))
+        sheet_names = wait_for_job(future_sheet_names, message="Reading the workbook")
+
+        if sheet_names:
+            selected_sheet = st.sidebar.selectbox('Select a sheet to display', sheet_names)
+
+            if should_stream(file_bytes, selected_sheet, upload_key):
+                review_streamed_sheet(file_bytes, selected_sheet, upload_key, timings)
+            else:
+                future_lease = scheduler.submit(session_id, parse_cache.acquire, (upload_key, selected_sheet),
+                                                lambda: parse_sheet(file_bytes, selected_sheet, timings))
+                lease = wait_for_job(future_lease, message="Loading the sheet")
+                # The session state keeps the lease, so the sheet stays cached while this session is on it
+                st.session_state['parsed_sheet'] = lease
+
+                if lease is not None:
+                    df = lease.value
+
                     if df is not None and 'month' in df.columns:
-                        month = st.sidebar.selectbox("Select the month for review", df['month'].unique())
-                        
-                        future_df_filtered = executor.submit(filter_by_month, df, month)
-                        df_filtered = future_df_filtered.result()
-                        
-                        if df_filtered is not None:
-                            apply_business_logic(df_filtered, selected_sheet)
+                        months = df['month'].unique()
+                        month = st.sidebar.selectbox("Select the month for review", months)
+
+                        if st.sidebar.checkbox("Profile this run"):
+                            _, profiler = profile_call(review_month, df, month, selected_sheet, upload_key, timings, use_cache=False)
+                            display_profile(profiler, f"{selected_sheet}_{month}.prof")
                         else:
-                            st.error("Error filtering data by month.")
+                            review_month(df, month, selected_sheet, upload_key, timings)
+                        if not is_xlsx(file_bytes):
+                            st.sidebar.caption("Formula checks need an .xlsx upload.")
+                        elif st.sidebar.checkbox("Check stored formulas"):
+                            review_formulas(file_bytes, df, month, selected_sheet, upload_key, timings)
+                        # Interactive modules pick their rows from widgets, so their findings cannot be collected for export
+                        business_logic_module = find_business_logic_module(selected_sheet)
+                        if business_logic_module and not is_interactive(load_business_logic(business_logic_module)[0]):
+                            if not is_xlsx(file_bytes):
+                                st.sidebar.caption("The annotated export needs an .xlsx upload.")
+                            elif st.sidebar.checkbox("Export annotated workbook"):
+                                export_month(file_bytes, df, month, selected_sheet, upload_key, timings)
+                        previous_file = st.sidebar.file_uploader('Compare with an earlier upload', type=['xlsx', 'xls'])
+                        if previous_file:
+                            review_upload_diff(previous_file.getvalue(), df, month, selected_sheet, timings)
+                        precompute_months(df, [other_month for other_month in months if other_month != month], selected_sheet, upload_key)
                     else:
                         st.write("No 'month' column found in this sheet.")
                         logging.warning("No 'month' column found in the sheet.")
-            else:
-                st.error("Error uploading the Excel file.")
+        else:
+            st.error("Error uploading the Excel file.")
     else:
         st.write("Please upload an Excel file to proceed.")
 
+def main():
+    st.set_page_config(page_title="Monthly MIS Checker", layout="wide")
+    st.title("MIS Reviewer :chart_with_upwards_trend:")
+    
+    uploaded_file = st.sidebar.file_uploader('Upload Excel file', type=['xlsx', 'xls'])
+    timings = []
+    track_memory = st.sidebar.checkbox("Track memory per stage")
+    if track_memory:
+        start_memory_tracking(timings)
+    try:
+        review_upload(uploaded_file, timings)
+    finally:
+        # Streamlit reruns interrupt the script with an exception, so the session's tracking is released here
+        if track_memory:
+            stop_memory_tracking(timings)
+    display_timings(timings)
+
 if __name__ == "__main__":
     main()
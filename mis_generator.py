@@ -0,0 +1,254 @@
+import argparse
+import ast
+import importlib
+import inspect
+import json
+import logging
+import re
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from client_rules import CLIENT_RULES
+from main import BUSINESS_LOGIC_SHEETS
+from validation_engine import ROW_OFFSET, findings_frame
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+KARBON_COLUMNS = ['date(karbon)', 'expense item', 'reason for expense', 'expense type', 'price', 'pax', 'amount',
+                  'mode of payment', 'bill to', 'requested by', 'approved by']
+
+CATEGORY_VALUES = {
+    'site name': ['main campus', 'tower b', 'plant 1'],
+    'vendor': ['annapoorna caterers', 'fresh bowl', 'daily dabba'],
+    'session': ['breakfast', 'lunch', 'snacks', 'dinner'],
+    'meal type': ['veg', 'non-veg'],
+    'order type': ['regular', 'regular', 'regular', 'event', 'adhoc', 'smartq-pop-up', 'food trial'],
+    'menu item': [f'item {number}' for number in range(1, 201)],
+    'whole fruits': ['apple', 'banana', 'papaya', 'watermelon'],
+    'meal type (only lunch)': ['lunch'],
+    'expense item': ['water cans', 'disposables', 'gas refill'],
+    'reason for expense': ['shortage', 'client request'],
+    'expense type': ['consumables', 'logistics'],
+    'mode of payment': ['cash', 'upi'],
+    'bill to': ['client', 'smartq'],
+    'requested by': ['site manager'],
+    'approved by': ['ops lead'],
+}
+
+# Category vocabularies the module's own rules branch on
+CATEGORY_OVERRIDES = {
+    'business_logic_7': {'meal type': ['buffet', 'packed', 'saladbar']},
+    'business_logic_18': {'session': ['lunch-veg', 'lunch-non veg', 'breakfast', 'snacks']},
+    'business_logic_44': {'session': ['breakfast', 'lunch', 'tea/coffee']},
+    'business_logic_48': {'meal type (only lunch)': ['breakfast', 'lunch', 'dinner']},
+}
+
+COLUMN_NAME = re.compile(r'^[a-z0-9][a-z0-9 %()/&+.\-]*$')
+NOT_COLUMNS = {'mean', 'size', 'sum', 'days', 'float', 'int', 'object', 'records', 'coerce', 'float64', 'int64', 'openpyxl',
+               'compute', 'left'}
+
+def helper_functions(module):
+    # Shared validation_engine checks the module calls, e.g. find_wallet_mismatches; the columns they read are
+    # named in their own source, not the module's
+    return [value for value in vars(module).values() if inspect.isfunction(value) and value.__module__ == 'validation_engine']
+
+def module_columns(module):
+    # Column names the module and the shared checks it calls read: subscripts, string arguments of calls,
+    # column lists built inside functions, string values of module-level mappings, and the columns named in
+    # its declarative rules
+    trees = [ast.parse(inspect.getsource(module))]
+    trees.extend(ast.parse(inspect.getsource(helper)) for helper in helper_functions(module))
+    names = []
+
+    def add_strings(node):
+        for child in ast.walk(node):
+            if isinstance(child, ast.Constant) and isinstance(child.value, str):
+                names.append(child.value)
+
+    for node in (node for tree in trees for node in ast.walk(tree)):
+        if isinstance(node, ast.Subscript):
+            if isinstance(node.slice, (ast.Constant, ast.List)):
+                add_strings(node.slice)
+        elif isinstance(node, ast.Call) and not (isinstance(node.func, ast.Attribute) and node.func.attr == 'isin'):
+            for argument in node.args:
+                if isinstance(argument, (ast.Constant, ast.List, ast.Tuple, ast.Dict)):
+                    add_strings(argument)
+            for keyword in node.keywords:
+                if isinstance(keyword.value, ast.Tuple):
+                    add_strings(keyword.value.elts[0])
+        elif isinstance(node, ast.FunctionDef):
+            for statement in ast.walk(node):
+                if isinstance(statement, ast.Assign) and isinstance(statement.value, ast.List):
+                    add_strings(statement.value)
+
+    for name, value in vars(module).items():
+        if isinstance(value, dict) and not name.startswith('_'):
+            names.extend(item for item in value.values() if isinstance(item, str))
+    for rule in CLIENT_RULES.get(module.__name__, []):
+        names.append(rule['target'])
+        names.extend(re.findall(r'`([^`]+)`', rule['formula'] + rule.get('when', '')))
+    for dependencies, _ in getattr(module, 'DERIVED_COLUMNS', {}).values():
+        names.extend(dependencies)
+    names.extend(column for column, _ in getattr(module, 'MISMATCH_CHECKS', []))
+
+    columns = [name for name in dict.fromkeys(names) if COLUMN_NAME.match(name) and name not in NOT_COLUMNS]
+    if 'find_karbon_expenses' in vars(module):
+        columns.extend(column for column in KARBON_COLUMNS if column not in columns)
+    return [column for column in columns if column not in ('month', 'date')]
+
+def category_values(module, column):
+    overrides = CATEGORY_OVERRIDES.get(module.__name__, {})
+    if column in overrides:
+        return overrides[column]
+    if column == 'meal type (only lunch)' and hasattr(module, 'BUYING_PRICE_TIERS'):
+        return list(module.BUYING_PRICE_TIERS)
+    return CATEGORY_VALUES[column]
+
+def numeric_values(column, rng, rows):
+    if column == 'gst':
+        return rng.choice([1.05, 1.18], rows)
+    if '%' in column:
+        return rng.choice([0.05, 0.1, 0.15], rows)
+    if 'price' in column or column == 'rate':
+        return np.round(rng.uniform(20, 150, rows), 2)
+    if 'penalty' in column or 'transportation' in column:
+        return np.where(rng.random(rows) < 0.05, rng.integers(50, 500, rows), 0).astype('float64')
+    if any(word in column for word in ('pax', 'consumption', 'cosumption', 'mg', 'qty', 'quantity', 'sold', 'entry', 'staff', 'trainer', 'coupon')):
+        return rng.integers(0, 600, rows).astype('float64')
+    return rng.integers(0, 20000, rows).astype('float64')
+
+def base_frame(module, rows, rng, month_count=1, start_date='2024-04-01'):
+    # Rows are spread evenly over the requested months so every month has the same volume
+    days = pd.date_range(start_date, periods=month_count * 31, freq='D')
+    days = days[days < pd.Timestamp(start_date) + pd.DateOffset(months=month_count)]
+    dates = days[np.arange(rows) * len(days) // rows]
+    df = pd.DataFrame({'month': dates.strftime('%B').str.lower(), 'date': dates})
+
+    for column in module_columns(module):
+        if column in CATEGORY_VALUES or column in CATEGORY_OVERRIDES.get(module.__name__, {}):
+            df[column] = rng.choice(category_values(module, column), rows)
+        elif column in KARBON_COLUMNS:
+            continue
+        else:
+            df[column] = numeric_values(column, rng, rows)
+
+    if 'find_karbon_expenses' in vars(module):
+        # About one row in fifty carries a karbon expense
+        has_expense = rng.random(rows) < 0.02
+        for column in KARBON_COLUMNS:
+            if column in CATEGORY_VALUES:
+                df[column] = np.where(has_expense, rng.choice(CATEGORY_VALUES[column], rows).astype(object), None)
+            elif column == 'date(karbon)':
+                df[column] = df['date'].where(has_expense)
+            else:
+                df[column] = np.where(has_expense, rng.integers(1, 2000, rows), np.nan)
+    return df
+
+def repair_frame(oracle, df, max_passes=10):
+    # The oracle module's find_mismatches decides what is clean: every reported cell is set to its expected
+    # value until the sheet is clean, which resolves chains such as selling pax -> selling amount -> commission
+    for _ in range(max_passes):
+        mismatches = findings_frame(oracle.find_mismatches(df))
+        if mismatches.empty:
+            return df
+        mismatches = mismatches[pd.to_numeric(mismatches['Expected'], errors='coerce').notna()]
+        if mismatches.empty:
+            return df
+        for column, column_mismatches in mismatches.groupby('Column'):
+            df.loc[column_mismatches['Row'].to_numpy() - ROW_OFFSET, column] = column_mismatches['Expected'].astype('float64').to_numpy()
+    logging.warning(f"'{oracle.__name__}' still reports mismatches after {max_passes} repair passes.")
+    return df
+
+def isolated_columns(module, df, sample_rows=5):
+    # Columns that can be corrupted without other checks picking up the change, so every injected error
+    # produces exactly one finding at a known position. Findings the sample already has (rules the
+    # generator cannot satisfy) are ignored.
+    sample = df.iloc[:sample_rows].copy()
+    baseline = finding_keys(module, sample)
+    isolated = []
+    for column in sample.columns:
+        if not pd.api.types.is_float_dtype(sample[column]):
+            continue
+        new_findings = finding_keys(module, shift_numeric(sample, [column])) - baseline
+        if new_findings and {finding_column for _, finding_column in new_findings} == {column}:
+            isolated.append(column)
+    return isolated
+
+def finding_keys(module, df):
+    findings_df = findings_frame(module.find_mismatches(df))
+    if findings_df.empty:
+        return set()
+    return set(zip(findings_df['Row'].tolist(), findings_df['Column'].tolist()))
+
+def shift_numeric(df, columns, offset=7):
+    shifted = df.copy()
+    for column in columns:
+        if column in shifted.columns and pd.api.types.is_float_dtype(shifted[column]):
+            shifted[column] = shifted[column] + offset
+    return shifted
+
+def inject_errors(module, df, error_count, rng):
+    if error_count == 0:
+        return df, []
+    columns = isolated_columns(module, df)
+    if not columns:
+        # A module whose checked columns the scan missed would otherwise pass the harness with no findings
+        raise ValueError(f"'{module.__name__}' checks none of the generated columns; declare its columns or helpers.")
+    positions = rng.choice(len(df), size=min(error_count, len(df)), replace=False)
+    injected = []
+    for position in sorted(positions):
+        column = columns[rng.integers(len(columns))]
+        original = float(np.nan_to_num(pd.to_numeric(df.at[df.index[position], column], errors='coerce')))
+        corrupted = original + float(rng.integers(1, 100))
+        df.at[df.index[position], column] = corrupted
+        injected.append({'Row': int(df.index[position]) + ROW_OFFSET, 'Column': column, 'Original': original, 'Corrupted': corrupted})
+
+    # Conditional rules (e.g. lunch-only checks) skip some rows; corruptions no rule sees are rolled back so
+    # the manifest lists exactly the findings a correct validator must report
+    reported = finding_keys(module, df)
+    for error in [error for error in injected if (error['Row'], error['Column']) not in reported]:
+        df.at[error['Row'] - ROW_OFFSET, error['Column']] = error['Original']
+        injected.remove(error)
+    return df, injected
+
+def generate_frame(module_name, rows, error_count=0, seed=0, month_count=1, oracle=None):
+    # Returns the processed (lower-case) sheet for module_name and the list of injected errors. oracle is the
+    # module whose find_mismatches repairs the sheet and places the errors (default: module_name itself);
+    # harnesses checking module_name pass an independent implementation so the sheet does not depend on it.
+    module = importlib.import_module(module_name)
+    oracle = oracle or module
+    rng = np.random.default_rng(seed)
+    df = repair_frame(oracle, base_frame(module, rows, rng, month_count))
+    return inject_errors(oracle, df, error_count, rng)
+
+def write_workbook(df, path, sheet_name, title=None):
+    # Streaming write: the sheet is never held as openpyxl cell objects, so 1M-row workbooks fit in memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name[:31])
+    worksheet.append([title or f'{sheet_name} MIS'])
+    worksheet.append(list(df.columns))
+    for values in df.itertuples(index=False, name=None):
+        worksheet.append([None if isinstance(value, float) and np.isnan(value) else value for value in values])
+    workbook.save(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic MIS workbook for a business logic module.")
+    parser.add_argument('module', help="business logic module, e.g. business_logic_1")
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--errors', type=int, default=0, help="number of cells to corrupt at recorded positions")
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="workbook path (default: <module>_<rows>.xlsx)")
+    args = parser.parse_args()
+
+    sheet_name = BUSINESS_LOGIC_SHEETS.get(args.module, [args.module])[0] or args.module
+    output = args.output or f'{args.module}_{args.rows}.xlsx'
+    df, injected = generate_frame(args.module, args.rows, args.errors, args.seed, args.months)
+    write_workbook(df, output, sheet_name)
+    with open(output.rsplit('.', 1)[0] + '_errors.json', 'w') as manifest:
+        json.dump({'module': args.module, 'sheet': sheet_name, 'rows': args.rows, 'errors': injected}, manifest, indent=2)
+    logging.info(f"Wrote {args.rows} rows for '{args.module}' to {output} with {len(injected)} injected errors.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from disk_cache import disk_cache
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Parsed sheets kept across sessions; sheets a session is still looking at are never evicted, so the budget
+# can be exceeded while they are all in use
+PARSE_CACHE_BYTES = int(os.environ.get('MIS_PARSE_CACHE_MB', 1024)) * 2**20
+SHEET_NAMES_CACHE_SIZE = 256
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum()) if hasattr(df, 'memory_usage') else 0
+
+class Lease:
+    # A session's hold on a cached sheet; the reference is released when the lease is released or garbage
+    # collected with the session state that owns it
+    def __init__(self, cache, key, value):
+        self.key = key
+        self.value = value
+        self.finalizer = weakref.finalize(self, cache.release, key)
+
+    def release(self):
+        self.finalizer()
+
+class ParseCache:
+    def __init__(self, max_bytes=PARSE_CACHE_BYTES, disk=disk_cache):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.total_bytes = 0
+        self.sheet_names = OrderedDict()
+
+    def acquire(self, key, load):
+        # Identical uploads share one parse: later sessions reuse the entry, and a session arriving while
+        # the first parse is still running waits for it instead of parsing again
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry['refs'] += 1
+                self.entries.move_to_end(key)
+                logging.info(f"Parse cache hit for sheet '{key[1]}'.")
+                return Lease(self, key, entry['value'])
+            future = self.loading.get(key)
+            loader = future is None
+            if loader:
+                future = self.loading[key] = Future()
+
+        if not loader:
+            future.result()
+            return self.acquire(key, load)
+
+        try:
+            # Other server processes share parses through the disk cache
+            value = self.disk.get_or_compute('sheets', key, load)
+        except BaseException as e:
+            with self.lock:
+                del self.loading[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            del self.loading[key]
+            if value is not None:
+                self.entries[key] = {'value': value, 'bytes': frame_bytes(value), 'refs': 1}
+                self.total_bytes += self.entries[key]['bytes']
+                self.evict()
+        future.set_result(None)
+        return Lease(self, key, value) if value is not None else None
+
+    def release(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry['refs'] -= 1
+                self.evict()
+
+    def evict(self):
+        # Called with the lock held: drop least recently used sheets nobody holds until within budget
+        for key in [key for key, entry in self.entries.items() if entry['refs'] <= 0]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.total_bytes -= self.entries.pop(key)['bytes']
+            logging.info(f"Evicted sheet '{key[1]}' from the parse cache.")
+
+    def cached_sheet_names(self, content_hash, load):
+        with self.lock:
+            if content_hash in self.sheet_names:
+                self.sheet_names.move_to_end(content_hash)
+                return self.sheet_names[content_hash]
+        sheet_names = self.disk.get_or_compute('sheet_names', content_hash, load)
+        if sheet_names is not None:
+            with self.lock:
+                self.sheet_names[content_hash] = sheet_names
+                while len(self.sheet_names) > SHEET_NAMES_CACHE_SIZE:
+                    self.sheet_names.popitem(last=False)
+        return sheet_names
+
+parse_cache = ParseCache()
@@ -0,0 +1,33 @@
+import argparse
+import logging
+from main import read_excel_file, load_sheet_data, process_data, filter_by_month, apply_business_logic
+from instrumentation import profile_call, profile_summary
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+def load_month(workbook_path, sheet_name, month=None):
+    excel_file = read_excel_file(workbook_path)
+    df = load_sheet_data(excel_file, sheet_name)
+    df = process_data(df)
+    month = month.lower() if month else df['month'].dropna().iloc[0]
+    return filter_by_month(df, month), month
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile one (sheet, month) validation run with cProfile.")
+    parser.add_argument('workbook', help="MIS workbook (.xlsx)")
+    parser.add_argument('sheet', help="sheet to validate")
+    parser.add_argument('--month', help="month to validate (default: the first month in the sheet)")
+    parser.add_argument('--output', help="stats file (default: <sheet>_<month>.prof)")
+    parser.add_argument('--limit', type=int, default=30, help="functions to print in the summary")
+    args = parser.parse_args()
+
+    df_filtered, month = load_month(args.workbook, args.sheet, args.month)
+    _, profiler = profile_call(apply_business_logic, df_filtered, args.sheet)
+    output = args.output or f'{args.sheet}_{month}.prof'
+    profiler.dump_stats(output)
+    print(profile_summary(profiler, args.limit))
+    logging.info(f"Profile written to {output}; open it with snakeviz or flameprof for a flame graph.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import logging
+import threading
+from collections import OrderedDict
+from disk_cache import disk_cache
+from jobs import JobCancelled, scheduler
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Validated months kept in memory, most recently used last
+RESULT_CACHE_SIZE = 64
+
+results = OrderedDict()
+pending = {}
+lock = threading.Lock()
+
+def store_result(key, result):
+    with lock:
+        results[key] = result
+        results.move_to_end(key)
+        while len(results) > RESULT_CACHE_SIZE:
+            results.popitem(last=False)
+
+def compute_and_store(key, compute, *args):
+    try:
+        # Months validated by another server process are read back from the disk cache
+        result = disk_cache.get_or_compute('results', key, lambda: compute(*args))
+        if result is not None:
+            store_result(key, result)
+        return result
+    finally:
+        with lock:
+            pending.pop(key, None)
+
+def get_result(key, compute, *args):
+    # A cached result is returned straight away; a month already being precomputed is waited for instead of
+    # being validated a second time. A precompute still queued is withdrawn and run here: background jobs only
+    # start once the foreground queue is empty, so a worker waiting on one could wait forever.
+    with lock:
+        if key in results:
+            results.move_to_end(key)
+            return results[key]
+        future = pending.get(key)
+    if future is not None and not future.cancel():
+        result = future.result()
+        if result is not None:
+            return result
+    return compute_and_store(key, compute, *args)
+
+def submit_precompute(session_id, key, compute, *args):
+    # Precomputes are background jobs on the shared scheduler, so they never delay anyone's visible month
+    with lock:
+        if key in results or key in pending:
+            return
+        pending[key] = scheduler.submit(session_id, log_failures, key, compute_and_store, key, compute, *args, background=True)
+
+def log_failures(key, function, *args):
+    try:
+        return function(*args)
+    except JobCancelled:
+        logging.info(f"Background validation of {key[1:]} cancelled.")
+        return None
+    except Exception as e:
+        logging.error(f"Background validation of {key[1:]} failed: {e}")
+        return None
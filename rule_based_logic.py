@@ -0,0 +1,178 @@
+import pandas as pd
+import streamlit as st
+import logging
+from rule_compiler import find_rule_mismatches
+from validation_engine import findings_frame, karbon_expense_ledger, expense_totals, pivot_with_averages, total, distinct_count
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+def safe_get_value(row, col):
+    return row[col] if col in row and pd.notna(row[col]) else 0
+
+def pivot_and_average_prices(df):
+    return pivot_with_averages(df, ['site name', 'vendor', 'session', 'meal type', 'order type'], {'average_buying_price_ai': 'buying price ai', 'average_selling_price': 'selling price'})
+
+def find_mismatches(df, module_name):
+    return find_rule_mismatches(df, module_name)
+
+def find_karbon_expenses(df):
+    return karbon_expense_ledger(df)
+
+def calculate_aggregated_values(df):
+    regular_orders = df[df['order type'] .isin(['regular','regular-pop-up', 'food trial'])]
+    sum_buying_pax_regular = total(regular_orders['buying pax'])
+    sum_selling_pax_regular = total(regular_orders['selling pax'])
+
+    regular_and_adhoc_orders = df[df['order type'].isin(['regular', 'smartq-pop-up', 'food trial', 'regular-pop-up'])]
+    sum_buying_amt_ai_regular= total(regular_and_adhoc_orders['buying amt ai'])
+    sum_selling_amt_regular = total(regular_and_adhoc_orders['selling amount'])
+
+    event_and_popup_orders = df[df['order type'].isin(['event', 'event pop-up', 'adhoc'])]
+    sum_buying_amt_ai_event= total(event_and_popup_orders['buying amt ai'])
+    sum_selling_amt_event = total(event_and_popup_orders['selling amount'])
+
+    sum_penalty_on_vendor = total(df['penalty on vendor'])
+    sum_penalty_on_smartq = total(df['penalty on smartq'])
+    sum_commission = total(df['commission'])
+    sum_amount = total(df['amount'])
+
+    valid_dates_df = df[(df['buying pax'] > 0) | (df['selling pax'] > 0)]
+    number_of_days = distinct_count(valid_dates_df['date'])
+
+    aggregated_data = {
+        'Number of Days': number_of_days,
+        'Buying Pax (Regular)': sum_buying_pax_regular,
+        'Selling Pax (Regular)': sum_selling_pax_regular,
+        'Buying Amt AI (Regular)': sum_buying_amt_ai_regular,
+        'Selling Amt (Regular)': sum_selling_amt_regular,
+        'Buying Amt AI (Event)': sum_buying_amt_ai_event,
+        'Selling Amt (Event)': sum_selling_amt_event,
+        'Penalty on Vendor': sum_penalty_on_vendor,
+        'Penalty on SmartQ': sum_penalty_on_smartq,
+        'Commission': sum_commission,
+        'Amount': sum_amount
+    }
+
+    return aggregated_data
+
+def find_buying_value_issues(df):
+    buying_value_issues = []
+    for index, row in df.iterrows():
+        if (safe_get_value(row, 'buying pax') > 0 or safe_get_value(row, 'buying price ai') > 0) and safe_get_value(row, 'buying amt ai') == 0:
+            buying_value_issues.append({
+                'Row': index + 3,
+                'Date': row['date'],
+                'Session': row['session'],
+                'Mealtype': row['meal type'],
+                'Ordertype': row['order type'],
+                'Buying Pax': row['buying pax'],
+                'Buying Price AI': row['buying price ai'],
+                'Buying Amount AI': row['buying amt ai']
+            })
+    return buying_value_issues
+
+def find_selling_value_issues(df):
+    selling_value_issues = []
+    for index, row in df.iterrows():
+        if (safe_get_value(row, 'selling pax') > 0 or safe_get_value(row, 'selling price') > 0) and safe_get_value(row, 'selling amount') == 0:
+            selling_value_issues.append({
+                'Row': index + 3,
+                'Date': row['date'],
+                'Session': row['session'],
+                'Mealtype': row['meal type'],
+                'Ordertype': row['order type'],
+                'Selling Pax': row['selling pax'],
+                'Selling Price': row['selling price'],
+                'Selling Amount': row['selling amount']
+            })
+    return selling_value_issues
+
+def find_popup_selling_issues(df):
+    popup_selling_issues = []
+    for index, row in df.iterrows():
+        if row['order type'] in ['smartq-pop-up', 'regular-pop-up', 'event pop-up'] and safe_get_value(row, 'selling amount') > 0:
+            popup_selling_issues.append({
+                'Row': index + 3,
+                'Date': row['date'],
+                'Session': row['session'],
+                'Order Type': row['order type'],
+                'Selling Pax': row['selling pax'],
+                'Selling Price': row['selling price'],
+                'Selling Amount': row['selling amount']
+            })
+    return popup_selling_issues
+
+def format_dataframe(df):
+    # Format numerical columns to one decimal place
+    for column in df.select_dtypes(include=['float', 'int']).columns:
+        df[column] = df[column].map(lambda x: f"{x:.1f}")
+    return df
+
+def display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggregated_data, buying_value_issues, selling_value_issues, popup_selling_issues):
+    st.subheader("")
+    st.subheader("Average Buying Price and Selling Price")
+    st.table(format_dataframe(combined_df))
+    st.markdown("---")
+
+    if mismatched_data:
+        mismatched_df = findings_frame(mismatched_data)
+        st.write("<span style='color:red'>Mismatched Data:heavy_exclamation_mark:</span>", unsafe_allow_html=True)
+        st.table(format_dataframe(mismatched_df))
+        st.markdown("---")
+    else:
+        st.write("<span style='color:green'>No mismatch found.</span> :white_check_mark:", unsafe_allow_html=True)
+        st.markdown("---")
+
+    if buying_value_issues:
+        buying_value_issues_df = pd.DataFrame(buying_value_issues)
+        st.write("<span style='color:red'>Buying Value Issues</span> :heavy_exclamation_mark:", unsafe_allow_html=True)
+        st.dataframe(format_dataframe(buying_value_issues_df))
+        st.markdown("---")
+    else:
+        st.write("<span style='color:green'>No buying value issues found.</span> :white_check_mark:", unsafe_allow_html=True)
+        st.markdown("---")
+
+    if selling_value_issues:
+        selling_value_issues_df = pd.DataFrame(selling_value_issues)
+        st.write("<span style='color:red'>Selling Value Issues</span> :heavy_exclamation_mark:", unsafe_allow_html=True)
+        st.dataframe(format_dataframe(selling_value_issues_df))
+        st.markdown("---")
+    else:
+        st.write("<span style='color:green'>No selling value issues found.</span> :white_check_mark:", unsafe_allow_html=True)
+        st.markdown("---")
+
+    if popup_selling_issues:
+        popup_selling_issues_df = pd.DataFrame(popup_selling_issues)
+        st.write("<span style='color:red'>Popup Selling Issues.</span> :heavy_exclamation_mark:", unsafe_allow_html=True)
+        st.dataframe(format_dataframe(popup_selling_issues_df))
+        st.markdown("---")
+    else:
+        st.write("<span style='color:green'>No selling price found in Pop-up.</span> :white_check_mark:", unsafe_allow_html=True)
+        st.markdown("---")
+
+    if not karbon_expenses_data.empty:
+        st.subheader("Karbon Expenses")
+        st.table(format_dataframe(karbon_expenses_data.copy()))
+        for group_column in ['Expense Type', 'Bill to']:
+            st.table(format_dataframe(expense_totals(karbon_expenses_data, group_column)))
+        st.markdown("---")
+    else:
+        st.write("No Karbon expenses found.")
+        st.markdown("---")
+
+    aggregated_df = pd.DataFrame(list(aggregated_data.items()), columns=['Parameter', 'Value'])
+    st.subheader("Aggregated Values")
+    st.table(format_dataframe(aggregated_df))
+    
+
+def rule_based_logic(df, module_name):
+    # Standard-template sheets whose rules live only in client_rules.CLIENT_RULES
+    combined_df = pivot_and_average_prices(df)
+    mismatched_data = find_mismatches(df, module_name)
+    aggregated_data = calculate_aggregated_values(df)
+    buying_value_issues = find_buying_value_issues(df)
+    selling_value_issues = find_selling_value_issues(df)
+    popup_selling_issues = find_popup_selling_issues(df)
+    karbon_expenses_data = find_karbon_expenses(df)
+    display_dataframes(combined_df, mismatched_data, karbon_expenses_data, aggregated_data, buying_value_issues, selling_value_issues, popup_selling_issues)
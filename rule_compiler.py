@@ -0,0 +1,156 @@
+import ast
+import re
+import logging
+from functools import lru_cache
+import numpy as np
+from validation_engine import safe_divide, find_derived_mismatches, text_dependency
+from client_rules import CLIENT_RULES
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Formulas use pandas.eval-style backticks for sheet columns, e.g. `selling pax` * `selling price`
+COLUMN_REFERENCE = re.compile(r'`([^`]+)`')
+
+def rule_max(*values):
+    return np.maximum.reduce(np.broadcast_arrays(*values))
+
+def rule_min(*values):
+    return np.minimum.reduce(np.broadcast_arrays(*values))
+
+def rule_where(condition, if_true, if_false):
+    return np.where(condition, if_true, if_false)
+
+def rule_isin(values, categories):
+    return np.isin(values, categories)
+
+FORMULA_FUNCTIONS = {
+    'max': 'rule_max',
+    'min': 'rule_min',
+    'where': 'rule_where',
+}
+
+FORMULA_NAMESPACE = {
+    'rule_max': rule_max,
+    'rule_min': rule_min,
+    'rule_where': rule_where,
+    'rule_isin': rule_isin,
+    'safe_divide': safe_divide,
+}
+
+class FormulaTransformer(ast.NodeTransformer):
+    # Rewrites a parsed formula into numpy operations over whole columns
+
+    def __init__(self, placeholders):
+        self.placeholders = placeholders
+        self.text_placeholders = set()
+
+    def visit_Name(self, node):
+        if node.id not in self.placeholders:
+            raise ValueError(f"Unknown name '{node.id}' in formula; quote column names with backticks")
+        return node
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FORMULA_FUNCTIONS or node.keywords:
+            raise ValueError(f"Unsupported function in formula: {ast.unparse(node.func)}")
+        node.args = [self.visit(arg) for arg in node.args]
+        node.func = ast.Name(id=FORMULA_FUNCTIONS[node.func.id], ctx=ast.Load())
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            # Zero divisors give no expected value rather than inf
+            return ast.Call(func=ast.Name(id='safe_divide', ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        if not isinstance(node.op, (ast.Add, ast.Sub, ast.Mult)):
+            raise ValueError(f"Unsupported operator in formula: {type(node.op).__name__}")
+        return node
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        operator = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        combined = node.values[0]
+        for value in node.values[1:]:
+            combined = ast.BinOp(left=combined, op=operator, right=value)
+        return combined
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=node.operand)
+        return node
+
+    def visit_Compare(self, node):
+        if len(node.ops) != 1:
+            raise ValueError("Chained comparisons are not supported in formulas")
+        self.generic_visit(node)
+        left, operator, right = node.left, node.ops[0], node.comparators[0]
+        if isinstance(operator, (ast.In, ast.NotIn)):
+            self.mark_text(left)
+            membership = ast.Call(func=ast.Name(id='rule_isin', ctx=ast.Load()), args=[left, right], keywords=[])
+            return membership if isinstance(operator, ast.In) else ast.UnaryOp(op=ast.Invert(), operand=membership)
+        if isinstance(right, ast.Constant) and isinstance(right.value, str):
+            self.mark_text(left)
+        if isinstance(left, ast.Constant) and isinstance(left.value, str):
+            self.mark_text(right)
+        return node
+
+    def mark_text(self, node):
+        # Columns compared with text are read as raw cell values instead of numbers
+        if isinstance(node, ast.Name):
+            self.text_placeholders.add(node.id)
+
+def compile_formula(formula):
+    columns = []
+
+    def to_placeholder(match):
+        if match.group(1) not in columns:
+            columns.append(match.group(1))
+        return f'column_{columns.index(match.group(1))}'
+
+    source = COLUMN_REFERENCE.sub(to_placeholder, formula)
+    placeholders = [f'column_{position}' for position in range(len(columns))]
+    transformer = FormulaTransformer(placeholders)
+    tree = transformer.visit(ast.parse(source, mode='eval'))
+    # The whole formula becomes one lambda over the referenced columns, evaluated once per sheet
+    evaluator = eval(f"lambda {', '.join(placeholders)}: {ast.unparse(tree)}", dict(FORMULA_NAMESPACE))
+    # Columns compared with text in this formula are read as raw cell values; other formulas still read them
+    # as numbers
+    text_columns = {columns[placeholders.index(placeholder)] for placeholder in transformer.text_placeholders}
+    dependencies = [text_dependency(column) if column in text_columns else column for column in columns]
+    return dependencies, evaluator
+
+def compile_rule(rule):
+    columns, formula = compile_formula(rule['formula'])
+    if not rule.get('when'):
+        return columns, formula
+
+    condition_columns, condition = compile_formula(rule['when'])
+    formula_arity = len(columns)
+    dependencies = columns + condition_columns
+
+    def conditional_formula(*values):
+        expected = np.asarray(formula(*values[:formula_arity]), dtype='float64')
+        applies = np.asarray(condition(*values[formula_arity:]), dtype=bool)
+        return np.where(applies, expected, np.nan)
+
+    return dependencies, conditional_formula
+
+def compile_rules(rules):
+    # Each rule becomes a node of the derived-column graph, so sheet columns shared between rules are read once
+    derived_columns = {}
+    checks = []
+    for position, rule in enumerate(rules):
+        dependencies, formula = compile_rule(rule)
+        derived_name = f"expected {rule['target']} #{position}"
+        derived_columns[derived_name] = (dependencies, formula)
+        checks.append((rule['target'], derived_name))
+    return derived_columns, checks
+
+@lru_cache(maxsize=None)
+def compiled_client_rules(module_name):
+    return compile_rules(CLIENT_RULES[module_name])
+
+def find_rule_mismatches(df, module_name):
+    derived_columns, checks = compiled_client_rules(module_name)
+    return find_derived_mismatches(df, derived_columns, checks)
@@ -0,0 +1,196 @@
+import logging
+import os
+import types
+import pandas as pd
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
+from jobs import combine_results
+from logic_runner import run_business_logic, capture_display, stage_functions
+from validation_engine import to_pandas, pair_days_and_averages
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Sheets longer than this are validated chunk by chunk instead of being loaded whole
+STREAMING_ROWS = int(os.environ.get('MIS_STREAMING_ROWS', 200000))
+STREAM_CHUNK_ROWS = 20000
+HEADER_ROW = 1
+STREAMED_PREFIX = 'find_'
+
+def sheet_row_count(workbook_file, sheet_name):
+    # Normally read from the sheet's dimension record, so none of the rows are parsed
+    try:
+        workbook = load_workbook(workbook_file, read_only=True)
+    except Exception as e:
+        # e.g. .xls uploads, which openpyxl cannot open; they are always loaded whole
+        logging.warning(f"Could not read the row count of '{sheet_name}': {e}")
+        return None
+    try:
+        worksheet = workbook[sheet_name]
+        if worksheet.max_row is None:
+            # Workbooks written without a dimension record (e.g. by streaming writers) have to be counted
+            return sum(1 for _ in worksheet.iter_rows(values_only=True))
+        return worksheet.max_row
+    finally:
+        workbook.close()
+
+def convert_cell(value):
+    # Same conversions pandas.read_excel applies to openpyxl cells, so chunks get the dtypes a full read would
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def parse_chunk(header, rows, start):
+    chunk_df = TextParser([header] + rows, header=0).read()
+    chunk_df.index = pd.RangeIndex(start, start + len(chunk_df))
+    return chunk_df
+
+def iter_sheet_chunks(workbook_file, sheet_name, chunk_rows=STREAM_CHUNK_ROWS):
+    # Yields the sheet as frames of chunk_rows rows, indexed by their position in the full sheet as
+    # pandas.read_excel(..., header=1) would index them, so findings keep their spreadsheet row numbers
+    workbook = load_workbook(workbook_file, read_only=True)
+    try:
+        sheet_rows = workbook[sheet_name].iter_rows(min_row=HEADER_ROW + 1, values_only=True)
+        header = [convert_cell(value) for value in next(sheet_rows, ())]
+        rows = []
+        start = 0
+        for row in sheet_rows:
+            rows.append([convert_cell(value) for value in row[:len(header)]])
+            if len(rows) == chunk_rows:
+                yield parse_chunk(header, rows, start)
+                start += len(rows)
+                rows = []
+        if rows:
+            yield parse_chunk(header, rows, start)
+    finally:
+        workbook.close()
+
+class Total:
+    # Partial sum of a whole-month total; chunk totals add up to the month's
+    def __init__(self, value):
+        self.value = value
+
+    def merge(self, other):
+        return Total(self.value + other.value)
+
+    def result(self):
+        return self.value
+
+class DistinctValues:
+    # Distinct keys seen so far, so a value repeated in several chunks is still counted once
+    def __init__(self, values):
+        self.values = values
+
+    def merge(self, other):
+        return DistinctValues(self.values | other.values)
+
+    def result(self):
+        return len(self.values)
+
+class GroupAverages:
+    # Row counts and per-column sums and non-empty counts per group; merged chunks give the same days and
+    # means (sum / count) as pivot_with_averages on the whole month
+    def __init__(self, days, sums, counts, average_columns, pair_columns):
+        self.days, self.sums, self.counts = days, sums, counts
+        self.average_columns, self.pair_columns = average_columns, pair_columns
+
+    def merge(self, other):
+        def add(first, second):
+            combined = pd.concat([first, second])
+            return combined.groupby(level=list(range(combined.index.nlevels)), sort=False).sum()
+        return GroupAverages(add(self.days, other.days), add(self.sums, other.sums), add(self.counts, other.counts),
+                             self.average_columns, self.pair_columns)
+
+    def result(self):
+        combined_df = (self.sums / self.counts).sort_index()
+        combined_df.insert(0, 'days', self.days.sort_index())
+        return pair_days_and_averages(combined_df.reset_index(), self.average_columns, self.pair_columns)
+
+def partial_total(values):
+    return Total(values.sum())
+
+def partial_distinct_count(values):
+    return DistinctValues(set(values.dropna().tolist()))
+
+def partial_pivot_with_averages(df, group_columns, average_columns, pair_columns=None):
+    df = to_pandas(df)
+    grouped = df.groupby(group_columns, sort=False, observed=True)
+    sums = pd.DataFrame({name: grouped[column].sum() for name, column in average_columns.items()})
+    counts = pd.DataFrame({name: grouped[column].count() for name, column in average_columns.items()})
+    return GroupAverages(grouped.size(), sums, counts, average_columns, pair_columns)
+
+# The aggregate helpers of the whole-month stages, swapped for their mergeable counterparts when streaming
+PARTIAL_HELPERS = {
+    'total': partial_total,
+    'distinct_count': partial_distinct_count,
+    'pivot_with_averages': partial_pivot_with_averages,
+}
+
+def with_partial_helpers(function):
+    return types.FunctionType(function.__code__, {**function.__globals__, **PARTIAL_HELPERS}, function.__name__,
+                              function.__defaults__, function.__closure__)
+
+def merge_partials(stage, merged, partial):
+    if isinstance(merged, dict) and isinstance(partial, dict) and merged.keys() == partial.keys():
+        return {key: merge_partials(stage, merged[key], partial[key]) for key in merged}
+    if hasattr(merged, 'merge') and type(merged) is type(partial):
+        return merged.merge(partial)
+    raise ValueError(f"'{stage}' returns values that cannot be merged across chunks; "
+                     "use total, distinct_count or pivot_with_averages for its aggregates.")
+
+def finish_partials(value):
+    if isinstance(value, dict):
+        return {key: finish_partials(item) for key, item in value.items()}
+    return value.result() if hasattr(value, 'result') else value
+
+def infer_dtypes(result):
+    return result.infer_objects() if isinstance(result, pd.DataFrame) else result
+
+def stream_validate(module, chunks, extra_args=(), wrap_stage=None):
+    # Runs every stage chunk by chunk. find_ stages merge their findings; the whole-month stages (pivots,
+    # aggregates) run with mergeable partial helpers, so only findings and per-group partials are kept and
+    # memory does not grow with the number of rows
+    merged = {}
+    empty_df = None
+    streamed = {name for name in stage_functions(module) if name.startswith(STREAMED_PREFIX)}
+
+    def collect(stage, function):
+        if stage == 'display_dataframes':
+            return lambda *args, **kwargs: None
+        if stage not in streamed:
+            function = with_partial_helpers(function)
+        if wrap_stage is not None:
+            function = wrap_stage(stage, function)
+
+        def run(*args, **kwargs):
+            # Results are folded into the running ones as each chunk finishes, so at most one chunk's results
+            # exist besides the merged ones
+            result = function(*args, **kwargs)
+            if stage not in merged:
+                merged[stage] = result
+            elif stage in streamed:
+                merged[stage] = combine_results([merged[stage], result])
+            else:
+                merged[stage] = merge_partials(stage, merged[stage], result)
+        return run
+
+    rows = 0
+    for chunk_df in chunks:
+        if empty_df is None:
+            empty_df = chunk_df.iloc[:0]
+        if chunk_df.empty:
+            continue
+        run_business_logic(module, chunk_df, extra_args, collect)
+        rows += len(chunk_df)
+
+    if empty_df is None:
+        raise ValueError("The sheet has no rows.")
+    if not rows:
+        return None
+    results = {stage: infer_dtypes(result) if stage in streamed else finish_partials(result) for stage, result in merged.items()}
+    overrides = {stage: (lambda result: lambda *args, **kwargs: result)(result) for stage, result in results.items()}
+    logging.info(f"Streamed {rows} rows; kept only findings and partial aggregates between chunks.")
+    # Every stage is replaced by its merged result, so the entry function runs on an empty frame
+    return capture_display(module, empty_df, extra_args, wrap_stage, overrides)
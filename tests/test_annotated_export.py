@@ -0,0 +1,58 @@
+import io
+import re
+import zipfile
+from openpyxl import Workbook, load_workbook
+from annotated_export import COMMENT_AUTHOR, FILLS, write_annotated_workbook
+
+COLUMNS = ['site name', 'wallet', 'total sale ai']
+FINDINGS = {
+    'find_mismatches': [{'Row': 4, 'Column': 'total sale ai', 'Expected': 120.0, 'Actual': 118.5}],
+    'find_duplicate_rows': [{'Row': 5}],
+}
+
+def sample_workbook():
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = 'MIS'
+    worksheet.append(COLUMNS)
+    for index in range(4):
+        worksheet.append([f"Site {index}", 100.0 + index, 120.0 + index])
+    workbook.create_sheet('Other').append(['untouched'])
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+def without_row_numbers(file_bytes):
+    # Rows may omit their r attribute; Excel then numbers them in order
+    source = zipfile.ZipFile(io.BytesIO(file_bytes))
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w') as target:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename == 'xl/worksheets/sheet1.xml':
+                data = re.sub(rb'(<row\b[^>]*?)\sr="[0-9]+"', rb'\1', data)
+            target.writestr(info, data)
+    return output.getvalue()
+
+def exported(file_bytes):
+    output = io.BytesIO()
+    write_annotated_workbook(io.BytesIO(file_bytes), 'MIS', COLUMNS, FINDINGS, output)
+    output.seek(0)
+    return load_workbook(output)
+
+def check_annotations(workbook):
+    worksheet = workbook['MIS']
+    assert worksheet['C4'].fill.fgColor.rgb == FILLS['mismatch']
+    assert worksheet['C4'].comment.text == 'Expected 120.00, found 118.50'
+    assert worksheet['C4'].comment.author == COMMENT_AUTHOR
+    assert worksheet['B4'].fill.fill_type is None
+    assert all(cell.fill.fgColor.rgb == FILLS['issue'] for cell in worksheet[5])
+    assert worksheet['A5'].comment.text == 'Duplicate rows'
+    assert worksheet['C3'].value == 121.0
+    assert workbook['Other']['A1'].value == 'untouched'
+
+def test_export_round_trips_through_openpyxl():
+    check_annotations(exported(sample_workbook()))
+
+def test_rows_without_numbers_fall_back_to_openpyxl():
+    check_annotations(exported(without_row_numbers(sample_workbook())))
@@ -0,0 +1,36 @@
+import io
+from openpyxl import Workbook
+from formula_check import check_formulas, r1c1_template, template_formula
+
+def test_filled_down_formulas_share_a_template():
+    assert r1c1_template('=A5*B5', 5, 3) == '=R[0]C[-2]*R[0]C[-1]'
+    assert r1c1_template('=A6*B6', 6, 3) == r1c1_template('=A5*B5', 5, 3)
+    assert r1c1_template('=A5*$B$1', 5, 3) == '=R[0]C[-2]*R1C2'
+    assert r1c1_template('=A$1+$A5', 5, 3) == '=R1C[-2]+R[0]C1'
+
+def test_strings_and_function_names_are_not_references():
+    assert r1c1_template('=IF(A5="B2",LOG10(A5),0)', 5, 2) == '=IF(R[0]C[-1]="B2",LOG10(R[0]C[-1]),0)'
+    assert r1c1_template('=SUM(A1:A4)', 5, 1) == '=SUM(R[-4]C[0]:R[-1]C[0])'
+
+def test_templates_write_back_as_the_formula_of_another_cell():
+    template = r1c1_template('=A5*$B$1+"C3"', 5, 3)
+    assert template_formula(template, 9, 3) == '=A9*$B$1+"C3"'
+
+def test_check_formulas_reports_the_odd_rows_of_a_formula_column():
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.title = 'MIS'
+    worksheet.append(['MIS'])
+    worksheet.append(['pax', 'price', 'amount'])
+    for row in range(3, 9):
+        worksheet.append([row, 10, f'=A{row}*B{row}'])
+    worksheet['C5'] = 50
+    worksheet['C6'] = '=A6+B6'
+    workbook_file = io.BytesIO()
+    workbook.save(workbook_file)
+
+    issues_df = check_formulas(workbook_file, 'MIS')
+    assert issues_df[['Row', 'Column', 'Issue', 'Expected Formula']].values.tolist() == [
+        [5, 'amount', 'Hard-coded value', '=A5*B5'],
+        [6, 'amount', 'Formula differs from the column', '=A6*B6'],
+    ]
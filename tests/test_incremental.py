@@ -0,0 +1,36 @@
+import pytest
+import business_logic_1
+import incremental
+from disk_cache import DiskCache
+from mis_generator import generate_frame
+
+@pytest.fixture
+def checked_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, 'disk_cache', DiskCache(directory=str(tmp_path)))
+    return []
+
+def validate(df, checked_rows):
+    def wrap_stage(stage, function):
+        def run(df, *args, **kwargs):
+            if stage == 'find_mismatches':
+                checked_rows.append(len(df))
+            return function(df, *args, **kwargs)
+        return run
+    return incremental.incremental_validate(business_logic_1, df, 'sheet', wrap_stage=wrap_stage)
+
+def test_only_edited_rows_are_rechecked(checked_rows):
+    df, _ = generate_frame('business_logic_1', 40, seed=1)
+    validate(df, checked_rows)
+    edited_df = df.copy()
+    edited_df.loc[5, 'selling pax'] += 1
+    validate(edited_df, checked_rows)
+    assert checked_rows == [40, 1]
+
+def test_schema_change_rechecks_every_row(checked_rows):
+    df, _ = generate_frame('business_logic_1', 40, seed=1)
+    validate(df, checked_rows)
+    renamed_df = df.rename(columns={'buying transportation': 'transport'})
+    validate(renamed_df, checked_rows)
+    retyped_df = renamed_df.astype({'gst': 'float32'})
+    validate(retyped_df, checked_rows)
+    assert checked_rows == [40, 40, 40]
@@ -0,0 +1,45 @@
+import numpy as np
+from validation_engine import MismatchStore
+
+def test_sort_by_row_keeps_check_order_within_a_row():
+    store = MismatchStore()
+    store.extend([7, 5], ['2024-04-01', '2024-04-02'], 'selling amount', [10.0, 20.0], [11.0, 21.0])
+    store.extend([5, 6], ['2024-04-02', None], 'commission', [1.0, 2.0], [1.5, 2.5])
+    store.sort_by_row()
+    findings_df = store.to_frame()
+    assert findings_df['Row'].tolist() == [5, 5, 6, 7]
+    assert findings_df['Column'].tolist() == ['selling amount', 'commission', 'commission', 'selling amount']
+    assert findings_df['Date'].tolist()[:2] == ['2024-04-02', '2024-04-02']
+    assert findings_df['Date'].isna().tolist() == [False, False, True, False]
+
+def test_extend_store_recodes_columns_and_dates():
+    first, second = MismatchStore(), MismatchStore()
+    first.extend([3], ['2024-04-01'], 'gst', [1.0], [2.0])
+    second.extend([4], ['2024-04-05'], 'wallet', [3.0], [4.0])
+    first.extend_store(second)
+    assert [(finding['Row'], finding['Column'], finding['Date']) for finding in first] == [
+        (3, 'gst', '2024-04-01'), (4, 'wallet', '2024-04-05')]
+
+def test_remap_rows_keeps_only_mapped_rows():
+    store = MismatchStore()
+    store.extend([3, 4, 5], [None] * 3, 'gst', [1.0, 2.0, 3.0], [0.0, 0.0, 0.0])
+    remapped = store.remap_rows(np.array([5, 3]), np.array([10, 8]))
+    assert remapped.to_frame()[['Row', 'Expected']].values.tolist() == [[8, 1.0], [10, 3.0]]
+
+def test_small_store_does_not_pin_a_full_chunk():
+    store = MismatchStore()
+    store.extend([3], ['2024-04-01'], 'gst', [1.0], [2.0])
+    assert store.nbytes <= MismatchStore.INITIAL_CAPACITY * 26
+    store.sort_by_row()
+    arrays = store.arrays()
+    # After finalising the buffers are exactly the findings, views included
+    assert store.nbytes == 26
+    assert all((array if array.base is None else array.base).nbytes == array.nbytes for array in arrays.values())
+
+def test_capacity_grows_geometrically():
+    store = MismatchStore()
+    for start in range(0, 10000, 100):
+        store.extend(np.arange(start, start + 100), [None] * 100, 'gst', np.zeros(100), np.ones(100))
+    assert len(store) == 10000
+    assert len(store.chunks) < 10
+    assert store.nbytes < 2 * 10000 * 26 + MismatchStore.INITIAL_CAPACITY * 26
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from rule_compiler import compile_rules
+from validation_engine import evaluate_derived_columns, text_dependency
+
+def test_text_comparison_only_reads_that_rule_as_text():
+    rules = [
+        {'target': 'selling amount', 'formula': '`selling pax` * `selling price`'},
+        {'target': 'commission', 'formula': '`selling amount` * 0.1', 'when': "`selling pax` != 'na'"},
+    ]
+    derived_columns, checks = compile_rules(rules)
+    assert derived_columns['expected selling amount #0'][0] == ['selling pax', 'selling price']
+    assert derived_columns['expected commission #1'][0] == ['selling amount', text_dependency('selling pax')]
+    assert checks == [('selling amount', 'expected selling amount #0'), ('commission', 'expected commission #1')]
+
+    df = pd.DataFrame({'selling pax': [2, 'na'], 'selling price': [5.0, 5.0], 'selling amount': [10.0, 20.0]})
+    values = evaluate_derived_columns(df, derived_columns)
+    assert values['selling pax'].dtype == np.float64
+    assert values[text_dependency('selling pax')].dtype == object
+    np.testing.assert_array_equal(values['expected commission #1'], [1.0, np.nan])
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from upload_diff import diff_rows, key_columns
+from validation_engine import ROW_OFFSET
+
+def sheet(records):
+    return pd.DataFrame(records, columns=['date', 'session', 'meal type', 'amount', 'remarks'])
+
+def test_rows_are_matched_on_their_key_not_their_position():
+    old_df = sheet([
+        ['2024-04-01', 'day', 'lunch', 100.0, None],
+        ['2024-04-01', 'day', 'lunch', 120.0, None],
+        ['2024-04-02', 'day', 'lunch', 90.0, 'late'],
+    ])
+    new_df = sheet([
+        ['2024-04-01', 'day', 'breakfast', 40.0, None],
+        ['2024-04-01', 'day', 'lunch', 100.0, np.nan],
+        ['2024-04-01', 'day', 'lunch', 125.0, None],
+    ])
+    columns = key_columns(old_df, new_df)
+    assert columns == ['date', 'session', 'meal type']
+
+    added_df, removed_df, changed_df = diff_rows(old_df, new_df, columns)
+    assert added_df['Row'].tolist() == [ROW_OFFSET]
+    assert added_df['meal type'].tolist() == ['breakfast']
+    assert removed_df['Row'].tolist() == [2 + ROW_OFFSET]
+    # Repeated keys pair in order, and None against NaN is not a change
+    assert changed_df[['Row (old)', 'Row (new)', 'Column', 'Old', 'New']].values.tolist() == [
+        [1 + ROW_OFFSET, 2 + ROW_OFFSET, 'amount', 120.0, 125.0]]
+
+def test_identical_uploads_have_no_differences():
+    df = sheet([['2024-04-01', 'day', 'lunch', 100.0, None]])
+    added_df, removed_df, changed_df = diff_rows(df, df.copy(), key_columns(df, df))
+    assert added_df.empty and removed_df.empty and changed_df.empty
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from validation_engine import ROW_OFFSET, MismatchStore, check_mismatch_columns, is_mismatch, round_half_away, values_differ
+
+def test_halves_round_away_from_zero_like_excel():
+    np.testing.assert_array_equal(round_half_away([0.125, 2.675, -0.125, 1.005, 0.124]), [0.13, 2.68, -0.13, 1.01, 0.12])
+
+def test_one_paisa_is_a_mismatch_and_float_noise_is_not():
+    actual = np.array([100.0, 100.01, 0.1 + 0.2, 99.995])
+    expected = np.array([100.0, 100.0, 0.3, 100.0])
+    np.testing.assert_array_equal(values_differ(actual, expected), [False, True, False, False])
+    assert is_mismatch(100.01, 100.0)
+    assert not is_mismatch(0.1 + 0.2, 0.3)
+    assert is_mismatch('na', 0.0)
+
+def test_tolerances_widen_the_allowed_difference():
+    assert not values_differ(np.array([100.5]), np.array([100.0]), abs_tolerance=0.5)[0]
+    assert values_differ(np.array([100.51]), np.array([100.0]), abs_tolerance=0.5)[0]
+    assert not values_differ(np.array([101.0]), np.array([100.0]), rel_tolerance=0.01)[0]
+
+def test_check_mismatch_columns_reports_paise_differences():
+    df = pd.DataFrame({'total': [10.0, 10.004, 10.006]})
+    mismatched_data = MismatchStore()
+    check_mismatch_columns(df, 'total', 10.0, mismatched_data)
+    findings_df = mismatched_data.to_frame()
+    assert findings_df['Row'].tolist() == [2 + ROW_OFFSET]
+    assert findings_df['Actual'].tolist() == [10.006]
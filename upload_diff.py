@@ -0,0 +1,119 @@
+import logging
+import pandas as pd
+import streamlit as st
+from incremental import collect_findings
+from logic_runner import is_interactive
+from validation_engine import ROW_OFFSET, findings_frame
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# A sheet row is identified across uploads by its service slot; repeated slots are paired in order
+DIFF_KEY = ['date', 'session', 'meal type', 'order type']
+
+def key_columns(old_df, new_df):
+    columns = [column for column in DIFF_KEY if column in old_df.columns and column in new_df.columns]
+    if not columns:
+        raise ValueError(f"Neither upload has any of the key columns {DIFF_KEY}.")
+    return columns
+
+def keyed_rows(df, columns):
+    keyed_df = df[columns].copy()
+    keyed_df['occurrence'] = keyed_df.groupby(columns, dropna=False).cumcount()
+    keyed_df['Row'] = df.index + ROW_OFFSET
+    return keyed_df
+
+def cells_changed(old_values, new_values):
+    old_values = old_values.to_numpy(dtype=object)
+    new_values = new_values.to_numpy(dtype=object)
+    both_missing = pd.isna(old_values) & pd.isna(new_values)
+    return ~both_missing & (old_values != new_values)
+
+def diff_rows(old_df, new_df, columns):
+    # One hash join on the key; matched rows are compared by row hash first, so only rows that really
+    # changed are compared cell by cell
+    keys = columns + ['occurrence']
+    matched_df = keyed_rows(old_df, columns).merge(keyed_rows(new_df, columns), on=keys, how='outer',
+                                                   suffixes=(' (old)', ' (new)'), indicator=True)
+    added_df = new_df.loc[matched_df.loc[matched_df['_merge'] == 'right_only', 'Row (new)'].astype(int) - ROW_OFFSET]
+    removed_df = old_df.loc[matched_df.loc[matched_df['_merge'] == 'left_only', 'Row (old)'].astype(int) - ROW_OFFSET]
+    added_df.insert(0, 'Row', added_df.index + ROW_OFFSET)
+    removed_df.insert(0, 'Row', removed_df.index + ROW_OFFSET)
+
+    both_df = matched_df[matched_df['_merge'] == 'both'].astype({'Row (old)': 'int64', 'Row (new)': 'int64'})
+    value_columns = [column for column in old_df.columns if column in new_df.columns and column not in columns]
+    old_values = old_df.loc[both_df['Row (old)'] - ROW_OFFSET, value_columns].reset_index(drop=True)
+    new_values = new_df.loc[both_df['Row (new)'] - ROW_OFFSET, value_columns].reset_index(drop=True)
+    differs = (pd.util.hash_pandas_object(old_values, index=False).to_numpy()
+               != pd.util.hash_pandas_object(new_values, index=False).to_numpy())
+    candidates_df = both_df[differs].reset_index(drop=True)
+    old_values, new_values = old_values[differs].reset_index(drop=True), new_values[differs].reset_index(drop=True)
+
+    changes = []
+    for column in value_columns:
+        changed = cells_changed(old_values[column], new_values[column])
+        if changed.any():
+            changes.append(candidates_df.loc[changed, columns + ['Row (old)', 'Row (new)']].assign(
+                Column=column, Old=old_values.loc[changed, column].to_numpy(dtype=object),
+                New=new_values.loc[changed, column].to_numpy(dtype=object)))
+    changed_df = pd.concat(changes, ignore_index=True) if changes else pd.DataFrame(
+        columns=columns + ['Row (old)', 'Row (new)', 'Column', 'Old', 'New'])
+    changed_df = changed_df.sort_values(['Row (new)', 'Column'], kind='stable').reset_index(drop=True)
+    return added_df, removed_df, changed_df
+
+def keyed_findings(findings, df, columns):
+    # Findings are matched on the key of the row they point at, not the row number, which shifts when
+    # rows are inserted or deleted
+    row_keys = keyed_rows(df, columns).set_index('Row')
+    frames = []
+    for stage, result in findings.items():
+        findings_df = result if isinstance(result, pd.DataFrame) else findings_frame(result)
+        if findings_df.empty or 'Row' not in findings_df.columns:
+            continue
+        findings_df = findings_df[['Row'] + (['Column'] if 'Column' in findings_df.columns else [])].copy()
+        findings_df['Column'] = findings_df['Column'].astype(object) if 'Column' in findings_df.columns else ''
+        findings_df.insert(0, 'Stage', stage)
+        frames.append(findings_df.join(row_keys, on='Row'))
+    if not frames:
+        return pd.DataFrame(columns=['Stage', 'Row', 'Column'] + columns + ['occurrence'])
+    return pd.concat(frames, ignore_index=True)
+
+def diff_findings(old_findings, new_findings):
+    keys = [column for column in new_findings.columns if column != 'Row']
+    matched_df = old_findings.merge(new_findings, on=keys, how='outer', suffixes=(' (old)', ' (new)'), indicator=True)
+    appeared_df = matched_df.loc[matched_df['_merge'] == 'right_only'].drop(columns=['Row (old)', '_merge', 'occurrence'])
+    disappeared_df = matched_df.loc[matched_df['_merge'] == 'left_only'].drop(columns=['Row (new)', '_merge', 'occurrence'])
+    appeared_df = appeared_df.astype({'Row (new)': 'int64'})[['Stage', 'Row (new)'] + [key for key in keys if key not in ('Stage', 'occurrence')]]
+    disappeared_df = disappeared_df.astype({'Row (old)': 'int64'})[['Stage', 'Row (old)'] + [key for key in keys if key not in ('Stage', 'occurrence')]]
+    return appeared_df.reset_index(drop=True), disappeared_df.reset_index(drop=True)
+
+def diff_uploads(old_df, new_df, module=None, extra_args=()):
+    columns = key_columns(old_df, new_df)
+    added_df, removed_df, changed_df = diff_rows(old_df, new_df, columns)
+    diff = {'added': added_df, 'removed': removed_df, 'changed': changed_df}
+    # Interactive modules pick their rows from widgets, so only the cell changes are shown for them
+    if module is not None and not is_interactive(module):
+        old_findings = keyed_findings(collect_findings(module, old_df, extra_args), old_df, columns)
+        new_findings = keyed_findings(collect_findings(module, new_df, extra_args), new_df, columns)
+        diff['appeared'], diff['disappeared'] = diff_findings(old_findings, new_findings)
+    logging.info(f"Upload diff: {len(added_df)} rows added, {len(removed_df)} removed, {len(changed_df)} cells changed.")
+    return diff
+
+def display_upload_diff(diff):
+    st.subheader("Changes since the earlier upload")
+    sections = [
+        ('added', "Added Rows"),
+        ('removed', "Removed Rows"),
+        ('changed', "Modified Cells"),
+        ('appeared', "New Findings"),
+        ('disappeared', "Resolved Findings"),
+    ]
+    for name, title in sections:
+        if name not in diff:
+            continue
+        if not diff[name].empty:
+            st.write(f"<span style='color:red'>{title}: {len(diff[name])}</span>", unsafe_allow_html=True)
+            st.dataframe(diff[name])
+        else:
+            st.write(f"<span style='color:green'>{title}: none</span>", unsafe_allow_html=True)
+    st.markdown("---")
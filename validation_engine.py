@@ -0,0 +1,435 @@
+import math
+from graphlib import TopologicalSorter
+import numpy as np
+import pandas as pd
+import logging
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+# Excel rows are 1-based and the MIS sheets carry two title rows above the data
+ROW_OFFSET = 3
+
+# Amounts are compared at paise precision, rounded the way Excel's ROUND does, so a difference of one
+# paisa is a mismatch. ABS_TOLERANCE and REL_TOLERANCE are there for checks that need extra slack.
+ROUND_DECIMALS = 2
+ABS_TOLERANCE = 0.0
+REL_TOLERANCE = 0.0
+FLOAT_EPSILON = 1e-9
+
+# Ledger label -> sheet column for the Karbon expense block at the right of the MIS sheets
+KARBON_EXPENSE_COLUMNS = {
+    'Date': 'date(karbon)',
+    'Expense Item': 'expense item',
+    'Reason for Expense': 'reason for expense',
+    'Expense Type': 'expense type',
+    'Price': 'price',
+    'Pax': 'pax',
+    'Amount': 'amount',
+    'Mode Of Payment': 'mode of payment',
+    'Bill to': 'bill to',
+    'Requested By': 'requested by',
+    'Approved By': 'approved by',
+}
+
+WALLET_PG_RATE = 0.02
+WALLET_GST_MULTIPLIER = 1.18
+
+def to_pandas(df):
+    # Dask frames are materialised once so every check works on the same in-memory columns
+    return df.compute() if hasattr(df, 'compute') else df
+
+def column_values(df, col):
+    # Column-wise counterpart of safe_get_value: missing columns and empty cells read as 0
+    if col not in df.columns:
+        return np.zeros(len(df), dtype='float64')
+    values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    return np.nan_to_num(values, nan=0.0)
+
+def text_values(df, col):
+    if col not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    return df[col].to_numpy(dtype=object)
+
+def safe_divide(numerator, denominator):
+    # Rows with a zero divisor get no expected value (NaN) and are not checked; the row loop got inf there, or
+    # a ZeroDivisionError that dropped the rest of the row's checks
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.asarray(denominator, dtype='float64')
+    result = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+def round_half_away(values, decimals=ROUND_DECIMALS):
+    # Excel's ROUND sends halves away from zero where numpy rounds them to even. The scaled value is nudged by
+    # FLOAT_EPSILON so a half stored just below itself (2.675 is 2.67499...) still rounds up as in Excel.
+    scale = 10.0 ** decimals
+    values = np.asarray(values, dtype='float64')
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5 + FLOAT_EPSILON * scale) / scale
+
+def values_differ(actual_values, expected_values, abs_tolerance=ABS_TOLERANCE, rel_tolerance=REL_TOLERANCE, decimals=ROUND_DECIMALS):
+    actual_values = round_half_away(actual_values, decimals)
+    expected_values = round_half_away(expected_values, decimals)
+    allowed = abs_tolerance + rel_tolerance * np.abs(expected_values) + FLOAT_EPSILON
+    return np.abs(actual_values - expected_values) > allowed
+
+def is_mismatch(actual_value, expected_value, abs_tolerance=ABS_TOLERANCE, rel_tolerance=REL_TOLERANCE, decimals=ROUND_DECIMALS):
+    # Scalar form of values_differ for the row-by-row modules; text, None and non-finite values keep the exact comparison
+    if (isinstance(actual_value, (int, float, np.number)) and isinstance(expected_value, (int, float, np.number))
+            and math.isfinite(actual_value) and math.isfinite(expected_value)):
+        allowed = abs_tolerance + rel_tolerance * abs(expected_value) + FLOAT_EPSILON
+        return abs(float(round_half_away(actual_value, decimals) - round_half_away(expected_value, decimals))) > allowed
+    return actual_value != expected_value
+
+class MismatchStore:
+    # Findings kept as typed struct-of-arrays chunks instead of one dict per mismatch. Column names and
+    # dates are stored once and referenced by code; len() and truthiness behave like the old list. Chunks start
+    # small and each new one is as large as the store so far, so capacity grows geometrically up to CHUNK_SIZE.
+    INITIAL_CAPACITY = 256
+    CHUNK_SIZE = 65536
+    FIELDS = {'row': 'int32', 'column': 'int16', 'expected': 'float64', 'actual': 'float64', 'date': 'int32'}
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.filled = []
+        self.column_names = []
+        self.column_ids = {}
+        self.date_values = []
+        self.date_codes = {}
+
+    def __len__(self):
+        return sum(self.filled)
+
+    def __iter__(self):
+        return iter(self.to_frame().to_dict('records'))
+
+    @property
+    def nbytes(self):
+        # Allocated capacity, counting the whole buffer behind any view
+        return sum((array if array.base is None else array.base).nbytes for chunk in self.chunks for array in chunk.values())
+
+    def column_id(self, column_name):
+        if column_name not in self.column_ids:
+            self.column_ids[column_name] = len(self.column_names)
+            self.column_names.append(column_name)
+        return self.column_ids[column_name]
+
+    def date_code(self, value):
+        if value not in self.date_codes:
+            self.date_codes[value] = len(self.date_values)
+            self.date_values.append(value)
+        return self.date_codes[value]
+
+    def encode_dates(self, dates):
+        codes, uniques = pd.factorize(np.asarray(dates, dtype=object) if not isinstance(dates, pd.Series) else dates)
+        # code -1 (no date) indexes the trailing -1 slot
+        store_codes = np.array([self.date_code(value) for value in uniques] + [-1], dtype='int32')
+        return store_codes[codes]
+
+    def extend(self, rows, dates, column_name, expected_values, actual_values):
+        self.append_arrays({
+            'row': np.asarray(rows),
+            'column': np.full(len(rows), self.column_id(column_name)),
+            'expected': np.asarray(expected_values, dtype='float64'),
+            'actual': np.asarray(actual_values, dtype='float64'),
+            'date': self.encode_dates(dates),
+        })
+
+    def extend_store(self, other):
+        # Appends another store's findings in their order, re-coding its column and date tables into this one
+        arrays = other.arrays()
+        column_ids = np.array([self.column_id(column_name) for column_name in other.column_names] + [0], dtype='int16')
+        date_codes = np.array([self.date_code(value) for value in other.date_values] + [-1], dtype='int32')
+        self.append_arrays(dict(arrays, column=column_ids[arrays['column']], date=date_codes[arrays['date']]))
+
+    def append_arrays(self, values):
+        size = len(values['row'])
+        start = 0
+        while start < size:
+            if not self.chunks or self.filled[-1] == len(self.chunks[-1]['row']):
+                capacity = min(self.chunk_size, max(self.INITIAL_CAPACITY, len(self), size - start))
+                self.chunks.append({field: np.empty(capacity, dtype=dtype) for field, dtype in self.FIELDS.items()})
+                self.filled.append(0)
+            chunk, offset = self.chunks[-1], self.filled[-1]
+            count = min(size - start, len(chunk['row']) - offset)
+            for field, field_values in values.items():
+                chunk[field][offset:offset + count] = field_values[start:start + count]
+            self.filled[-1] += count
+            start += count
+
+    def arrays(self):
+        # The chunks are merged once into a single exactly sized chunk, so the arrays handed out (and kept in
+        # caches) never hold on to spare capacity
+        if len(self.chunks) != 1 or self.filled[0] != len(self.chunks[0]['row']):
+            self.trim()
+        if not self.chunks:
+            return {field: np.empty(0, dtype=dtype) for field, dtype in self.FIELDS.items()}
+        return dict(self.chunks[0])
+
+    def trim(self):
+        merged = {
+            field: np.concatenate([chunk[field][:filled] for chunk, filled in zip(self.chunks, self.filled)]
+                                  or [np.empty(0, dtype=dtype)])
+            for field, dtype in self.FIELDS.items()
+        }
+        self.chunks = [merged] if len(merged['row']) else []
+        self.filled = [len(merged['row'])] if len(merged['row']) else []
+
+    def sort_by_row(self):
+        # Stable, so findings within a row keep the order the checks ran in
+        arrays = self.arrays()
+        if len(arrays['row']) > 1 and not (np.diff(arrays['row']) >= 0).all():
+            order = np.argsort(arrays['row'], kind='stable')
+            arrays = {field: array[order] for field, array in arrays.items()}
+        self.chunks = [arrays] if len(arrays['row']) else []
+        self.filled = [len(arrays['row'])] if len(arrays['row']) else []
+
+    def remap_rows(self, old_rows, new_rows):
+        # Copy holding only the findings on old_rows, renumbered to the matching new_rows
+        arrays = self.arrays()
+        order = np.argsort(old_rows)
+        old_rows, new_rows = np.asarray(old_rows)[order], np.asarray(new_rows)[order]
+        positions = np.searchsorted(old_rows, arrays['row']).clip(max=max(len(old_rows) - 1, 0))
+        kept = old_rows[positions] == arrays['row'] if len(old_rows) else np.zeros(len(arrays['row']), dtype=bool)
+        remapped = MismatchStore(self.chunk_size)
+        remapped.column_names, remapped.column_ids = list(self.column_names), dict(self.column_ids)
+        remapped.date_values, remapped.date_codes = list(self.date_values), dict(self.date_codes)
+        remapped.append_arrays(dict({field: array[kept] for field, array in arrays.items()}, row=new_rows[positions[kept]]))
+        return remapped
+
+    def date_column(self, codes):
+        if not self.date_values:
+            return np.full(len(codes), None, dtype=object)
+        dates = pd.Index(self.date_values)
+        return dates.take(codes, allow_fill=True, fill_value=np.nan)
+
+    def to_frame(self):
+        arrays = self.arrays()
+        return pd.DataFrame({
+            'Row': arrays['row'],
+            'Date': self.date_column(arrays['date']),
+            'Column': pd.Categorical.from_codes(arrays['column'], categories=self.column_names),
+            'Expected': arrays['expected'],
+            'Actual': arrays['actual'],
+        }, copy=False)
+
+    def to_arrow(self):
+        # Numeric buffers are handed to Arrow without copying; Column becomes a dictionary array
+        import pyarrow as pa
+        arrays = self.arrays()
+        return pa.table({
+            'Row': pa.array(arrays['row']),
+            'Date': pa.array(self.date_column(arrays['date'])),
+            'Column': pa.DictionaryArray.from_arrays(pa.array(arrays['column']), pa.array(self.column_names, type=pa.string())),
+            'Expected': pa.array(arrays['expected']),
+            'Actual': pa.array(arrays['actual']),
+        })
+
+def findings_frame(findings):
+    # Modules still building lists of dicts share the display path with the columnar store
+    return findings.to_frame() if isinstance(findings, MismatchStore) else pd.DataFrame(findings)
+
+def check_mismatch_columns(df, column_name, expected_values, mismatched_data, abs_tolerance=ABS_TOLERANCE,
+                           rel_tolerance=REL_TOLERANCE, decimals=ROUND_DECIMALS, flag_missing=False):
+    expected_values = np.broadcast_to(np.asarray(expected_values, dtype='float64'), (len(df),))
+    actual_values = column_values(df, column_name)
+    # A NaN expected value means the rule does not apply to that row, unless flag_missing asks for
+    # those rows to be reported with no expected value
+    missing_expected = np.isnan(expected_values)
+    mismatch_mask = ~missing_expected & values_differ(actual_values, expected_values, abs_tolerance, rel_tolerance, decimals)
+    if flag_missing:
+        mismatch_mask |= missing_expected
+    if not mismatch_mask.any():
+        return
+    dates = df['date'][mismatch_mask] if 'date' in df.columns else np.full(int(mismatch_mask.sum()), None, dtype=object)
+    rows = df.index[mismatch_mask].to_numpy() + ROW_OFFSET
+    mismatched_data.extend(rows, dates, column_name, expected_values[mismatch_mask], actual_values[mismatch_mask])
+
+def find_wallet_mismatches(df, pg_rate=WALLET_PG_RATE, gst_multiplier=WALLET_GST_MULTIPLIER):
+    df = to_pandas(df)
+    mismatched_data = MismatchStore()
+    try:
+        check_mismatch_columns(df, 'total sale ai', column_values(df, 'wallet'), mismatched_data)
+
+        total_sale_ai = column_values(df, 'total sale ai')
+        check_mismatch_columns(df, 'pg charges on mrp', total_sale_ai * pg_rate, mismatched_data)
+
+        pg_charges = column_values(df, 'pg charges on mrp')
+        check_mismatch_columns(df, 'pg+gst', pg_charges * gst_multiplier, mismatched_data)
+
+        calculated_buying_amt = total_sale_ai - column_values(df, 'pg+gst') - column_values(df, 'direct payment from employee')
+        check_mismatch_columns(df, 'buying amt ai', calculated_buying_amt, mismatched_data)
+
+        calculated_selling_amount = safe_divide(total_sale_ai, column_values(df, 'gst'))
+        check_mismatch_columns(df, 'selling amount', calculated_selling_amount, mismatched_data)
+    except Exception as e:
+        logging.error(f"Error reconciling wallet ledger: {e}")
+
+    # Keep the row-by-row ordering reviewers are used to
+    mismatched_data.sort_by_row()
+    return mismatched_data
+
+def find_commission_mismatches(df, commission_pct_column, selling_pax_column=None, selling_price_column=None,
+                               selling_transport_column=None, include_penalties=False):
+    df = to_pandas(df)
+    mismatched_data = MismatchStore()
+    try:
+        selling_amount = column_values(df, 'selling amount')
+        commission = column_values(df, 'commission')
+        check_mismatch_columns(df, 'buying amt ai', selling_amount - commission, mismatched_data)
+
+        if selling_pax_column and selling_price_column:
+            calculated_selling_amount = column_values(df, selling_pax_column) * column_values(df, selling_price_column)
+            if selling_transport_column:
+                calculated_selling_amount = calculated_selling_amount + column_values(df, selling_transport_column)
+            check_mismatch_columns(df, 'selling amount', calculated_selling_amount, mismatched_data)
+
+        calculated_commission = selling_amount * column_values(df, commission_pct_column)
+        if include_penalties:
+            calculated_commission = calculated_commission + column_values(df, 'penalty on vendor') - column_values(df, 'penalty on smartq')
+        check_mismatch_columns(df, 'commission', calculated_commission, mismatched_data)
+    except Exception as e:
+        logging.error(f"Error validating commission columns: {e}")
+
+    mismatched_data.sort_by_row()
+    return mismatched_data
+
+def pivot_with_averages(df, group_columns, average_columns, pair_columns=None):
+    # One hash-based groupby replaces pivot_table + groupby + merge, so high-cardinality keys such as
+    # 'menu item' are factorised once instead of three times
+    df = to_pandas(df)
+    grouped = df.groupby(group_columns, sort=True, observed=True)
+    combined_df = grouped[list(average_columns.values())].mean()
+    combined_df.columns = list(average_columns.keys())
+    combined_df.insert(0, 'days', grouped.size())
+    return pair_days_and_averages(combined_df.reset_index(), average_columns, pair_columns)
+
+def pair_days_and_averages(combined_df, average_columns, pair_columns=None):
+    # Some reports merge the day counts and averages on fewer keys than they group by; pair_columns keeps
+    # that pairing (each day count against every average of the coarser group)
+    if pair_columns is None:
+        return combined_df
+    return combined_df.drop(columns=list(average_columns)).merge(combined_df.drop(columns='days'), on=pair_columns)
+
+def total(values):
+    # Whole-month sums and distinct counts go through these helpers (and pivots through pivot_with_averages) so
+    # a streamed month can swap in mergeable partials and never hold its rows
+    return values.sum()
+
+def distinct_count(values):
+    return values.nunique()
+
+def evaluate_conditional(df, category_column, branches, default=None):
+    # branches is a list of (categories, formula) pairs; each formula receives the slice of rows in its
+    # categories and returns the expected values for that slice. Rows matched by no branch fall back to
+    # default, or get NaN (no check) when there is none.
+    df = to_pandas(df)
+    if category_column in df.columns:
+        codes, uniques = pd.factorize(df[category_column])
+    else:
+        codes, uniques = np.full(len(df), -1), []
+    branch_of_category = np.full(len(uniques) + 1, len(branches))
+    for branch_id, (categories, formula) in reversed(list(enumerate(branches))):
+        branch_of_category[:-1][np.isin(np.asarray(uniques, dtype=object), list(categories))] = branch_id
+    # code -1 (empty cell) indexes the trailing "no branch" slot
+    branch_ids = branch_of_category[codes]
+
+    result = np.full(len(df), np.nan)
+    formulas = [formula for _, formula in branches] + [default]
+    for branch_id, formula in enumerate(formulas):
+        mask = branch_ids == branch_id
+        if formula is not None and mask.any():
+            result[mask] = formula(df[mask])
+    return result
+
+def collect_issue_rows(df, mask, column_labels):
+    issue_df = df.loc[mask, list(column_labels.values())]
+    issue_df.columns = list(column_labels.keys())
+    issue_df.insert(0, 'Row', issue_df.index + ROW_OFFSET)
+    return issue_df.to_dict('records')
+
+def karbon_expense_ledger(df, buying_amount_column='buying amt ai'):
+    # A row carries a Karbon expense when any of the expense cells is filled with something other than 0;
+    # the mask is computed over the whole block at once and the ledger keeps only those rows
+    df = to_pandas(df)
+    expense_cells = df[list(KARBON_EXPENSE_COLUMNS.values())]
+    has_expense = (expense_cells.notna() & expense_cells.ne(0)).any(axis=1)
+    ledger_df = df.loc[has_expense, [buying_amount_column] + list(KARBON_EXPENSE_COLUMNS.values())]
+    ledger_df.columns = ['Buying Amount'] + list(KARBON_EXPENSE_COLUMNS.keys())
+    ledger_df.insert(0, 'Row', ledger_df.index + ROW_OFFSET)
+    return ledger_df.reset_index(drop=True)
+
+def expense_totals(ledger_df, group_column):
+    amounts = ledger_df.assign(Amount=pd.to_numeric(ledger_df['Amount'], errors='coerce'))
+    totals_df = amounts.groupby(group_column, dropna=False).agg(Expenses=('Row', 'size'), Amount=('Amount', 'sum'))
+    return totals_df.reset_index()
+
+def select_by_category(df, category_column, source_columns):
+    # source_columns maps each category to the column holding its expected value. The candidate columns are
+    # stacked once and every row gathers from its category's column in a single indexed read; rows whose
+    # category is not mapped get NaN.
+    df = to_pandas(df)
+    candidate_columns = list(dict.fromkeys(source_columns.values()))
+    candidates = np.column_stack([column_values(df, col) for col in candidate_columns] + [np.full(len(df), np.nan)])
+    if category_column in df.columns:
+        codes, uniques = pd.factorize(df[category_column])
+    else:
+        codes, uniques = np.full(len(df), -1), []
+    unmapped = len(candidate_columns)
+    column_of_category = np.array(
+        [candidate_columns.index(source_columns[category]) if category in source_columns else unmapped for category in uniques]
+        + [unmapped],
+        dtype='int64'
+    )
+    return candidates[np.arange(len(df)), column_of_category[codes]]
+
+def tiered_values(categories, quantities, tiers):
+    # tiers maps a category to (upper bound, value) bands in ascending order; the last band should be
+    # open-ended (np.inf). Rows whose category has no tiers get NaN.
+    result = np.full(len(quantities), np.nan)
+    for category, bands in tiers.items():
+        mask = categories == category
+        bounds = np.array([bound for bound, _ in bands], dtype='float64')
+        band_values = np.array([value for _, value in bands], dtype='float64')
+        result[mask] = band_values[np.searchsorted(bounds, quantities[mask], side='left')]
+    return result
+
+def text_dependency(column):
+    # A dependency on a sheet column read as raw cell values (e.g. compared with text) rather than as numbers;
+    # the same column can be a numeric dependency of other formulas
+    return ('text', column)
+
+def evaluate_derived_columns(df, derived_columns, text_columns=()):
+    # derived_columns maps a name to (dependencies, formula). Dependencies are sheet columns, text_dependency
+    # keys or other derived names; the graph is evaluated in topological order, so every sheet column is read
+    # once and every intermediate is computed once, however many rules share it.
+    df = to_pandas(df)
+    graph = {name: dependencies for name, (dependencies, _) in derived_columns.items()}
+    values = {}
+    for name in TopologicalSorter(graph).static_order():
+        if name in derived_columns:
+            dependencies, formula = derived_columns[name]
+            values[name] = formula(*(values[dependency] for dependency in dependencies))
+        elif isinstance(name, tuple):
+            values[name] = text_values(df, name[1])
+        elif name in text_columns:
+            values[name] = text_values(df, name)
+        else:
+            values[name] = column_values(df, name)
+    return values
+
+def find_derived_mismatches(df, derived_columns, checks, text_columns=(), flag_missing=()):
+    # checks is an ordered list of (sheet column, derived name) pairs
+    df = to_pandas(df)
+    mismatched_data = MismatchStore()
+    try:
+        values = evaluate_derived_columns(df, derived_columns, text_columns)
+        for column_name, derived_name in checks:
+            check_mismatch_columns(df, column_name, values[derived_name], mismatched_data,
+                                   flag_missing=column_name in flag_missing)
+    except Exception as e:
+        logging.error(f"Error evaluating derived columns: {e}")
+
+    mismatched_data.sort_by_row()
+    return mismatched_data